@@ -0,0 +1,119 @@
+"""Content-addressed file store for report evidence.
+
+Uploads are streamed chunk by chunk into a temporary file while their
+SHA-256 is computed, then renamed to <root>/<d[:2]>/<d[2:4]>/<digest>.
+Identical files therefore share one copy, and the size limit is enforced
+as bytes arrive rather than after the whole body has been buffered. Only
+image and audio formats recognised by their leading bytes are accepted.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from starlette.concurrency import run_in_threadpool
+
+DIGEST_FORMAT = re.compile(r'^[0-9a-f]{64}$')
+
+# Leading bytes of the evidence formats we accept
+_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"ID3", "audio/mpeg"),
+    (b"\xff\xfb", "audio/mpeg"),
+    (b"\xff\xf3", "audio/mpeg"),
+    (b"OggS", "audio/ogg"),
+]
+
+
+class BlobTooLarge(ValueError):
+    """Raised when an upload exceeds the store's size limit"""
+
+
+class UnsupportedBlobType(ValueError):
+    """Raised when an upload is not one of the accepted image/audio formats"""
+
+
+class EmptyBlob(ValueError):
+    """Raised when an upload has no content at all"""
+
+
+def sniff_content_type(head):
+    """Guess the media type from a file's first 12 bytes; None if not an accepted format"""
+    for signature, content_type in _SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "audio/wav"
+    if head[4:8] == b"ftyp":
+        return "audio/mp4"
+    return None
+
+
+class BlobStore:
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._tmp_dir = os.path.join(root, "tmp")
+
+    def path_for(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def exists(self, digest):
+        return bool(DIGEST_FORMAT.match(digest)) and os.path.exists(self.path_for(digest))
+
+    @staticmethod
+    def _accept(head):
+        content_type = sniff_content_type(head)
+        if content_type is None:
+            raise UnsupportedBlobType("Only image and audio files are accepted")
+        return content_type
+
+    async def save_stream(self, chunks):
+        """Store an async iterable of byte chunks.
+
+        Returns (digest, size, content_type, duplicate). Raises BlobTooLarge
+        as soon as the limit is passed, UnsupportedBlobType once the first
+        bytes rule the format out and EmptyBlob for no bytes at all; partial
+        files are always removed.
+        """
+        os.makedirs(self._tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir)
+        hasher = hashlib.sha256()
+        size = 0
+        head = b""
+        content_type = None
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise BlobTooLarge(f"File exceeds {self.max_bytes} bytes")
+                    hasher.update(chunk)
+                    if content_type is None and len(head) < 12:
+                        head += chunk[:12 - len(head)]
+                        if len(head) == 12:
+                            content_type = self._accept(head)
+                    await run_in_threadpool(tmp_file.write, chunk)
+            if size == 0:
+                raise EmptyBlob("Empty upload")
+            if content_type is None:
+                content_type = self._accept(head)
+
+            digest = hasher.hexdigest()
+            path = self.path_for(digest)
+            duplicate = os.path.exists(path)
+            if duplicate:
+                os.unlink(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            return digest, size, content_type, duplicate
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
@@ -0,0 +1,190 @@
+"""Request authentication for the carrier/CPaaS /webhook/check endpoint.
+
+A carrier signs the ASCII string "<ts>.<nonce>.<e164>" with its ed25519
+private key and posts {"key_id", "e164", "ts", "nonce", "sig"}, where sig is
+"ed25519:" followed by the base64 signature. Its public key is registered as
+base64 of the raw 32 bytes under key_id. A request is accepted when:
+
+* ts is within WEBHOOK_MAX_SKEW_SECONDS of our clock,
+* the signature verifies against the key_id's active public key, and
+* the (key_id, nonce) pair has not been seen while ts could still be valid.
+"""
+import asyncio
+import base64
+import binascii
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+WEBHOOK_MAX_SKEW_SECONDS = int(os.environ.get('WEBHOOK_MAX_SKEW_SECONDS', '300'))
+
+SIGNATURE_PREFIX = "ed25519:"
+
+_CROCKFORD = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+
+class WebhookError(Exception):
+    """A rejected webhook call, carrying the HTTP status to answer with"""
+
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def new_trace_id():
+    """Time-ordered "cv_" + ULID (48-bit ms timestamp, 80 random bits)"""
+    value = (int(time.time() * 1000) << 80) | int.from_bytes(os.urandom(10), "big")
+    chars = []
+    for _ in range(26):
+        value, index = divmod(value, 32)
+        chars.append(_CROCKFORD[index])
+    return "cv_" + "".join(reversed(chars))
+
+
+def parse_public_key(encoded):
+    """Build an Ed25519PublicKey from base64 of its raw 32 bytes; raise ValueError if invalid"""
+    try:
+        return Ed25519PublicKey.from_public_bytes(base64.b64decode(encoded, validate=True))
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid ed25519 public key: {e}")
+
+
+def signed_message(ts, nonce, e164):
+    return f"{ts}.{nonce}.{e164}".encode("ascii")
+
+
+class CarrierKeyCache:
+    """LRU/TTL cache of parsed public keys per key_id, including unknown ids"""
+
+    def __init__(self, max_entries=1000, ttl_seconds=300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+
+    def get(self, key_id):
+        """Return (cached, public_key); public_key is None for unknown or revoked ids"""
+        entry = self._entries.get(key_id)
+        if entry is None:
+            return False, None
+        expires_at, public_key = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key_id]
+            return False, None
+        self._entries.move_to_end(key_id)
+        return True, public_key
+
+    def put(self, key_id, public_key):
+        self._entries[key_id] = (time.monotonic() + self.ttl_seconds, public_key)
+        self._entries.move_to_end(key_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key_id):
+        self._entries.pop(key_id, None)
+
+
+class NonceCache:
+    """Bounded replay cache of (key_id, nonce) pairs.
+
+    A nonce must be remembered for as long as its ts can pass the skew check,
+    which is at most 2 * max_skew after it first arrives. Entries therefore
+    expire in arrival order and are purged from the front. When the cache is
+    full of unexpired nonces new calls are refused rather than risk a replay.
+    """
+
+    def __init__(self, max_entries=100000, max_skew=WEBHOOK_MAX_SKEW_SECONDS):
+        self.max_entries = max_entries
+        self.retention = 2 * max_skew
+        self._entries = OrderedDict()
+
+    def _purge(self, now):
+        while self._entries:
+            expires_at = next(iter(self._entries.values()))
+            if expires_at > now:
+                break
+            self._entries.popitem(last=False)
+
+    def add(self, key_id, nonce):
+        """Remember a nonce; return False if it was already seen"""
+        now = time.monotonic()
+        self._purge(now)
+        key = (key_id, nonce)
+        if key in self._entries:
+            return False
+        if len(self._entries) >= self.max_entries:
+            raise WebhookError(503, "Replay cache is full, please retry later")
+        self._entries[key] = now + self.retention
+        return True
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class WebhookVerifier:
+    """Check skew, signature and replay for one webhook call.
+
+    `load_key(key_id)` is a coroutine returning the base64 public key of an
+    active carrier key, or None. Signatures are verified on a small thread
+    pool so a burst of calls never stalls the event loop.
+    """
+
+    def __init__(self, load_key, key_cache=None, nonce_cache=None, max_skew=WEBHOOK_MAX_SKEW_SECONDS, max_workers=2):
+        self.load_key = load_key
+        self.key_cache = key_cache or CarrierKeyCache()
+        self.nonce_cache = nonce_cache or NonceCache(max_skew=max_skew)
+        self.max_skew = max_skew
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="webhook-sig")
+
+    async def public_key(self, key_id):
+        cached, public_key = self.key_cache.get(key_id)
+        if cached:
+            return public_key
+        encoded = await self.load_key(key_id)
+        public_key = None
+        if encoded:
+            try:
+                public_key = parse_public_key(encoded)
+            except ValueError as e:
+                print(f"⚠️ Warning: Carrier key {key_id} is unusable: {e}")
+        self.key_cache.put(key_id, public_key)
+        return public_key
+
+    @staticmethod
+    def _signature_valid(public_key, signature, message):
+        try:
+            public_key.verify(signature, message)
+            return True
+        except InvalidSignature:
+            return False
+
+    async def verify(self, key_id, e164, ts, nonce, sig):
+        """Raise WebhookError unless the call is fresh, correctly signed and not a replay"""
+        if abs(time.time() - ts) > self.max_skew:
+            raise WebhookError(401, "Timestamp outside the allowed clock skew")
+        if not sig.startswith(SIGNATURE_PREFIX):
+            raise WebhookError(400, f"Signature must start with {SIGNATURE_PREFIX}")
+        try:
+            signature = base64.b64decode(sig[len(SIGNATURE_PREFIX):], validate=True)
+            message = signed_message(ts, nonce, e164)
+        except (binascii.Error, UnicodeEncodeError):
+            raise WebhookError(400, "Malformed signature or payload")
+
+        public_key = await self.public_key(key_id)
+        if public_key is None:
+            raise WebhookError(401, "Unknown or revoked key_id")
+
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(self._executor, self._signature_valid, public_key, signature, message):
+            raise WebhookError(401, "Invalid signature")
+
+        # Only correctly signed calls may occupy the replay cache
+        if not self.nonce_cache.add(key_id, nonce):
+            raise WebhookError(409, "Nonce already used")
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
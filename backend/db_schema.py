@@ -0,0 +1,312 @@
+"""Declarative Mongo indexes and data migrations for the Check Vero backend.
+
+Run on every startup from server.py, or by hand. Each data migration is
+applied once: applied ones are recorded in the schema_migrations
+collection, and a lock document there keeps concurrently starting workers
+from running them at the same time.
+
+    python db_schema.py            # apply migrations and create indexes
+    python db_schema.py --check    # only report route queries without an index
+    python db_schema.py --explain  # also ask the live database for its query plans
+"""
+import argparse
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+from phone_utils import normalize_e164, phone_lookup_key
+from rollups import rebuild_rollups
+from stats_counters import rebuild_stats_counters
+
+# Keep verification logs forever unless a retention period is configured
+VERIFICATION_LOG_RETENTION_DAYS = int(os.environ.get('VERIFICATION_LOG_RETENTION_DAYS', '0'))
+
+# A worker that dies while migrating holds the lock at most this long
+MIGRATION_LOCK_SECONDS = int(os.environ.get('MIGRATION_LOCK_SECONDS', '300'))
+MIGRATION_LOCK_ID = "lock"
+
+
+def _verification_log_indexes():
+    indexes = [
+        # Newest-first listing and oldest-first exports with a stable tie-breaker
+        IndexModel([("timestamp", DESCENDING), ("log_id", DESCENDING)], name="timestamp_log_id")
+    ]
+    if VERIFICATION_LOG_RETENTION_DAYS > 0:
+        # TTL indexes must be single-field
+        indexes.append(IndexModel(
+            [("timestamp", ASCENDING)],
+            name="timestamp_ttl",
+            expireAfterSeconds=VERIFICATION_LOG_RETENTION_DAYS * 86400
+        ))
+    return indexes
+
+
+# Required indexes per collection
+INDEXES = {
+    "phone_numbers": [
+        IndexModel(
+            [("phone_key", ASCENDING)],
+            name="phone_key_unique",
+            unique=True,
+            partialFilterExpression={"phone_key": {"$exists": True}}
+        ),
+        IndexModel([("phone_id", ASCENDING)], name="phone_id_unique", unique=True),
+        IndexModel(
+            [("registered_by", ASCENDING), ("is_active", ASCENDING), ("created_at", DESCENDING), ("phone_id", DESCENDING)],
+            name="registered_by_active_created"
+        ),
+        IndexModel(
+            [("is_active", ASCENDING), ("created_at", DESCENDING), ("phone_id", DESCENDING)],
+            name="active_created"
+        ),
+    ],
+    "users": [
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id_unique", unique=True),
+    ],
+    "reports": [
+        IndexModel([("report_id", ASCENDING)], name="report_id_unique", unique=True),
+        IndexModel(
+            [("user_id", ASCENDING), ("is_active", ASCENDING), ("created_at", DESCENDING), ("report_id", DESCENDING)],
+            name="user_active_created"
+        ),
+        IndexModel(
+            [("is_active", ASCENDING), ("created_at", DESCENDING), ("report_id", DESCENDING)],
+            name="active_created"
+        ),
+    ],
+    "verification_logs": _verification_log_indexes(),
+    "rollups": [
+        IndexModel([("granularity", ASCENDING), ("bucket_start", ASCENDING)], name="granularity_bucket_start"),
+        # Minute and hour buckets carry their own expiry time
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "carrier_keys": [
+        IndexModel([("key_id", ASCENDING)], name="key_id_unique", unique=True),
+    ],
+    # Shared token buckets (RATE_LIMIT_STORE=mongo); idle buckets expire
+    "rate_limits": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# Queries issued by server.py routes: (route, collection, equality fields, range fields, sort)
+ROUTE_QUERIES = [
+    ("verify_phone_number", "phone_numbers", ["phone_key", "is_active"], [], []),
+    ("register_phone_number", "phone_numbers", ["phone_key"], [], []),
+    ("write_behind counters", "phone_numbers", ["phone_id"], [], []),
+    ("get_my_phone_numbers (business)", "phone_numbers", ["registered_by", "is_active"], ["created_at"],
+     [("created_at", -1), ("phone_id", -1)]),
+    ("get_my_phone_numbers (admin)", "phone_numbers", ["is_active"], ["created_at"],
+     [("created_at", -1), ("phone_id", -1)]),
+    ("get_analytics_summary recent registrations", "phone_numbers", ["is_active"], [], [("created_at", -1)]),
+    ("register_user username", "users", ["username"], [], []),
+    ("register_user email", "users", ["email"], [], []),
+    ("get_user_profile", "users", ["user_id"], [], []),
+    ("get_my_reports", "reports", ["user_id", "is_active"], ["created_at"], [("created_at", -1), ("report_id", -1)]),
+    ("get_report_screenshot", "reports", ["report_id", "is_active"], [], []),
+    ("get_all_reports", "reports", ["is_active"], ["created_at"], [("created_at", -1), ("report_id", -1)]),
+    ("get_analytics_summary recent reports", "reports", ["is_active"], [], [("created_at", -1)]),
+    ("carrier_webhook_check", "carrier_keys", ["key_id", "is_active"], [], []),
+    ("get_analytics_rollups", "rollups", ["granularity"], ["bucket_start"], []),
+    ("get_verification_logs", "verification_logs", [], [], [("timestamp", -1)]),
+    ("export_reports", "reports", ["is_active"], ["created_at"], [("created_at", 1), ("report_id", 1)]),
+    ("export_verification_logs", "verification_logs", [], ["timestamp"], [("timestamp", 1), ("log_id", 1)]),
+]
+
+
+def _index_supports(index_keys, unique, equality, ranges, sort):
+    """Whether an index with these keys serves the query without a scan or in-memory sort"""
+    fields = [field for field, _ in index_keys]
+    if unique and not sort and set(fields) <= set(equality):
+        # Point lookup: at most one document left to filter on the other fields
+        return True
+    prefix = set(fields[:len(equality)])
+    if prefix != set(equality):
+        return False
+
+    rest = index_keys[len(equality):]
+    if sort:
+        if len(rest) < len(sort):
+            return False
+        directions = [index_dir * sort_dir for (index_field, index_dir), (sort_field, sort_dir) in zip(rest, sort)
+                      if index_field == sort_field]
+        # Every sort field must follow in order, all forwards or all backwards
+        if len(directions) != len(sort) or len(set(directions)) != 1:
+            return False
+        return all(field in (f for f, _ in sort) for field in ranges)
+    if ranges:
+        return len(rest) >= len(ranges) and {field for field, _ in rest[:len(ranges)]} == set(ranges)
+    return True
+
+
+def unindexed_route_queries(indexes=INDEXES):
+    """List (route, collection) pairs whose query no declared index supports"""
+    missing = []
+    for route, collection, equality, ranges, sort in ROUTE_QUERIES:
+        declared = [
+            (list(model.document["key"].items()), model.document.get("unique", False))
+            for model in indexes.get(collection, [])
+        ]
+        if not any(_index_supports(keys, unique, equality, ranges, sort) for keys, unique in declared):
+            missing.append((route, collection))
+    return missing
+
+
+async def explain_route_queries(db):
+    """Ask the server for each route query's winning plan and report collection scans"""
+    scans = []
+    for route, collection, equality, ranges, sort in ROUTE_QUERIES:
+        query = {field: "" for field in equality}
+        query.update({field: {"$gte": 0} for field in ranges})
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = await cursor.explain()
+        if "COLLSCAN" in str(plan.get("queryPlanner", {}).get("winningPlan", {})):
+            scans.append((route, collection))
+    return scans
+
+
+async def backfill_phone_keys(db):
+    """Backfill E.164 numbers and lookup keys on records created before hashing"""
+    updates = []
+    async for phone in db.phone_numbers.find({"phone_key": {"$exists": False}}, {"phone_number": 1}):
+        e164 = normalize_e164(phone["phone_number"])
+        if e164 is None:
+            print(f"⚠️ Warning: Skipping unparseable registry number {phone['_id']}")
+            continue
+        updates.append(UpdateOne(
+            {"_id": phone["_id"]},
+            {"$set": {"phone_number": e164, "phone_key": phone_lookup_key(e164)}}
+        ))
+
+    if updates:
+        await db.phone_numbers.bulk_write(updates, ordered=False)
+        print(f"✅ Backfilled lookup keys for {len(updates)} phone numbers")
+
+
+# Data migrations, applied in order before indexes are built
+MIGRATIONS = [
+    backfill_phone_keys,
+    rebuild_stats_counters,
+    rebuild_rollups,
+]
+
+
+async def ensure_indexes(db, indexes=INDEXES):
+    """Create every declared index; rebuild any whose definition has changed"""
+    for collection, models in indexes.items():
+        existing = [index async for index in db[collection].list_indexes()]
+        for model in models:
+            spec = model.document
+            keys = list(spec["key"].items())
+            # Indexes built earlier may carry the same keys under another name
+            current = next(
+                (index for index in existing
+                 if index["name"] == spec["name"] or list(index["key"].items()) == keys),
+                None
+            )
+            if current is not None and _same_definition(current, spec):
+                continue
+            if current is not None:
+                print(f"🔧 Rebuilding index {collection}.{current['name']} as {spec['name']}")
+                await db[collection].drop_index(current["name"])
+            try:
+                await db[collection].create_indexes([model])
+            except OperationFailure as e:
+                print(f"⚠️ Warning: Could not create index {collection}.{spec['name']}: {e}")
+
+
+def _same_definition(current, spec):
+    options = ("unique", "partialFilterExpression", "expireAfterSeconds")
+    return (
+        current["name"] == spec["name"]
+        and list(current["key"].items()) == list(spec["key"].items())
+        and all(current.get(option) == spec.get(option) for option in options)
+    )
+
+
+async def acquire_migration_lock(db, holder):
+    """Take the migration lock if it is free or has expired; returns whether we hold it"""
+    now = datetime.utcnow()
+    try:
+        await db.schema_migrations.update_one(
+            {"_id": MIGRATION_LOCK_ID, "expires_at": {"$lt": now}},
+            {"$set": {"holder": holder, "expires_at": now + timedelta(seconds=MIGRATION_LOCK_SECONDS)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        # Another worker holds an unexpired lock
+        return False
+
+
+async def release_migration_lock(db, holder):
+    await db.schema_migrations.delete_one({"_id": MIGRATION_LOCK_ID, "holder": holder})
+
+
+async def applied_migrations(db):
+    return {doc["_id"] async for doc in db.schema_migrations.find({"_id": {"$ne": MIGRATION_LOCK_ID}}, {"_id": 1})}
+
+
+async def run_migrations(db, poll_interval=1.0):
+    """Apply pending data migrations, build indexes and warn about unindexed route queries.
+
+    Workers that find the lock taken wait for it, then see the migrations
+    already recorded and only re-check indexes. A failing migration is not
+    recorded and its error is raised after the lock is released.
+    """
+    holder = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    while not await acquire_migration_lock(db, holder):
+        await asyncio.sleep(poll_interval)
+    try:
+        applied = await applied_migrations(db)
+        for migration in MIGRATIONS:
+            if migration.__name__ in applied:
+                continue
+            await migration(db)
+            await db.schema_migrations.insert_one({"_id": migration.__name__, "applied_at": datetime.utcnow()})
+            print(f"✅ Applied migration {migration.__name__}")
+        await ensure_indexes(db)
+    finally:
+        await release_migration_lock(db, holder)
+    for route, collection in unindexed_route_queries():
+        print(f"⚠️ Warning: {route} queries {collection} without a supporting index")
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Check Vero index bootstrap and migrations")
+    parser.add_argument("--check", action="store_true", help="only report unindexed route queries")
+    parser.add_argument("--explain", action="store_true", help="check live query plans for collection scans")
+    args = parser.parse_args()
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017/'))
+    db = client.checkvero
+    try:
+        if not args.check:
+            await run_migrations(db)
+            print("✅ Migrations applied and indexes ensured")
+
+        missing = unindexed_route_queries()
+        if args.explain:
+            missing += await explain_route_queries(db)
+        for route, collection in missing:
+            print(f"❌ {route}: {collection} query is not served by an index")
+        if not missing:
+            print("✅ Every route query is served by an index")
+        return 1 if missing else 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(_main()))
@@ -0,0 +1,88 @@
+"""Constant-memory NDJSON/CSV exports streamed straight from a Mongo cursor.
+
+Documents are read in batches and encoded batch by batch, so server memory
+is bounded by the batch size regardless of how much is exported. Exports
+run oldest first by (time field, id); a client that is cut off resumes with
+after=<time ISO>,<id> taken from the last row it received.
+"""
+import csv
+import io
+from datetime import datetime
+
+from fast_json import dumps
+from pagination import parse_cursor
+
+EXPORT_BATCH_SIZE = 1000
+
+# CSV columns per export; dotted names reach into sub-documents
+REPORT_COLUMNS = [
+    "report_id", "created_at", "user_id", "report_type", "status", "phone_number",
+    "email_address", "ai_analysis.risk_level", "ai_analysis.confidence_score", "description"
+]
+VERIFICATION_LOG_COLUMNS = ["log_id", "timestamp", "phone_number", "result", "ip_address"]
+
+
+def export_query(query, time_field, id_field, start=None, end=None, after=None):
+    """Add the time range and resume position to a base query"""
+    clauses = [query]
+    time_range = {}
+    if start:
+        time_range["$gte"] = start
+    if end:
+        time_range["$lt"] = end
+    if time_range:
+        clauses.append({time_field: time_range})
+    if after:
+        last_time, last_id = parse_cursor(after)
+        clauses.append({"$or": [
+            {time_field: {"$gt": last_time}},
+            {time_field: last_time, id_field: {"$gt": last_id}}
+        ]})
+    return {"$and": clauses} if len(clauses) > 1 else query
+
+
+async def iter_batches(collection, query, time_field, id_field, batch_size=EXPORT_BATCH_SIZE):
+    """Yield lists of documents, oldest first, fetching batch_size per round trip"""
+    cursor = collection.find(query, {"_id": 0}).sort(
+        [(time_field, 1), (id_field, 1)]
+    ).batch_size(batch_size)
+    batch = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def ndjson_stream(batches):
+    async for batch in batches:
+        yield b"".join(dumps(document) + b"\n" for document in batch)
+
+
+def _column_value(document, column):
+    value = document
+    for part in column.split("."):
+        if not isinstance(value, dict):
+            return ""
+        value = value.get(part)
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+async def csv_stream(batches, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for batch in batches:
+        for document in batch:
+            writer.writerow([_column_value(document, column) for column in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
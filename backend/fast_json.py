@@ -0,0 +1,71 @@
+"""JSON encoding for responses built straight from Mongo documents.
+
+dumps() encodes datetimes (ISO 8601, as datetime.isoformat() writes them),
+ObjectIds, UUIDs and Enums natively, so routes can return documents as read
+from Motor instead of copying each one to convert its fields and then
+having FastAPI walk the result again with jsonable_encoder. orjson does the
+encoding; the stdlib fallback produces the same output, only slower.
+
+Returning a BSONResponse from a route skips jsonable_encoder entirely. It
+is also the app's default response class, so routes that return plain
+dicts still get the fast final encoding step.
+"""
+import json
+import uuid
+from datetime import date, datetime
+from enum import Enum
+
+from bson import Decimal128, ObjectId
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+
+def _default(value):
+    """Types neither encoder handles natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def _stdlib_default(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return _default(value)
+
+
+def stdlib_dumps(content):
+    """dumps() without orjson: same output, several times slower"""
+    return json.dumps(
+        content, default=_stdlib_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(content):
+        """Encode content as compact UTF-8 JSON bytes"""
+        return orjson.dumps(content, default=_default, option=_OPTIONS)
+else:
+    dumps = stdlib_dumps
+
+
+class BSONResponse(JSONResponse):
+    """JSONResponse that accepts Mongo documents as they are"""
+
+    def render(self, content):
+        return dumps(content)
@@ -0,0 +1,91 @@
+from collections import deque
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over several named keyword groups.
+
+    All groups are compiled into one automaton, so a single pass over the text
+    finds every keyword of every group, with the same substring semantics as
+    `keyword in text`. A keyword may belong to more than one group.
+    """
+
+    def __init__(self, groups):
+        self.groups = {name: list(keywords) for name, keywords in groups.items()}
+
+        # Distinct keywords and, for each, the (group, position) pairs it fills
+        self._keywords = []
+        self._memberships = []
+        keyword_ids = {}
+        for name, keywords in self.groups.items():
+            for position, keyword in enumerate(keywords):
+                if keyword not in keyword_ids:
+                    keyword_ids[keyword] = len(self._keywords)
+                    self._keywords.append(keyword)
+                    self._memberships.append([])
+                self._memberships[keyword_ids[keyword]].append((name, position))
+
+        self._build(keyword_ids)
+
+    def _build(self, keyword_ids):
+        # Trie: per-node transition dicts and the keyword ids ending there
+        self._goto = [{}]
+        self._outputs = [[]]
+        for keyword, keyword_id in keyword_ids.items():
+            node = 0
+            for char in keyword:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._outputs.append([])
+                node = next_node
+            self._outputs[node].append(keyword_id)
+
+        # Failure links, breadth first; outputs of the fallback node are inherited.
+        # Transitions are then completed into a DFA so matching never backtracks.
+        fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = fail[fallback]
+                fail[child] = self._goto[fallback].get(char, 0)
+                if fail[child] == child:
+                    fail[child] = 0
+                self._outputs[child] = self._outputs[child] + self._outputs[fail[child]]
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            queue.extend(self._goto[node].values())
+            # Characters missing here follow the failure node's (already complete) moves
+            for char, target in self._goto[fail[node]].items():
+                self._goto[node].setdefault(char, target)
+
+        self._outputs = [tuple(output) for output in self._outputs]
+
+    def match(self, text):
+        """Return {group: [keywords found]} with keywords in their declared order"""
+        goto = self._goto
+        outputs = self._outputs
+
+        found = set()
+        node = 0
+        for char in text:
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                found.update(outputs[node])
+
+        positions = {name: [] for name in self.groups}
+        for keyword_id in found:
+            for name, position in self._memberships[keyword_id]:
+                positions[name].append(position)
+
+        return {
+            name: [self.groups[name][position] for position in sorted(positions[name])]
+            for name in self.groups
+        }
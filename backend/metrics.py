@@ -0,0 +1,212 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Recording on the request path is a bisect and a few integer increments;
+everything derived from other components' stats() (cache hit ratios, pool
+queue depth, write-behind backlog) is read only when /metrics is scraped.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from pymongo import monitoring
+from starlette.routing import Match
+
+# Seconds; 0.2/0.3/0.4 line up with the p50/p95/p99 SLOs
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name, _labels(self.labelnames, labels), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        self._values[labels] = value
+
+    def dec(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+
+class CallbackGauge:
+    """Metric whose values come from `callback()` as (label values, value) pairs at scrape time"""
+
+    def __init__(self, name, help_text, labelnames, callback, kind="gauge"):
+        self.kind = kind
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.callback = callback
+
+    def samples(self):
+        for labels, value in self.callback():
+            yield self.name, _labels(self.labelnames, labels), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (last is +Inf), sum, count]
+        self._series = {}
+
+    def observe(self, value, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self):
+        for labels, (counts, total, count) in list(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield self.name + "_bucket", _labels(self.labelnames, labels, f'le="{_number(bound)}"'), cumulative
+            yield self.name + "_sum", _labels(self.labelnames, labels), total
+            yield self.name + "_count", _labels(self.labelnames, labels), count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by method, route template and status"""
+
+    def __init__(self, app, requests_in_flight, request_duration):
+        self.app = app
+        self.requests_in_flight = requests_in_flight
+        self.request_duration = request_duration
+        self._route_paths = None
+
+    def _route_label(self, scope):
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            # Rejected before routing (e.g. rate limited): find the template the path would have hit
+            return self._match_route(scope)
+        if self._route_paths is None:
+            self._route_paths = {
+                route.endpoint: route.path for route in scope["app"].routes if hasattr(route, "endpoint")
+            }
+        return self._route_paths.get(endpoint, "unmatched")
+
+    @staticmethod
+    def _match_route(scope):
+        partial = None
+        for route in scope["app"].routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path
+            if match == Match.PARTIAL and partial is None:
+                partial = route.path
+        # Paths no route knows share one label so scanners cannot explode cardinality
+        return partial or "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.requests_in_flight.dec()
+            self.request_duration.observe(
+                time.perf_counter() - started, scope["method"], self._route_label(scope), str(status)
+            )
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener timing each command by collection and operation.
+
+    Listeners run on the driver's threads, so recording takes a lock.
+    """
+
+    def __init__(self, command_duration, command_failures):
+        self.command_duration = command_duration
+        self.command_failures = command_failures
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        self._collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+
+    def _finish(self, event):
+        return self._collections.pop((event.connection_id, event.request_id), "")
+
+    def succeeded(self, event):
+        collection = self._finish(event)
+        with self._lock:
+            self.command_duration.observe(event.duration_micros / 1e6, collection, event.command_name)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        with self._lock:
+            self.command_duration.observe(event.duration_micros / 1e6, collection, event.command_name)
+            self.command_failures.inc(collection, event.command_name)
@@ -0,0 +1,91 @@
+"""Keyset pagination and field projection for list endpoints.
+
+Pages are ordered newest first by (created_at, id) and continued with an
+`after=<created_at ISO>,<id>` cursor, so every page is one bounded index range
+scan no matter how deep the client pages.
+"""
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class PaginationError(ValueError):
+    """Raised for a malformed cursor, page size or field list"""
+
+
+def parse_cursor(after):
+    """Split an `after` cursor into (created_at, id)"""
+    try:
+        created_at, item_id = after.split(",", 1)
+        return datetime.fromisoformat(created_at), item_id
+    except ValueError:
+        raise PaginationError("Invalid cursor, expected after=<created_at>,<id>")
+
+
+def encode_cursor(document, id_field):
+    return f"{document['created_at'].isoformat()},{document[id_field]}"
+
+
+def build_projection(fields, allowed_fields, id_field):
+    """Turn a comma separated `fields` parameter into a Mongo projection.
+
+    Without `fields` every allowed field is returned. Anything else stored on
+    the documents (_id, phone_key, ...) is never exposed. The sort keys are
+    always included so the next cursor can be built. A dotted path under a
+    field that is already requested is dropped, since Mongo rejects the
+    overlapping pair as a path collision.
+    """
+    if not fields:
+        return {"_id": 0, **{field: 1 for field in sorted(allowed_fields)}}
+
+    requested = {"created_at", id_field}
+    for field in fields.split(","):
+        field = field.strip()
+        if not field:
+            continue
+        if field.split(".", 1)[0] not in allowed_fields:
+            raise PaginationError(f"Unknown field: {field}")
+        requested.add(field)
+
+    def covered(field):
+        parts = field.split(".")
+        return any(".".join(parts[:i]) in requested for i in range(1, len(parts)))
+
+    return {"_id": 0, **{field: 1 for field in sorted(requested) if not covered(field)}}
+
+
+async def fetch_page(collection, query, id_field, after=None, limit=DEFAULT_PAGE_SIZE, projection=None):
+    """Return (documents, next_cursor) for one page of `query`, newest first"""
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise PaginationError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    if after:
+        created_at, item_id = parse_cursor(after)
+        query = {
+            "$and": [
+                query,
+                {"$or": [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, id_field: {"$lt": item_id}}
+                ]}
+            ]
+        }
+
+    # One extra document tells us whether another page exists
+    documents = await collection.find(query, projection).sort(
+        [("created_at", -1), (id_field, -1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1], id_field)
+    return documents, next_cursor
+
+
+def set_page_headers(response, next_cursor, total_estimate):
+    """Expose paging metadata in headers so list bodies stay plain arrays"""
+    response.headers["X-Total-Count"] = str(total_estimate)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
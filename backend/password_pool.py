@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class PasswordPoolSaturated(Exception):
+    """Raised when too many hash/verify jobs are already waiting"""
+
+
+class PasswordHashPool:
+    """Runs passlib hashing and verification on a dedicated, bounded thread pool.
+
+    bcrypt releases the GIL while it works, so a small thread pool keeps the
+    CPU-heavy auth work off the event loop without the cost of processes.
+    Jobs beyond max_pending (running plus queued) are rejected instead of
+    piling up behind a login burst.
+    """
+
+    def __init__(self, pwd_context, max_workers=4, max_pending=64):
+        self.pwd_context = pwd_context
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._pending = 0
+        self._running = 0
+        self._stats_lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    async def hash(self, password):
+        return await self._submit(self.pwd_context.hash, password)
+
+    async def verify(self, plain_password, hashed_password):
+        return await self._submit(self.pwd_context.verify, plain_password, hashed_password)
+
+    def queue_depth(self):
+        """Jobs accepted but not yet picked up by a worker thread"""
+        return self._pending - self._running
+
+    def stats(self):
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "running": self._running,
+            "queued": self.queue_depth(),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.total_wait_seconds * 1000 / self.completed, 2) if self.completed else 0.0,
+            "avg_run_ms": round(self.total_run_seconds * 1000 / self.completed, 2) if self.completed else 0.0
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    async def _submit(self, func, *args):
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordPoolSaturated()
+
+        self._pending += 1
+        submitted_at = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._timed, func, args, submitted_at)
+        finally:
+            self._pending -= 1
+
+    def _timed(self, func, args, submitted_at):
+        started_at = time.perf_counter()
+        with self._stats_lock:
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            finished_at = time.perf_counter()
+            # Worker threads update these concurrently
+            with self._stats_lock:
+                self._running -= 1
+                self.completed += 1
+                self.total_wait_seconds += started_at - submitted_at
+                self.total_run_seconds += finished_at - started_at
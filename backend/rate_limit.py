@@ -0,0 +1,201 @@
+"""Token-bucket rate limiting middleware.
+
+Every client identity (authenticated user or IP address) gets one bucket per
+route policy. A bucket refills at `rate` tokens per second up to `burst`;
+a request that finds it empty is answered with HTTP 429 and a Retry-After
+telling the client how long to back off. Responses on limited routes carry
+RateLimit-Limit / RateLimit-Remaining / RateLimit-Reset / RateLimit-Policy.
+
+Bucket state lives in a pluggable store: ShardedMemoryStore for a single
+process, or MongoBucketStore (or anything else with the same async take())
+when several workers must share one set of limits.
+"""
+import json
+import math
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from starlette.requests import Request
+
+
+class RatePolicy:
+    """Allow `rate` requests per second on average and `burst` back to back"""
+
+    def __init__(self, name, rate, burst):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+
+    def headers(self, tokens):
+        return [
+            (b"ratelimit-limit", str(self.burst).encode()),
+            (b"ratelimit-remaining", str(math.floor(tokens)).encode()),
+            (b"ratelimit-reset", str(math.ceil((self.burst - tokens) / self.rate)).encode()),
+            (b"ratelimit-policy", f"{self.burst};w={math.ceil(self.burst / self.rate)}".encode()),
+        ]
+
+    def retry_after(self, tokens, cost=1):
+        return max(1, math.ceil((cost - tokens) / self.rate))
+
+
+def _refill(tokens, updated_at, now, rate, burst):
+    return min(burst, tokens + max(0.0, now - updated_at) * rate)
+
+
+class ShardedMemoryStore:
+    """In-process bucket store split into independently locked shards.
+
+    Each shard is a bounded LRU; an evicted bucket simply starts full again
+    the next time its client shows up, which only ever errs towards allowing.
+    """
+
+    def __init__(self, shards=16, max_keys_per_shard=10000):
+        self.max_keys_per_shard = max_keys_per_shard
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+
+    def _shard(self, key):
+        return self._shards[zlib.crc32(key.encode("utf-8")) % len(self._shards)]
+
+    def take_now(self, key, rate, burst, cost=1, now=None):
+        """Try to take `cost` tokens; return (allowed, tokens left)"""
+        now = time.monotonic() if now is None else now
+        lock, buckets = self._shard(key)
+        with lock:
+            tokens, updated_at = buckets.pop(key, (burst, now))
+            tokens = _refill(tokens, updated_at, now, rate, burst)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            buckets[key] = (tokens, now)
+            if len(buckets) > self.max_keys_per_shard:
+                buckets.popitem(last=False)
+        return allowed, tokens
+
+    async def take(self, key, rate, burst, cost=1):
+        return self.take_now(key, rate, burst, cost)
+
+    def stats(self):
+        return {"shards": len(self._shards), "buckets": sum(len(buckets) for _, buckets in self._shards)}
+
+
+class MongoBucketStore:
+    """Bucket store shared by every worker through one Mongo collection.
+
+    Refill and take happen in a single pipeline update, so concurrent workers
+    never read-modify-write the same bucket. Idle buckets are removed by a TTL
+    index on expires_at.
+    """
+
+    def __init__(self, collection, idle_ttl_seconds=3600):
+        self.collection = collection
+        self.idle_ttl = timedelta(seconds=idle_ttl_seconds)
+
+    def _pipeline(self, rate, burst, cost, now):
+        refilled = {"$min": [burst, {"$add": [
+            {"$ifNull": ["$tokens", burst]},
+            {"$multiply": [{"$max": [0, {"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}]}, rate]}
+        ]}]}
+        return [
+            {"$set": {"tokens": refilled, "updated_at": now, "expires_at": datetime.utcnow() + self.idle_ttl}},
+            {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+            {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]}}},
+        ]
+
+    async def take(self, key, rate, burst, cost=1):
+        # Imported here so processes that only use ShardedMemoryStore never load pymongo
+        from pymongo import ReturnDocument
+        from pymongo.errors import DuplicateKeyError
+
+        for attempt in range(2):
+            try:
+                bucket = await self.collection.find_one_and_update(
+                    {"_id": key},
+                    self._pipeline(rate, burst, cost, time.time()),
+                    projection={"tokens": 1, "allowed": 1},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                return bucket["allowed"], bucket["tokens"]
+            except DuplicateKeyError:
+                # Two workers created the same bucket at once; the retry updates it
+                if attempt:
+                    raise
+
+
+def client_identity(request, trust_proxy=False):
+    """Identify an unauthenticated client by IP address.
+
+    Client-chosen values such as an X-API-Key header are ignored: nothing
+    issues or validates them, so keying on one would let a client mint a
+    fresh bucket per request.
+    """
+    forwarded = request.headers.get("x-forwarded-for")
+    if trust_proxy and forwarded:
+        return "ip:" + forwarded.split(",")[0].strip()
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying the longest matching path-prefix policy.
+
+    `policies` maps path prefixes to a RatePolicy, or to None to exempt them;
+    paths matching no prefix use `default_policy`. `identify(request)` returns
+    the client identity buckets are keyed by.
+    """
+
+    def __init__(self, app, store, identify=client_identity, policies=None, default_policy=None):
+        self.app = app
+        self.store = store
+        self.identify = identify
+        self.default_policy = default_policy
+        self.policies = sorted((policies or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    def policy_for(self, path):
+        for prefix, policy in self.policies:
+            if path.startswith(prefix):
+                return policy
+        return self.default_policy
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        policy = self.policy_for(scope["path"])
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = f"{policy.name}:{self.identify(Request(scope))}"
+        try:
+            allowed, tokens = await self.store.take(key, policy.rate, policy.burst)
+        except Exception as e:
+            # Fail open: an unavailable shared store must not take the API down with it
+            print(f"⚠️ Warning: Rate limit store unavailable: {e}")
+            await self.app(scope, receive, send)
+            return
+
+        headers = policy.headers(tokens)
+        if not allowed:
+            body = json.dumps({"detail": "Rate limit exceeded, please retry later"}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": headers + [
+                    (b"retry-after", str(policy.retry_after(tokens)).encode()),
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,141 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+# Document in registry_meta whose counter is bumped on every registry write
+REGISTRY_VERSION_ID = "phone_numbers"
+
+# Fields touched by verification bookkeeping; they never change what verify returns
+COUNTER_FIELDS = {"verification_count", "last_verified"}
+
+
+class RegistryCache:
+    """Bounded LRU/TTL cache of active phone_numbers records keyed by phone_key.
+
+    Negative lookups are cached too, so repeated checks of unknown numbers do
+    not reach Mongo either. Entries are dropped when this worker writes to the
+    registry, when a change stream reports a write, or when the shared version
+    counter in registry_meta moves (writes made by other workers).
+    """
+
+    def __init__(self, max_entries=50000, ttl_seconds=300, version_check_interval=1.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_check_interval = version_check_interval
+        self._entries = OrderedDict()
+        self._version = None
+        self._next_version_check = 0.0
+        self._watch_task = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self):
+        """Last registry version seen by this worker (None before the first check)"""
+        return self._version
+
+    def get(self, phone_key):
+        """Return (found, record); record is None for a cached negative lookup"""
+        entry = self._entries.get(phone_key)
+        if entry is None:
+            self.misses += 1
+            return False, None
+
+        expires_at, record = entry
+        if expires_at < time.monotonic():
+            del self._entries[phone_key]
+            self.misses += 1
+            return False, None
+
+        self._entries.move_to_end(phone_key)
+        self.hits += 1
+        return True, record
+
+    def put(self, phone_key, record):
+        self._entries[phone_key] = (time.monotonic() + self.ttl_seconds, record)
+        self._entries.move_to_end(phone_key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, phone_key):
+        self._entries.pop(phone_key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            "version": self._version,
+            "change_stream": self._watch_task is not None and not self._watch_task.done()
+        }
+
+    async def sync_version(self, db):
+        """Flush the cache if another worker has written to the registry"""
+        now = time.monotonic()
+        if now < self._next_version_check:
+            return
+        self._next_version_check = now + self.version_check_interval
+
+        try:
+            meta = await db.registry_meta.find_one({"_id": REGISTRY_VERSION_ID})
+        except PyMongoError as e:
+            print(f"Warning: Could not read registry version: {e}")
+            return
+
+        version = meta.get("version", 0) if meta else 0
+        if self._version is not None and version != self._version:
+            self.clear()
+        self._version = version
+
+    async def bump_version(self, db):
+        """Record a registry write so every worker drops its cached entries"""
+        meta = await db.registry_meta.find_one_and_update(
+            {"_id": REGISTRY_VERSION_ID},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._version = meta.get("version") if meta else None
+
+    def start_change_stream(self, db):
+        """Watch phone_numbers for writes; requires a replica set, polling covers the rest"""
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self._watch_changes(db))
+
+    async def stop_change_stream(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._watch_task = None
+
+    async def _watch_changes(self, db):
+        try:
+            async with db.phone_numbers.watch(full_document="updateLookup") as stream:
+                async for change in stream:
+                    if change.get("operationType") == "update":
+                        updated = set(change.get("updateDescription", {}).get("updatedFields", {}))
+                        if updated <= COUNTER_FIELDS:
+                            continue
+                    document = change.get("fullDocument") or {}
+                    if document.get("phone_key"):
+                        self.invalidate(document["phone_key"])
+                    else:
+                        # Deletes carry no document: drop everything
+                        self.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"⚠️ Registry change stream unavailable, using version polling: {e}")
@@ -0,0 +1,151 @@
+"""Bulk re-scoring of stored reports after the risk scoring tables change.
+
+Reports are read in chunks. Each chunk's features are extracted into one
+NumPy array, and scores, bands and confidences for the whole chunk come
+from a matrix-vector product and a few array lookups (score_batch), using
+the same FEATURE_WEIGHTS and RISK_BANDS as advanced_ai_analysis(). Only
+reports whose ai_analysis actually changes are written back, with one
+unordered bulk_write per chunk that runs while the next chunk is scored.
+The points_awarded a report earned on submission are kept, as users have
+already been credited with them. If any risk level moved, the dashboard
+counters are rebuilt.
+
+    python rescoring.py                      # re-score every active report
+    python rescoring.py --dry-run            # only count what would change
+    python rescoring.py --since 2025-09-01 --chunk-size 20000
+"""
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+from pymongo import UpdateOne
+
+from risk_scoring import FEATURE_WEIGHTS, RISK_BANDS, build_analysis, extract_features
+from stats_counters import rebuild_stats_counters
+
+RESCORE_CHUNK_SIZE = 5000
+
+WEIGHTS = np.array(list(FEATURE_WEIGHTS.values()), dtype=np.int64)
+_MINIMUMS, _LEVELS, _POINTS, _BASES, _STEPS, _CAPS = (np.array(column) for column in zip(*RISK_BANDS))
+
+REPORT_PROJECTION = {"_id": 1, "description": 1, "phone_number": 1, "email_address": 1, "ai_analysis": 1}
+
+
+def score_batch(features):
+    """Vectorised risk_score() and risk_band() over an (n, len(FEATURES)) array.
+
+    Returns (scores, band indexes into RISK_BANDS, confidences).
+    """
+    scores = features @ WEIGHTS
+    # Bands run highest first: take the first whose minimum is reached, else the last
+    bands = np.select(
+        [scores >= minimum for minimum in _MINIMUMS[:-1]], np.arange(len(RISK_BANDS) - 1), default=len(RISK_BANDS) - 1
+    )
+    confidences = np.minimum(_BASES[bands] + (scores - _MINIMUMS[bands]) * _STEPS[bands], _CAPS[bands])
+    return scores, bands, confidences
+
+
+def analyse_batch(reports):
+    """ai_analysis blocks for reports, identical to advanced_ai_analysis() on each"""
+    rows = []
+    evidence = []
+    for report in reports:
+        features, found = extract_features(report)
+        rows.append(features)
+        evidence.append(found)
+    features = np.array(rows, dtype=np.int64).reshape(len(rows), len(WEIGHTS))
+    scores, bands, confidences = score_batch(features)
+
+    levels = _LEVELS[bands].tolist()
+    points = _POINTS[bands].tolist()
+    return [
+        build_analysis(row, found, score, level, awarded, confidence)
+        for row, found, score, level, awarded, confidence in zip(
+            rows, evidence, scores.tolist(), levels, points, confidences.tolist()
+        )
+    ]
+
+
+def rescore_updates(reports, now):
+    """UpdateOne operations for the reports whose analysis changed, and how many changed level"""
+    updates = []
+    level_changes = 0
+    for report, analysis in zip(reports, analyse_batch(reports)):
+        previous = report.get("ai_analysis") or {}
+        analysis["points_awarded"] = previous.get("points_awarded", analysis["points_awarded"])
+        if analysis == previous:
+            continue
+        if analysis["risk_level"] != previous.get("risk_level"):
+            level_changes += 1
+        updates.append(UpdateOne({"_id": report["_id"]}, {"$set": {"ai_analysis": analysis, "updated_at": now}}))
+    return updates, level_changes
+
+
+async def rescore_reports(db, query=None, chunk_size=RESCORE_CHUNK_SIZE, dry_run=False):
+    """Re-score every report matching query (default: all active ones); returns counts"""
+    query = {"is_active": True} if query is None else query
+    now = datetime.utcnow()
+    stats = {"scanned": 0, "changed": 0, "level_changes": 0}
+    pending_write = None
+
+    async def process(batch):
+        nonlocal pending_write
+        updates, level_changes = rescore_updates(batch, now)
+        stats["scanned"] += len(batch)
+        stats["changed"] += len(updates)
+        stats["level_changes"] += level_changes
+        if dry_run or not updates:
+            return
+        # One write in flight at a time, overlapping with scoring the next chunk
+        if pending_write is not None:
+            await pending_write
+        pending_write = asyncio.ensure_future(db.reports.bulk_write(updates, ordered=False))
+
+    batch = []
+    async for report in db.reports.find(query, REPORT_PROJECTION).batch_size(chunk_size):
+        batch.append(report)
+        if len(batch) >= chunk_size:
+            await process(batch)
+            batch = []
+    if batch:
+        await process(batch)
+    if pending_write is not None:
+        await pending_write
+
+    if stats["level_changes"] and not dry_run:
+        await rebuild_stats_counters(db, force=True)
+    return stats
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Re-score stored reports with the current scoring tables")
+    parser.add_argument("--chunk-size", type=int, default=RESCORE_CHUNK_SIZE, help="reports scored and written per batch")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only reports created at or after this date")
+    parser.add_argument("--dry-run", action="store_true", help="count changes without writing them")
+    args = parser.parse_args()
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017/'))
+    query = {"is_active": True}
+    if args.since:
+        query["created_at"] = {"$gte": args.since}
+    try:
+        started = time.perf_counter()
+        stats = await rescore_reports(client.checkvero, query, args.chunk_size, args.dry_run)
+        elapsed = time.perf_counter() - started
+        verb = "would change" if args.dry_run else "changed"
+        print(
+            f"✅ Scanned {stats['scanned']} reports in {elapsed:.1f}s "
+            f"({stats['scanned'] / elapsed if elapsed else 0:.0f}/s); {verb} {stats['changed']}, "
+            f"{stats['level_changes']} of them to another risk level"
+        )
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
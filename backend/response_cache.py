@@ -0,0 +1,119 @@
+"""Response cache and conditional GET for read-mostly endpoints.
+
+A cached response is the serialised JSON body plus a strong ETag hashed
+from the route's data version and that body. While the entry is fresh
+(within the route's TTL and at the same data version) a poll costs neither
+a database read nor serialisation. A client or CDN that sends the ETag back
+in If-None-Match gets an empty 304. Per-user routes key their entries by
+user id and are marked private so shared caches never store them.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+
+from starlette.responses import Response
+
+from fast_json import dumps
+
+
+class CachePolicy:
+    """How long `name`'s responses are reused and what Cache-Control tells clients and CDNs"""
+
+    def __init__(self, name, ttl, cache_control, per_user=False):
+        self.name = name
+        self.ttl = ttl
+        self.cache_control = cache_control
+        self.per_user = per_user
+
+    def key(self, user=None):
+        return (self.name, user["user_id"]) if self.per_user else (self.name,)
+
+    def headers(self, etag):
+        headers = {"ETag": etag, "Cache-Control": self.cache_control}
+        if self.per_user:
+            headers["Vary"] = "Authorization"
+        return headers
+
+
+class CachedResponse:
+    __slots__ = ("body", "etag", "version", "expires_at")
+
+    def __init__(self, body, etag, version, expires_at):
+        self.body = body
+        self.etag = etag
+        self.version = version
+        self.expires_at = expires_at
+
+
+def make_etag(policy, version, body):
+    digest = hashlib.blake2b(repr((policy.name, version)).encode() + body, digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match uses weak comparison: a W/ prefix is ignored and * matches anything"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """Bounded LRU of serialised responses, keyed by CachePolicy.key()"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key, version=None):
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at < time.monotonic() or entry.version != version:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        self._entries.pop(key, None)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0
+        }
+
+    async def respond(self, request, policy, build, user=None, version=None):
+        """Answer from the cache, or await build() for the payload and cache it.
+
+        `version` is any value that changes when the underlying data does;
+        an entry cached at another version is rebuilt even within its TTL.
+        """
+        key = policy.key(user)
+        entry = self.get(key, version)
+        if entry is None:
+            body = dumps(await build())
+            entry = CachedResponse(body, make_etag(policy, version, body), version, time.monotonic() + policy.ttl)
+            self.put(key, entry)
+
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=policy.headers(entry.etag))
+        return Response(entry.body, media_type="application/json", headers=policy.headers(entry.etag))
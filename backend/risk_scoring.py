@@ -0,0 +1,200 @@
+"""Fraud risk scoring of reports.
+
+A report is reduced to a fixed vector of feature counts (FEATURES); its
+risk score is the dot product with FEATURE_WEIGHTS, and RISK_BANDS map the
+score to a level, points and a confidence. advanced_ai_analysis() applies
+this to one report as it is submitted; rescoring.py applies the same
+tables to whole batches of stored reports with NumPy, so tuning a weight
+here changes both.
+"""
+from keyword_matcher import KeywordMatcher
+from phone_utils import PHONE_FORMAT
+
+# Keyword groups scanned in report descriptions, compiled once into a single automaton
+ANALYSIS_KEYWORDS = KeywordMatcher({
+    # Suspicious keywords and patterns
+    "high_risk": [
+        "urgent", "immediate", "act now", "limited time", "verify account", "suspended account",
+        "click here", "confirm identity", "prize", "winner", "lottery", "inheritance",
+        "congratulations", "selected", "refund", "tax refund", "irs", "social security",
+        "credit card", "bank account", "bitcoin", "cryptocurrency", "investment opportunity",
+        "prince", "nigeria", "foreign country", "legal action", "arrest warrant"
+    ],
+    "medium_risk": [
+        "help", "assistance", "support", "verify", "confirm", "update", "expires",
+        "security", "protection", "alert", "warning", "notice", "important",
+        "free", "discount", "offer", "deal", "save money", "cash", "loan"
+    ],
+    # Call-to-action: "click" together with one of the follow-ups
+    "click": ["click"],
+    "call_to_action": ["link", "here", "now", "urgent"],
+    # Financial information requested under pressure
+    "financial": ["money", "payment", "card", "account"],
+    "pressure": ["problem", "issue", "suspend", "block", "verify"],
+    # Personal information requests
+    "personal_info": ["ssn", "social security", "date of birth", "mother's maiden", "password"],
+    # Communication urgency
+    "urgency": ["immediately", "right now", "asap", "expires today", "limited time", "act fast"]
+})
+
+TOLL_FREE_PATTERNS = ["800", "888", "877", "866", "855", "844", "833", "822"]
+TEMPORARY_EMAIL_DOMAINS = ["tempmail", "10minutemail", "guerrillamail", "mailinator", "yopmail"]
+FREE_EMAIL_DOMAINS = ["gmail.com", "yahoo.com", "hotmail.com"]
+IMPERSONATED_DOMAINS = ["paypal.com", "amazon.com", "apple.com", "microsoft.com", "google.com", "facebook.com"]
+
+# Risk points per unit of each feature, in feature-vector order
+FEATURE_WEIGHTS = {
+    "high_risk_keywords": 3,
+    "medium_risk_keywords": 1,
+    "toll_free_number": 1,
+    "hidden_caller": 2,
+    "invalid_phone_format": 1,
+    "temporary_email": 3,
+    "free_email": 1,
+    "impersonated_domains": 4,
+    "call_to_action": 2,
+    "financial_pressure": 3,
+    "personal_info_request": 4,
+    "urgency": 2,
+}
+FEATURES = list(FEATURE_WEIGHTS)
+
+# (minimum score, level, points, confidence at the minimum, confidence per extra point, confidence cap),
+# highest band first
+RISK_BANDS = [
+    (8, "HIGH", 30, 90, 2, 98),
+    (4, "MEDIUM", 20, 75, 3, 89),
+    (0, "LOW", 10, 60, 5, 74),
+]
+
+RECOMMENDATIONS = {
+    "HIGH": "🚨 HIGH RISK - This appears to be a scam. Do not provide any personal information, click links, or send money. Report to authorities if financial loss occurred.",
+    "MEDIUM": "⚠️ MEDIUM RISK - Exercise extreme caution. Verify through official channels before taking any action. Do not provide personal information.",
+    "LOW": "✅ LOW RISK - No obvious red flags detected, but always remain vigilant with unsolicited communications.",
+}
+
+
+def extract_features(report_data):
+    """Return (feature counts in FEATURES order, evidence used to explain them)"""
+    description = (report_data.get("description") or "").lower()
+    phone_number = report_data.get("phone_number") or ""
+    email_address = report_data.get("email_address") or ""
+
+    # One pass over the description finds every group's hits
+    keyword_hits = ANALYSIS_KEYWORDS.match(description)
+
+    toll_free = hidden_caller = invalid_format = 0
+    if phone_number:
+        toll_free = int(any(pattern in phone_number for pattern in TOLL_FREE_PATTERNS))
+        hidden_caller = int(phone_number.startswith("unknown") or phone_number.startswith("blocked"))
+        invalid_format = int(not PHONE_FORMAT.match(phone_number))
+
+    domain = ""
+    temporary_email = free_email = 0
+    impersonated = []
+    if email_address:
+        domain = email_address.split('@')[-1].lower() if '@' in email_address else ""
+        temporary_email = int(any(sus_domain in domain for sus_domain in TEMPORARY_EMAIL_DOMAINS))
+        free_email = int(not temporary_email and any(sus_domain in domain for sus_domain in FREE_EMAIL_DOMAINS))
+        impersonated = [legit for legit in IMPERSONATED_DOMAINS if legit in domain and domain != legit]
+
+    features = [
+        len(keyword_hits["high_risk"]),
+        len(keyword_hits["medium_risk"]),
+        toll_free,
+        hidden_caller,
+        invalid_format,
+        temporary_email,
+        free_email,
+        len(impersonated),
+        int(bool(keyword_hits["click"] and keyword_hits["call_to_action"])),
+        int(bool(keyword_hits["financial"] and keyword_hits["pressure"])),
+        int(bool(keyword_hits["personal_info"])),
+        int(bool(keyword_hits["urgency"])),
+    ]
+    evidence = {
+        "high_risk": keyword_hits["high_risk"],
+        "medium_risk": keyword_hits["medium_risk"],
+        "domain": domain,
+        "impersonated": impersonated,
+    }
+    return features, evidence
+
+
+def risk_score(features):
+    return sum(weight * count for weight, count in zip(FEATURE_WEIGHTS.values(), features))
+
+
+def risk_band(score):
+    """Return (level, points, confidence) for a risk score"""
+    for minimum, level, points, base, step, cap in RISK_BANDS:
+        if score >= minimum:
+            return level, points, min(base + (score - minimum) * step, cap)
+    minimum, level, points, base, step, cap = RISK_BANDS[-1]
+    return level, points, min(base + (score - minimum) * step, cap)
+
+
+def build_analysis(features, evidence, score, level, points, confidence):
+    """The ai_analysis block stored on a report"""
+    f = dict(zip(FEATURES, features))
+    reasons = []
+    confidence_factors = []
+
+    if f["high_risk_keywords"]:
+        reasons.append(f"Contains high-risk keywords: {', '.join(evidence['high_risk'][:3])}")
+        confidence_factors.append("High-risk language patterns")
+    if f["medium_risk_keywords"] > 2:
+        reasons.append(f"Multiple suspicious keywords detected ({f['medium_risk_keywords']} found)")
+        confidence_factors.append("Multiple warning indicators")
+
+    if f["toll_free_number"]:
+        reasons.append("Uses toll-free number (common in scams)")
+    if f["hidden_caller"]:
+        reasons.append("Caller ID blocked or unknown")
+        confidence_factors.append("Hidden caller identity")
+    if f["invalid_phone_format"]:
+        reasons.append("Invalid or suspicious phone number format")
+
+    if f["temporary_email"]:
+        reasons.append("Uses temporary/disposable email service")
+        confidence_factors.append("Temporary email provider")
+    elif f["free_email"]:
+        reasons.append("Uses free email service (common in scams)")
+    for legit in evidence["impersonated"]:
+        reasons.append(f"Potential typosquatting: {evidence['domain']} mimics {legit}")
+        confidence_factors.append("Domain impersonation")
+
+    if f["call_to_action"]:
+        reasons.append("Suspicious call-to-action language")
+    if f["financial_pressure"]:
+        reasons.append("Financial information request under pressure")
+        confidence_factors.append("Financial urgency tactics")
+    if f["personal_info_request"]:
+        reasons.append("Requests sensitive personal information")
+        confidence_factors.append("Identity theft indicators")
+    if f["urgency"]:
+        reasons.append("Creates false sense of urgency")
+
+    return {
+        "risk_level": level,
+        "recommendation": RECOMMENDATIONS[level],
+        "confidence_score": confidence,
+        "reasons": reasons,
+        "points_awarded": points,
+        "analysis_details": {
+            "risk_score": score,
+            "confidence_factors": confidence_factors,
+            "keywords_detected": {
+                "high_risk": evidence["high_risk"],
+                "medium_risk": evidence["medium_risk"]
+            }
+        }
+    }
+
+
+def advanced_ai_analysis(report_data):
+    """Enhanced AI analysis with more sophisticated fraud detection patterns"""
+    features, evidence = extract_features(report_data)
+    score = risk_score(features)
+    level, points, confidence = risk_band(score)
+    return build_analysis(features, evidence, score, level, points, confidence)
@@ -0,0 +1,140 @@
+"""Time-bucketed activity rollups for /api/analytics.
+
+Reports, phone number registrations and verification attempts are counted
+into minute, hour and day buckets by upserts at write time, so analytics
+read O(buckets) small documents instead of counting raw collections.
+Minute and hour buckets expire through a TTL index on expires_at.
+"""
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from pymongo import UpdateOne
+
+MINUTE_RETENTION = timedelta(hours=int(os.environ.get('ROLLUP_MINUTE_RETENTION_HOURS', '48')))
+HOUR_RETENTION = timedelta(days=int(os.environ.get('ROLLUP_HOUR_RETENTION_DAYS', '90')))
+
+GRANULARITIES = {
+    "minute": (timedelta(minutes=1), MINUTE_RETENTION),
+    "hour": (timedelta(hours=1), HOUR_RETENTION),
+    "day": (timedelta(days=1), None),
+}
+
+# Counters kept in every bucket
+METRICS = ("reports", "registrations", "verification_attempts", "verified")
+
+
+def naive_utc(timestamp):
+    """Stored datetimes are naive UTC; convert an aware timestamp to match"""
+    if timestamp is None or timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def bucket_start(timestamp, granularity):
+    if granularity == "minute":
+        return timestamp.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _bucket_update(granularity, start, counts):
+    _, retention = GRANULARITIES[granularity]
+    on_insert = {"granularity": granularity, "bucket_start": start}
+    if retention is not None:
+        on_insert["expires_at"] = start + retention
+    return UpdateOne(
+        {"_id": f"{granularity}:{start.isoformat()}"},
+        {"$inc": counts, "$setOnInsert": on_insert},
+        upsert=True
+    )
+
+
+def bucket_updates(events):
+    """Upserts adding each (timestamp, {metric: count}) event to its three buckets"""
+    totals = defaultdict(lambda: defaultdict(int))
+    for timestamp, counts in events:
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_start(timestamp, granularity))
+            for metric, count in counts.items():
+                totals[key][metric] += count
+    return [_bucket_update(granularity, start, dict(counts)) for (granularity, start), counts in totals.items()]
+
+
+def verification_log_updates(logs):
+    """Bucket upserts for a flushed batch of verification_logs entries"""
+    return bucket_updates(
+        (log["timestamp"], {"verification_attempts": 1, "verified": int(log["result"] == "verified")})
+        for log in logs
+    )
+
+
+async def record_event(db, timestamp=None, **counts):
+    """Count one write-path event, e.g. record_event(db, reports=1)"""
+    await db.rollups.bulk_write(bucket_updates([(timestamp or datetime.utcnow(), counts)]), ordered=False)
+
+
+async def read_series(db, granularity, start, end):
+    """Return every bucket in [start, end) as a dense, zero-filled series"""
+    step, _ = GRANULARITIES[granularity]
+    start = bucket_start(naive_utc(start), granularity)
+    end = naive_utc(end)
+    found = {
+        bucket["bucket_start"]: bucket
+        async for bucket in db.rollups.find(
+            {"granularity": granularity, "bucket_start": {"$gte": start, "$lt": end}},
+            {metric: 1 for metric in METRICS + ("bucket_start",)}
+        )
+    }
+
+    series = []
+    current = start
+    while current < end:
+        bucket = found.get(current, {})
+        series.append({"bucket_start": current.isoformat(), **{metric: bucket.get(metric, 0) for metric in METRICS}})
+        current += step
+    return series
+
+
+def sum_series(series):
+    return {metric: sum(bucket[metric] for bucket in series) for metric in METRICS}
+
+
+async def rebuild_rollups(db, force=False):
+    """Backfill hour and day buckets from the source collections.
+
+    Runs once as a migration when no rollups exist yet; minute buckets are
+    short-lived and only filled going forward.
+    """
+    if not force and await db.rollups.find_one({}, {"_id": 1}):
+        return
+
+    sources = [
+        (db.reports, "created_at", {"is_active": True}, {"reports": 1}),
+        (db.phone_numbers, "created_at", {}, {"registrations": 1}),
+        (db.verification_logs, "timestamp", {}, {"verification_attempts": 1}),
+        (db.verification_logs, "timestamp", {"result": "verified"}, {"verified": 1}),
+    ]
+    formats = {"hour": "%Y-%m-%dT%H:00:00", "day": "%Y-%m-%dT00:00:00"}
+
+    updates = []
+    for collection, time_field, match, metric in sources:
+        (name, _), = metric.items()
+        for granularity, date_format in formats.items():
+            pipeline = [
+                {"$match": match},
+                {"$group": {
+                    "_id": {"$dateToString": {"format": date_format, "date": f"${time_field}"}},
+                    "count": {"$sum": 1}
+                }}
+            ]
+            async for group in collection.aggregate(pipeline):
+                start = datetime.fromisoformat(group["_id"])
+                updates.append(_bucket_update(granularity, start, {name: group["count"]}))
+
+    if force:
+        await db.rollups.delete_many({"granularity": {"$in": list(formats)}})
+    if updates:
+        await db.rollups.bulk_write(updates, ordered=False)
+    print(f"✅ Rebuilt analytics rollups ({len(updates)} bucket updates)")
@@ -1,5 +1,6 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from typing import Optional, List
@@ -9,15 +10,147 @@ import json
 from datetime import datetime, timedelta
 import jwt
 from passlib.context import CryptContext
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
 import base64
+import binascii
 from enum import Enum
-import re
+import time
+
+from registry_cache import RegistryCache
+from write_behind import VerificationWriteBehind
+from phone_utils import normalize_e164, phone_lookup_key
+from risk_scoring import advanced_ai_analysis
+from password_pool import PasswordHashPool, PasswordPoolSaturated
+from token_cache import TokenCache
+from db_schema import run_migrations
+from stats_counters import (
+    GLOBAL_ID, business_scope, read_counter, read_dashboard, record_phone_registered,
+    record_report_submitted, record_user_registered, user_scope
+)
+from pagination import DEFAULT_PAGE_SIZE, PaginationError, build_projection, fetch_page, set_page_headers
+from rollups import GRANULARITIES, bucket_start, naive_utc, read_series, record_event, sum_series
+from rate_limit import (
+    MongoBucketStore, RateLimitMiddleware, RatePolicy, ShardedMemoryStore, client_identity
+)
+from blob_store import BlobStore, BlobTooLarge, EmptyBlob, UnsupportedBlobType
+from carrier_webhook import CarrierKeyCache, WebhookError, WebhookVerifier, new_trace_id, parse_public_key
+from metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, CallbackGauge, Counter, Gauge, Histogram, MetricsMiddleware,
+    MongoCommandMetrics, Registry
+)
+from response_cache import CachePolicy, ResponseCache
+from fast_json import BSONResponse, dumps as json_dumps
+from exports import (
+    REPORT_COLUMNS, VERIFICATION_LOG_COLUMNS, csv_stream, export_query, iter_batches, ndjson_stream
+)
 
 # Initialize FastAPI app
-app = FastAPI(title="Check Vero API", description="Professional fraud verification platform")
+# Routes may return Mongo documents as read; BSONResponse encodes datetimes and ObjectIds
+app = FastAPI(
+    title="Check Vero API",
+    description="Professional fraud verification platform",
+    default_response_class=BSONResponse
+)
+STARTED_AT = time.time()
+
+# Metrics exposed on /metrics; component gauges are registered next to /metrics below
+metrics = Registry()
+REQUESTS_IN_FLIGHT = metrics.register(Gauge("http_requests_in_flight", "HTTP requests currently being served"))
+REQUEST_DURATION = metrics.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route and status", ("method", "route", "status")
+))
+MONGO_COMMAND_DURATION = metrics.register(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by collection and operation", ("collection", "command")
+))
+MONGO_COMMAND_FAILURES = metrics.register(Counter(
+    "mongo_command_failures_total", "Failed MongoDB commands", ("collection", "command")
+))
+
+# Database connection
+# Motor keeps every Mongo round trip off the event loop, so a single worker can
+# hold many verifications in flight while waiting on the database.
+mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/')
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=int(os.environ.get('MONGO_MAX_POOL_SIZE', '200')),
+    minPoolSize=int(os.environ.get('MONGO_MIN_POOL_SIZE', '10')),
+    event_listeners=[MongoCommandMetrics(MONGO_COMMAND_DURATION, MONGO_COMMAND_FAILURES)]
+)
+db = client.checkvero
+
+# In-process cache of the phone registry for the hot verify path
+registry_cache = RegistryCache(
+    max_entries=int(os.environ.get('REGISTRY_CACHE_SIZE', '50000')),
+    ttl_seconds=int(os.environ.get('REGISTRY_CACHE_TTL', '300'))
+)
+
+# Verification counters and logs are written in batches off the request path
+write_behind = VerificationWriteBehind(
+    db,
+    batch_size=int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', '500')),
+    flush_interval=int(os.environ.get('WRITE_BEHIND_FLUSH_MS', '250')) / 1000,
+    max_queue_size=int(os.environ.get('WRITE_BEHIND_MAX_QUEUE', '10000'))
+)
+
+# Rate limiting: one token bucket per client and route policy (README defaults: 5 rps, burst 10)
+RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+RATE_LIMIT_TRUST_PROXY = os.environ.get('RATE_LIMIT_TRUST_PROXY', '0') == '1'
+RATE_LIMIT_AUTH = RatePolicy(
+    "auth",
+    rate=float(os.environ.get('RATE_LIMIT_AUTH_RPS', '1')),
+    burst=int(os.environ.get('RATE_LIMIT_AUTH_BURST', '5'))
+)
+RATE_LIMIT_BULK = RatePolicy("verify-bulk", rate=0.2, burst=2)
+RATE_LIMIT_POLICIES = {
+    "/api/health": None,
+    "/metrics": None,
+    # Login and registration share one bucket; both queue work on the bcrypt pool
+    "/api/login": RATE_LIMIT_AUTH,
+    "/api/register": RATE_LIMIT_AUTH,
+    "/api/verify-phone": RatePolicy("verify", rate=float(os.environ.get('RATE_LIMIT_VERIFY_RPS', '5')),
+                                    burst=int(os.environ.get('RATE_LIMIT_VERIFY_BURST', '10'))),
+    # One bulk request can carry thousands of numbers
+    "/api/verify-phone/bulk": RATE_LIMIT_BULK,
+    "/api/verify-phone/stream": RATE_LIMIT_BULK,
+    # Carriers call inline during call setup from a few gateway addresses
+    "/webhook/": RatePolicy("webhook", rate=float(os.environ.get('RATE_LIMIT_WEBHOOK_RPS', '200')),
+                            burst=int(os.environ.get('RATE_LIMIT_WEBHOOK_BURST', '400'))),
+}
+RATE_LIMIT_DEFAULT = RatePolicy(
+    "default",
+    rate=float(os.environ.get('RATE_LIMIT_RPS', '5')),
+    burst=int(os.environ.get('RATE_LIMIT_BURST', '10'))
+)
+
+# Workers behind a load balancer share buckets through Mongo; a single process keeps them in memory
+if os.environ.get('RATE_LIMIT_STORE', 'memory') == 'mongo':
+    rate_limit_store = MongoBucketStore(db.rate_limits)
+else:
+    rate_limit_store = ShardedMemoryStore()
+
+
+def rate_limit_identity(request):
+    """Key buckets by authenticated user, else by IP address"""
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        user = authenticate_request_token(request, authorization[7:])
+        if user:
+            return "user:" + user["user_id"]
+    return client_identity(request, trust_proxy=RATE_LIMIT_TRUST_PROXY)
+
+
+if RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        store=rate_limit_store,
+        identify=rate_limit_identity,
+        policies=RATE_LIMIT_POLICIES,
+        default_policy=RATE_LIMIT_DEFAULT
+    )
 
 # Add CORS middleware with explicit configuration for production domains
+# (added after the rate limiter so it wraps it and 429 responses carry CORS headers)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -32,18 +165,55 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
-# Database connection
-mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/')
-client = MongoClient(mongo_url)
-db = client.checkvero
+# Outermost, so rate-limited and CORS-rejected requests are timed too
+app.add_middleware(MetricsMiddleware, requests_in_flight=REQUESTS_IN_FLIGHT, request_duration=REQUEST_DURATION)
 
 # Security setup
 SECRET_KEY = "your-secret-key-here-check-vero-mvp"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Bulk verification limits
+BULK_VERIFY_CHUNK_SIZE = int(os.environ.get('BULK_VERIFY_CHUNK_SIZE', '1000'))
+BULK_VERIFY_MAX_NUMBERS = int(os.environ.get('BULK_VERIFY_MAX_NUMBERS', '10000'))
+
+# Largest series /api/analytics/rollups will return
+MAX_ROLLUP_BUCKETS = 2000
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt runs on its own bounded pool so logins never stall the verify path
+password_pool = PasswordHashPool(
+    pwd_context,
+    max_workers=int(os.environ.get('PASSWORD_POOL_WORKERS', '4')),
+    max_pending=int(os.environ.get('PASSWORD_POOL_MAX_PENDING', '64'))
+)
 security = HTTPBearer()
+# Claims of recently validated bearer tokens, served until each token's exp
+token_cache = TokenCache(max_entries=int(os.environ.get('TOKEN_CACHE_SIZE', '10000')))
+
+# Serialised responses of polled read endpoints, with ETag / 304 support.
+# Public ones may be held by a CDN; per-user ones are private to the browser.
+response_cache = ResponseCache(max_entries=int(os.environ.get('RESPONSE_CACHE_SIZE', '10000')))
+SAMPLE_NUMBERS_CACHE = CachePolicy("sample-numbers", ttl=3600, cache_control="public, max-age=300, s-maxage=3600")
+HEALTH_CACHE = CachePolicy("health", ttl=5, cache_control="public, max-age=5")
+ANALYTICS_SUMMARY_CACHE = CachePolicy("analytics-summary", ttl=15, cache_control="private, max-age=15")
+PROFILE_CACHE = CachePolicy("profile", ttl=60, cache_control="private, no-cache", per_user=True)
+
+# Report evidence (screenshots, recordings) in a content-addressed file store
+evidence_store = BlobStore(
+    os.environ.get('EVIDENCE_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'evidence_store')),
+    max_bytes=int(os.environ.get('EVIDENCE_MAX_BYTES', str(5 * 1024 * 1024)))
+)
+
+# Carrier webhook authentication: parsed keys and seen nonces stay in memory
+async def load_carrier_key(key_id):
+    carrier_key = await db.carrier_keys.find_one({"key_id": key_id, "is_active": True}, {"public_key": 1})
+    return carrier_key["public_key"] if carrier_key else None
+
+webhook_verifier = WebhookVerifier(
+    load_carrier_key,
+    key_cache=CarrierKeyCache(ttl_seconds=int(os.environ.get('WEBHOOK_KEY_CACHE_TTL', '300')))
+)
 
 # Enums
 class UserRole(str, Enum):
@@ -56,6 +226,10 @@ class ReportType(str, Enum):
     EMAIL = "email"
     AI_CHAT = "ai_chat"
 
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
 class ReportStatus(str, Enum):
     PENDING = "pending"
     ANALYZED = "analyzed"
@@ -90,17 +264,39 @@ class ReportCreate(BaseModel):
     phone_number: Optional[str] = None
     email_address: Optional[str] = None
     description: str
-    screenshot: Optional[str] = None  # Base64 encoded file data
+    screenshot: Optional[str] = None  # Legacy: base64 encoded file data
+    screenshot_digest: Optional[str] = None  # From POST /api/reports/evidence
 
 class VerificationCheck(BaseModel):
     phone_number: str
 
+class BulkVerificationCheck(BaseModel):
+    phone_numbers: List[str]
+
+class CarrierWebhookCheck(BaseModel):
+    key_id: str
+    e164: str
+    ts: int
+    nonce: str
+    sig: str
+
+class CarrierKeyRegister(BaseModel):
+    key_id: str
+    carrier_name: str
+    public_key: str  # Base64 of the raw 32-byte ed25519 public key
+
 # Helper functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    try:
+        return await password_pool.verify(plain_password, hashed_password)
+    except PasswordPoolSaturated:
+        raise HTTPException(status_code=503, detail="Authentication service busy, please retry", headers={"Retry-After": "1"})
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    try:
+        return await password_pool.hash(password)
+    except PasswordPoolSaturated:
+        raise HTTPException(status_code=503, detail="Authentication service busy, please retry", headers={"Retry-After": "1"})
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -112,164 +308,43 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+def authenticate_token(token):
+    """Validated claims for a bearer token, or None; each token is decoded once, then served from token_cache"""
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return dict(cached_user)
+    
     try:
-        payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        user_id: str = payload.get("user_id")
-        role: str = payload.get("role")
-        if username is None or user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-        return {"username": username, "user_id": user_id, "role": role}
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
     except jwt.PyJWTError:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+        return None
+    username: str = payload.get("sub")
+    user_id: str = payload.get("user_id")
+    role: str = payload.get("role")
+    if username is None or user_id is None:
+        return None
+    current_user = {"username": username, "user_id": user_id, "role": role}
+    if "exp" in payload:
+        token_cache.put(token, current_user, payload["exp"])
+    return dict(current_user)
 
-# Enhanced AI Analysis Function
-def advanced_ai_analysis(report_data):
-    """Enhanced AI analysis with more sophisticated fraud detection patterns"""
-    
-    # Suspicious keywords and patterns
-    high_risk_keywords = [
-        "urgent", "immediate", "act now", "limited time", "verify account", "suspended account",
-        "click here", "confirm identity", "prize", "winner", "lottery", "inheritance",
-        "congratulations", "selected", "refund", "tax refund", "irs", "social security",
-        "credit card", "bank account", "bitcoin", "cryptocurrency", "investment opportunity",
-        "prince", "nigeria", "foreign country", "legal action", "arrest warrant"
-    ]
-    
-    medium_risk_keywords = [
-        "help", "assistance", "support", "verify", "confirm", "update", "expires",
-        "security", "protection", "alert", "warning", "notice", "important",
-        "free", "discount", "offer", "deal", "save money", "cash", "loan"
-    ]
-    
-    description = report_data.get("description", "").lower()
-    phone_number = report_data.get("phone_number", "")
-    email_address = report_data.get("email_address", "")
-    
-    # Initialize analysis
-    risk_score = 0
-    reasons = []
-    confidence_factors = []
-    
-    # Analyze keywords
-    high_risk_matches = [word for word in high_risk_keywords if word in description]
-    medium_risk_matches = [word for word in medium_risk_keywords if word in description]
-    
-    if high_risk_matches:
-        risk_score += len(high_risk_matches) * 3
-        reasons.append(f"Contains high-risk keywords: {', '.join(high_risk_matches[:3])}")
-        confidence_factors.append("High-risk language patterns")
-    
-    if medium_risk_matches:
-        risk_score += len(medium_risk_matches) * 1
-        if len(medium_risk_matches) > 2:
-            reasons.append(f"Multiple suspicious keywords detected ({len(medium_risk_matches)} found)")
-            confidence_factors.append("Multiple warning indicators")
-    
-    # Phone number analysis
-    if phone_number:
-        # Check for suspicious phone patterns
-        if any(pattern in phone_number for pattern in ["800", "888", "877", "866", "855", "844", "833", "822"]):
-            risk_score += 1
-            reasons.append("Uses toll-free number (common in scams)")
-        
-        if phone_number.startswith("unknown") or phone_number.startswith("blocked"):
-            risk_score += 2
-            reasons.append("Caller ID blocked or unknown")
-            confidence_factors.append("Hidden caller identity")
-        
-        if not re.match(r'^[\+]?[1-9][\d\-\s\(\)]{7,15}$', phone_number):
-            risk_score += 1
-            reasons.append("Invalid or suspicious phone number format")
-    
-    # Email analysis
-    if email_address:
-        # Check for suspicious email patterns
-        suspicious_domains = [
-            "tempmail", "10minutemail", "guerrillamail", "mailinator", "yopmail",
-            "gmail.com", "yahoo.com", "hotmail.com"  # Free email services (medium risk)
-        ]
-        
-        domain = email_address.split('@')[-1].lower() if '@' in email_address else ""
-        
-        if any(sus_domain in domain for sus_domain in suspicious_domains[:5]):  # Temporary email services
-            risk_score += 3
-            reasons.append("Uses temporary/disposable email service")
-            confidence_factors.append("Temporary email provider")
-        elif any(sus_domain in domain for sus_domain in suspicious_domains[5:]):  # Free email services
-            risk_score += 1
-            reasons.append("Uses free email service (common in scams)")
-        
-        # Check for typosquatting
-        legit_domains = ["paypal.com", "amazon.com", "apple.com", "microsoft.com", "google.com", "facebook.com"]
-        for legit in legit_domains:
-            if legit in domain and domain != legit:
-                risk_score += 4
-                reasons.append(f"Potential typosquatting: {domain} mimics {legit}")
-                confidence_factors.append("Domain impersonation")
-    
-    # Content analysis patterns
-    if "click" in description and any(word in description for word in ["link", "here", "now", "urgent"]):
-        risk_score += 2
-        reasons.append("Suspicious call-to-action language")
-    
-    if any(word in description for word in ["money", "payment", "card", "account"]) and \
-       any(word in description for word in ["problem", "issue", "suspend", "block", "verify"]):
-        risk_score += 3
-        reasons.append("Financial information request under pressure")
-        confidence_factors.append("Financial urgency tactics")
-    
-    # Personal information requests
-    if any(word in description for word in ["ssn", "social security", "date of birth", "mother's maiden", "password"]):
-        risk_score += 4
-        reasons.append("Requests sensitive personal information")
-        confidence_factors.append("Identity theft indicators")
-    
-    # Communication urgency
-    urgency_words = ["immediately", "right now", "asap", "expires today", "limited time", "act fast"]
-    if any(word in description for word in urgency_words):
-        risk_score += 2
-        reasons.append("Creates false sense of urgency")
-    
-    # Determine risk level and response
-    if risk_score >= 8:
-        risk_level = "HIGH"
-        recommendation = "🚨 HIGH RISK - This appears to be a scam. Do not provide any personal information, click links, or send money. Report to authorities if financial loss occurred."
-        points_awarded = 30
-        confidence_score = min(90 + (risk_score - 8) * 2, 98)
-    elif risk_score >= 4:
-        risk_level = "MEDIUM"
-        recommendation = "⚠️ MEDIUM RISK - Exercise extreme caution. Verify through official channels before taking any action. Do not provide personal information."
-        points_awarded = 20
-        confidence_score = min(75 + (risk_score - 4) * 3, 89)
-    else:
-        risk_level = "LOW"
-        recommendation = "✅ LOW RISK - No obvious red flags detected, but always remain vigilant with unsolicited communications."
-        points_awarded = 10
-        confidence_score = min(60 + risk_score * 5, 74)
-    
-    # Add confidence factors to response
-    analysis_details = {
-        "risk_score": risk_score,
-        "confidence_factors": confidence_factors,
-        "keywords_detected": {
-            "high_risk": high_risk_matches,
-            "medium_risk": medium_risk_matches
-        }
-    }
-    
-    return {
-        "risk_level": risk_level,
-        "recommendation": recommendation,
-        "confidence_score": confidence_score,
-        "reasons": reasons,
-        "points_awarded": points_awarded,
-        "analysis_details": analysis_details
-    }
+def authenticate_request_token(request, token):
+    """authenticate_token(), remembered on the request so the rate limiter and the route share one lookup"""
+    resolved = getattr(request.state, "bearer_user", None)
+    if resolved is not None and resolved[0] == token:
+        return dict(resolved[1]) if resolved[1] else None
+    user = authenticate_token(token)
+    request.state.bearer_user = (token, user)
+    return user
+
+def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    current_user = authenticate_request_token(request, credentials.credentials)
+    if current_user is None:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    return current_user
 
 # Initialize sample data on startup
-def initialize_sample_data():
+async def initialize_sample_data():
     """Initialize sample phone numbers for testing"""
     sample_numbers = [
         {
@@ -327,34 +402,52 @@ def initialize_sample_data():
     ]
     
     for phone in sample_numbers:
+        phone["phone_key"] = phone_lookup_key(phone["phone_number"])
         # Only insert if not already exists
-        existing = db.phone_numbers.find_one({"phone_number": phone["phone_number"]})
+        existing = await db.phone_numbers.find_one({"phone_key": phone["phone_key"]})
         if not existing:
-            db.phone_numbers.insert_one(phone)
+            await db.phone_numbers.insert_one(phone)
+            await record_phone_registered(db, phone["registered_by"])
+            await record_event(db, phone["created_at"], registrations=1)
     
     print(f"✅ Sample data initialized: {len(sample_numbers)} phone numbers")
 
 # Initialize sample data when server starts
-try:
-    initialize_sample_data()
-except Exception as e:
-    print(f"⚠️ Warning: Could not initialize sample data: {e}")
-
-# Function to log verification attempts
-def log_verification_attempt(phone_number, result, ip_address=None):
-    """Log phone number verification attempts"""
+@app.on_event("startup")
+async def startup_event():
     try:
-        log_entry = {
-            "log_id": str(uuid.uuid4()),
-            "phone_number": phone_number,
-            "result": result,
-            "ip_address": ip_address,
-            "timestamp": datetime.utcnow(),
-            "user_agent": None  # Could be added from request headers
-        }
-        db.verification_logs.insert_one(log_entry)
+        await run_migrations(db)
+    except Exception as e:
+        print(f"❌ Database migration failed, continuing startup: {e}")
+    try:
+        await initialize_sample_data()
     except Exception as e:
-        print(f"Warning: Could not log verification attempt: {e}")
+        print(f"⚠️ Warning: Could not initialize sample data: {e}")
+    registry_cache.start_change_stream(db)
+    write_behind.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await registry_cache.stop_change_stream()
+    # Flush buffered counters and logs before the connection goes away
+    await write_behind.stop()
+    password_pool.shutdown()
+    webhook_verifier.shutdown()
+    client.close()
+
+# Function to log verification attempts
+async def log_verification_attempt(phone_number, result, ip_address=None, trace_id=None):
+    """Queue a phone number verification attempt for the batched log writer"""
+    log_entry = {
+        "log_id": str(uuid.uuid4()),
+        "phone_number": phone_number,
+        "result": result,
+        "ip_address": ip_address,
+        "timestamp": datetime.utcnow(),
+        "user_agent": None,  # Could be added from request headers
+        "trace_id": trace_id
+    }
+    await write_behind.enqueue_log(log_entry)
 
 # Routes
 @app.options("/{full_path:path}")
@@ -372,15 +465,55 @@ async def debug_test():
     }
 
 @app.get("/api/health")
-async def health_check():
-    return {
-        "status": "healthy", 
-        "service": "Check Vero API", 
-        "version": "1.0.0",
-        "timestamp": datetime.utcnow().isoformat(),
-        "cors_enabled": True,
-        "allowed_origins": ["https://checkvero.com", "https://www.checkvero.com"]
-    }
+async def health_check(request: Request):
+    async def build():
+        return {
+            "status": "healthy", 
+            "service": "Check Vero API", 
+            "version": "1.0.0",
+            "timestamp": datetime.utcnow().isoformat(),
+            "uptime_seconds": int(time.time() - STARTED_AT),
+            "cors_enabled": True,
+            "allowed_origins": ["https://checkvero.com", "https://www.checkvero.com"]
+        }
+    
+    return await response_cache.respond(request, HEALTH_CACHE, build)
+
+# Component gauges, read from each component's stats() only when scraped
+CACHES = {"registry": registry_cache, "token": token_cache, "response": response_cache}
+
+def register_cache_metric(name, help_text, field, kind="gauge"):
+    samples = lambda: [((cache_name,), cache.stats()[field]) for cache_name, cache in CACHES.items()]
+    metrics.register(CallbackGauge(name, help_text, ("cache",), samples, kind=kind))
+
+def register_component_metric(name, help_text, component, field, kind="gauge"):
+    metrics.register(CallbackGauge(name, help_text, (), lambda: [((), component.stats()[field])], kind=kind))
+
+register_cache_metric("cache_hits_total", "Cache lookups answered from memory", "hits", kind="counter")
+register_cache_metric("cache_misses_total", "Cache lookups that fell through", "misses", kind="counter")
+register_cache_metric("cache_hit_ratio", "Cache hits / lookups since start", "hit_ratio")
+register_cache_metric("cache_entries", "Entries currently cached", "entries")
+register_component_metric("password_pool_queue_depth", "bcrypt jobs waiting for a worker thread", password_pool, "queued")
+register_component_metric("password_pool_running", "bcrypt jobs running", password_pool, "running")
+register_component_metric("password_pool_rejected_total", "bcrypt jobs refused because the pool was saturated",
+                          password_pool, "rejected", kind="counter")
+register_component_metric("write_behind_queued_logs", "Verification logs waiting to be flushed", write_behind, "queued_logs")
+register_component_metric("write_behind_pending_counters", "Verification counters waiting to be flushed",
+                          write_behind, "pending_counters")
+register_component_metric("write_behind_failed_flushes_total", "Write-behind flushes that failed",
+                          write_behind, "failed_flushes", kind="counter")
+metrics.register(CallbackGauge(
+    "process_start_time_seconds", "Start time of the process since the Unix epoch", (), lambda: [((), STARTED_AT)]
+))
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    """Prometheus scrape endpoint; requires `Authorization: Bearer $METRICS_TOKEN` when that is set"""
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
 
 @app.get("/api/cors-test")
 async def cors_test():
@@ -402,15 +535,15 @@ async def register_user(user: UserCreate):
         raise HTTPException(status_code=400, detail="Password must be at least 8 characters")
     
     # Check if user already exists
-    if db.users.find_one({"username": user.username}):
+    if await db.users.find_one({"username": user.username}):
         raise HTTPException(status_code=400, detail="Username already registered")
     
-    if db.users.find_one({"email": user.email}):
+    if await db.users.find_one({"email": user.email}):
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
     user_id = str(uuid.uuid4())
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash(user.password)
     
     user_doc = {
         "user_id": user_id,
@@ -426,7 +559,8 @@ async def register_user(user: UserCreate):
         "email_verified": False
     }
     
-    db.users.insert_one(user_doc)
+    await db.users.insert_one(user_doc)
+    await record_user_registered(db, user.role)
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -444,16 +578,16 @@ async def register_user(user: UserCreate):
 
 @app.post("/api/login", response_model=Token)
 async def login_user(user: UserLogin):
-    db_user = db.users.find_one({"username": user.username})
+    db_user = await db.users.find_one({"username": user.username})
     
-    if not db_user or not verify_password(user.password, db_user["password"]):
+    if not db_user or not await verify_password(user.password, db_user["password"]):
         raise HTTPException(status_code=401, detail="Incorrect username or password")
     
     if not db_user.get("is_active", True):
         raise HTTPException(status_code=401, detail="Account is deactivated")
     
     # Update last login
-    db.users.update_one(
+    await db.users.update_one(
         {"user_id": db_user["user_id"]},
         {"$set": {"last_login": datetime.utcnow()}}
     )
@@ -477,17 +611,20 @@ async def register_phone_number(phone_data: PhoneNumberRegister, current_user: d
         raise HTTPException(status_code=403, detail="Only businesses and admins can register phone numbers")
     
     # Enhanced phone number validation
-    if not re.match(r'^[\+]?[1-9][\d\-\s\(\)]{7,15}$', phone_data.phone_number):
+    e164 = normalize_e164(phone_data.phone_number)
+    if e164 is None:
         raise HTTPException(status_code=400, detail="Invalid phone number format")
+    phone_key = phone_lookup_key(e164)
     
     # Check if phone number already exists
-    existing = db.phone_numbers.find_one({"phone_number": phone_data.phone_number})
+    existing = await db.phone_numbers.find_one({"phone_key": phone_key}, {"_id": 1})
     if existing:
         raise HTTPException(status_code=400, detail="Phone number already registered")
     
     phone_doc = {
         "phone_id": str(uuid.uuid4()),
-        "phone_number": phone_data.phone_number,
+        "phone_number": e164,
+        "phone_key": phone_key,
         "company_name": phone_data.company_name,
         "description": phone_data.description,
         "registered_by": current_user["user_id"],
@@ -499,46 +636,78 @@ async def register_phone_number(phone_data: PhoneNumberRegister, current_user: d
         "verification_count": 0
     }
     
-    db.phone_numbers.insert_one(phone_doc)
+    try:
+        await db.phone_numbers.insert_one(phone_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Phone number already registered")
+    
+    # Drop any cached negative lookup here and in the other workers
+    registry_cache.invalidate(phone_key)
+    await registry_cache.bump_version(db)
+    await record_phone_registered(db, current_user["user_id"])
+    await record_event(db, phone_doc["created_at"], registrations=1)
     
     return {"message": "Phone number registered successfully", "phone_id": phone_doc["phone_id"]}
 
-@app.post("/api/verify-phone")
-async def verify_phone_number(verification: VerificationCheck):
-    """Verify if a phone number is registered and log the attempt"""
-    
-    # Clean and normalize the phone number
-    phone_number = verification.phone_number.strip()
-    
-    # Look up the phone number in the database
-    phone_record = db.phone_numbers.find_one({
-        "phone_number": phone_number, 
-        "is_active": True
-    })
-    
+async def resolve_phone_records(phone_keys):
+    """Map each phone lookup key to its active registry record (or None).
+
+    Keys are answered from the registry cache where possible; the misses
+    are fetched with a single $in query and cached, including negatives.
+    """
+    await registry_cache.sync_version(db)
+    
+    records = {}
+    misses = []
+    for phone_key in phone_keys:
+        cached, phone_record = registry_cache.get(phone_key)
+        if cached:
+            records[phone_key] = phone_record
+        elif phone_key not in records:
+            records[phone_key] = None
+            misses.append(phone_key)
+    
+    if misses:
+        async for phone_record in db.phone_numbers.find({
+            "phone_key": {"$in": misses},
+            "is_active": True
+        }):
+            records[phone_record["phone_key"]] = phone_record
+        for phone_key in misses:
+            registry_cache.put(phone_key, records[phone_key])
+    
+    return records
+
+def phone_lookup_keys(phone_numbers):
+    """Normalise raw input numbers, returning (logged number, lookup key) pairs"""
+    pairs = []
+    for phone_number in phone_numbers:
+        e164 = normalize_e164(phone_number)
+        if e164 is None:
+            pairs.append((phone_number.strip(), None))
+        else:
+            pairs.append((e164, phone_lookup_key(e164)))
+    return pairs
+
+async def record_verification(phone_number, phone_record, trace_id=None):
+    """Count and log a verification attempt and build the response body"""
     if phone_record:
-        # Increment verification count
-        db.phone_numbers.update_one(
-            {"phone_id": phone_record["phone_id"]},
-            {
-                "$inc": {"verification_count": 1}, 
-                "$set": {"last_verified": datetime.utcnow()}
-            }
-        )
+        # Increment verification count (flushed in aggregate by the write-behind buffer)
+        write_behind.increment(phone_record["phone_id"], phone_record.get("registered_by"))
+        # Keep the cached copy's counter moving with the stored one
+        phone_record["verification_count"] = phone_record.get("verification_count", 0) + 1
         
         result = {
             "is_verified": True,
             "company_name": phone_record["company_name"],
             "description": phone_record.get("description", ""),
             "verified_since": phone_record["verification_date"],
-            "verification_count": phone_record.get("verification_count", 0) + 1,
+            "verification_count": phone_record["verification_count"],
             "message": f"✅ This number is verified and belongs to {phone_record['company_name']}"
         }
         
         # Log the successful verification
-        log_verification_attempt(phone_number, "verified")
-        
-        return result
+        await log_verification_attempt(phone_number, "verified", trace_id=trace_id)
     else:
         result = {
             "is_verified": False,
@@ -547,9 +716,210 @@ async def verify_phone_number(verification: VerificationCheck):
         }
         
         # Log the failed verification
-        log_verification_attempt(phone_number, "not_verified")
-        
-        return result
+        await log_verification_attempt(phone_number, "not_verified", trace_id=trace_id)
+    
+    return result
+
+async def verify_phone_chunk(phone_numbers):
+    """Verify a chunk of numbers with one lookup, returning results in input order"""
+    pairs = phone_lookup_keys(phone_numbers)
+    records = await resolve_phone_records([phone_key for _, phone_key in pairs if phone_key])
+    results = []
+    for phone_number, (normalized, phone_key) in zip(phone_numbers, pairs):
+        result = await record_verification(normalized, records.get(phone_key))
+        results.append({"phone_number": phone_number, **result})
+    return results
+
+@app.post("/api/verify-phone")
+async def verify_phone_number(verification: VerificationCheck):
+    """Verify if a phone number is registered and log the attempt"""
+    
+    # Clean and normalize the phone number to E.164
+    phone_number, phone_key = phone_lookup_keys([verification.phone_number])[0]
+    
+    records = await resolve_phone_records([phone_key] if phone_key else [])
+    return await record_verification(phone_number, records.get(phone_key))
+
+@app.post("/api/verify-phone/bulk")
+async def verify_phone_numbers_bulk(verification: BulkVerificationCheck):
+    """Verify a list of phone numbers, streaming one JSON result per line"""
+    if len(verification.phone_numbers) > BULK_VERIFY_MAX_NUMBERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {BULK_VERIFY_MAX_NUMBERS} phone numbers per request"
+        )
+    
+    phone_numbers = [phone_number.strip() for phone_number in verification.phone_numbers]
+    
+    async def generate():
+        for start in range(0, len(phone_numbers), BULK_VERIFY_CHUNK_SIZE):
+            results = await verify_phone_chunk(phone_numbers[start:start + BULK_VERIFY_CHUNK_SIZE])
+            yield b"".join(json_dumps(result) + b"\n" for result in results)
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.post("/api/verify-phone/stream")
+async def verify_phone_numbers_stream(request: Request):
+    """Verify an NDJSON request body of numbers, streaming NDJSON results back.
+
+    Each input line is either a JSON string or an object with a phone_number
+    field. The body is parsed line by line as it arrives (never buffered
+    whole); Starlette cannot read the request once the response has started,
+    so results are streamed after the upload completes.
+    """
+    items = []
+    buffer = b""
+    line_number = 0
+    
+    def parse_line(line):
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            item = json.loads(line)
+            phone_number = item if isinstance(item, str) else item["phone_number"]
+            return phone_number.strip()
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return {"line": line_number, "error": "Expected a phone number string or {\"phone_number\": ...}"}
+    
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            item = parse_line(line)
+            if item is not None:
+                items.append(item)
+        if len(items) > BULK_VERIFY_MAX_NUMBERS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {BULK_VERIFY_MAX_NUMBERS} phone numbers per request"
+            )
+    line_number += 1
+    item = parse_line(buffer)
+    if item is not None:
+        items.append(item)
+    
+    async def generate():
+        for start in range(0, len(items), BULK_VERIFY_CHUNK_SIZE):
+            chunk = items[start:start + BULK_VERIFY_CHUNK_SIZE]
+            phone_numbers = [item for item in chunk if isinstance(item, str)]
+            results = iter(await verify_phone_chunk(phone_numbers))
+            yield b"".join(
+                json_dumps(next(results) if isinstance(item, str) else item) + b"\n"
+                for item in chunk
+            )
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.post("/webhook/check")
+async def carrier_webhook_check(check: CarrierWebhookCheck):
+    """Signed inline verification for carriers/CPaaS during call setup"""
+    try:
+        await webhook_verifier.verify(check.key_id, check.e164, check.ts, check.nonce, check.sig)
+    except WebhookError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    phone_number, phone_key = phone_lookup_keys([check.e164])[0]
+    if phone_key is None:
+        raise HTTPException(status_code=400, detail="e164 is not a valid phone number")
+    
+    trace_id = new_trace_id()
+    records = await resolve_phone_records([phone_key])
+    result = await record_verification(phone_number, records.get(phone_key), trace_id=trace_id)
+    response = {"status": "verified" if result["is_verified"] else "not_verified", "trace_id": trace_id}
+    if result["is_verified"]:
+        response["company_name"] = result["company_name"]
+    return response
+
+@app.post("/api/admin/carrier-keys")
+async def register_carrier_key(carrier_key: CarrierKeyRegister, current_user: dict = Depends(get_current_user)):
+    """Register or rotate a carrier's webhook signing key (admin only)"""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    try:
+        parse_public_key(carrier_key.public_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    await db.carrier_keys.update_one(
+        {"key_id": carrier_key.key_id},
+        {
+            "$set": {
+                "carrier_name": carrier_key.carrier_name,
+                "public_key": carrier_key.public_key,
+                "is_active": True,
+                "updated_at": datetime.utcnow()
+            },
+            "$setOnInsert": {"created_by": current_user["user_id"], "created_at": datetime.utcnow()}
+        },
+        upsert=True
+    )
+    webhook_verifier.key_cache.invalidate(carrier_key.key_id)
+    return {"message": "Carrier key registered successfully", "key_id": carrier_key.key_id}
+
+@app.delete("/api/admin/carrier-keys/{key_id}")
+async def revoke_carrier_key(key_id: str, current_user: dict = Depends(get_current_user)):
+    """Revoke a carrier key; other workers stop accepting it within WEBHOOK_KEY_CACHE_TTL"""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    result = await db.carrier_keys.update_one(
+        {"key_id": key_id, "is_active": True},
+        {"$set": {"is_active": False, "updated_at": datetime.utcnow()}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Carrier key not found")
+    webhook_verifier.key_cache.invalidate(key_id)
+    return {"message": "Carrier key revoked", "key_id": key_id}
+
+async def save_evidence(chunks, user_id):
+    """Store uploaded evidence and remember who may attach it to a report"""
+    try:
+        digest, size, content_type, duplicate = await evidence_store.save_stream(chunks)
+    except BlobTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UnsupportedBlobType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except EmptyBlob as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    await db.evidence_blobs.update_one(
+        {"_id": digest},
+        {
+            "$addToSet": {"uploaded_by": user_id},
+            "$setOnInsert": {"size": size, "content_type": content_type, "created_at": datetime.utcnow()}
+        },
+        upsert=True
+    )
+    return {"digest": digest, "size": size, "content_type": content_type, "duplicate": duplicate}
+
+async def store_base64_evidence(data, user_id):
+    """Store a legacy base64 (optionally data: URL) screenshot, returning its digest"""
+    encoded = data.split(",", 1)[1] if data.startswith("data:") else data
+    if len(encoded) * 3 // 4 > evidence_store.max_bytes:
+        raise HTTPException(status_code=413, detail=f"File exceeds {evidence_store.max_bytes} bytes")
+    try:
+        content = base64.b64decode(encoded)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="screenshot is not valid base64")
+    
+    async def single_chunk():
+        yield content
+    return (await save_evidence(single_chunk(), user_id))["digest"]
+
+@app.post("/api/reports/evidence")
+async def upload_report_evidence(request: Request, current_user: dict = Depends(get_current_user)):
+    """Stream a screenshot or recording (raw request body) into the evidence store"""
+    if current_user["role"] != "citizen":
+        raise HTTPException(status_code=403, detail="Only citizens can submit reports")
+    
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > evidence_store.max_bytes:
+        raise HTTPException(status_code=413, detail=f"File exceeds {evidence_store.max_bytes} bytes")
+    
+    return await save_evidence(request.stream(), current_user["user_id"])
 
 @app.post("/api/reports/submit")
 async def submit_report(report: ReportCreate, current_user: dict = Depends(get_current_user)):
@@ -569,15 +939,22 @@ async def submit_report(report: ReportCreate, current_user: dict = Depends(get_c
         "email_address": report.email_address
     })
     
-    # Process file upload if provided
+    # Attach uploaded evidence; only its digest and metadata go into the report
+    screenshot_digest = report.screenshot_digest
+    if report.screenshot and not screenshot_digest:
+        screenshot_digest = await store_base64_evidence(report.screenshot, current_user["user_id"])
+    
     screenshot_info = None
-    if report.screenshot:
-        # In a real implementation, you would save the file to cloud storage
-        # For now, we'll just store metadata
+    if screenshot_digest:
+        evidence = await db.evidence_blobs.find_one({"_id": screenshot_digest, "uploaded_by": current_user["user_id"]})
+        if evidence is None or not evidence_store.exists(screenshot_digest):
+            raise HTTPException(status_code=400, detail="Unknown screenshot_digest, upload the file first")
         screenshot_info = {
             "uploaded": True,
-            "size": len(report.screenshot),
-            "type": "image" if report.screenshot.startswith("data:image") else "unknown"
+            "digest": screenshot_digest,
+            "size": evidence["size"],
+            "content_type": evidence["content_type"],
+            "type": evidence["content_type"].split("/")[0]
         }
     
     report_doc = {
@@ -595,13 +972,30 @@ async def submit_report(report: ReportCreate, current_user: dict = Depends(get_c
         "is_active": True
     }
     
-    db.reports.insert_one(report_doc)
+    await db.reports.insert_one(report_doc)
     
     # Award points to user
-    db.users.update_one(
+    await db.users.update_one(
         {"user_id": current_user["user_id"]},
         {"$inc": {"points": ai_analysis["points_awarded"]}}
     )
+    response_cache.invalidate(PROFILE_CACHE.key(current_user))
+    
+    # Update dashboard counters, including the business whose number is reported
+    mentioned_owner_id = None
+    _, phone_key = phone_lookup_keys([report.phone_number])[0] if report.phone_number else (None, None)
+    if phone_key:
+        mentioned_phone = (await resolve_phone_records([phone_key]))[phone_key]
+        mentioned_owner_id = mentioned_phone["registered_by"] if mentioned_phone else None
+    await record_report_submitted(
+        db,
+        current_user["user_id"],
+        ai_analysis["risk_level"],
+        report_doc["status"],
+        ai_analysis["points_awarded"],
+        mentioned_owner_id
+    )
+    await record_event(db, report_doc["created_at"], reports=1)
     
     return {
         "report_id": report_id,
@@ -609,133 +1003,147 @@ async def submit_report(report: ReportCreate, current_user: dict = Depends(get_c
         "ai_analysis": ai_analysis
     }
 
+# Fields clients may request with ?fields= on list endpoints
+REPORT_FIELDS = {
+    "report_id", "user_id", "report_type", "phone_number", "email_address", "description",
+    "screenshot_info", "status", "ai_analysis", "created_at", "updated_at", "is_active"
+}
+PHONE_FIELDS = {
+    "phone_id", "phone_number", "company_name", "description", "registered_by", "verified",
+    "verification_date", "created_at", "updated_at", "is_active", "verification_count", "last_verified"
+}
+
+async def list_page(collection, query, id_field, allowed_fields, after, limit, fields, count_scope, count_field):
+    """Fetch one keyset page as a JSON response with the paging headers set"""
+    try:
+        projection = build_projection(fields, allowed_fields, id_field)
+        documents, next_cursor = await fetch_page(collection, query, id_field, after, limit, projection)
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Documents are encoded as read: no per-document conversion or jsonable_encoder pass
+    response = BSONResponse(documents)
+    # The total is an estimate read from the maintained dashboard counters
+    set_page_headers(response, next_cursor, await read_counter(db, count_scope, count_field))
+    return response
+
+@app.get("/api/reports/{report_id}/screenshot")
+async def get_report_screenshot(report_id: str, current_user: dict = Depends(get_current_user)):
+    """Serve a report's evidence file to its author or an admin"""
+    query = {"report_id": report_id, "is_active": True}
+    if current_user["role"] != "admin":
+        query["user_id"] = current_user["user_id"]
+    report = await db.reports.find_one(query, {"screenshot_info": 1})
+    digest = ((report or {}).get("screenshot_info") or {}).get("digest")
+    if not digest or not evidence_store.exists(digest):
+        raise HTTPException(status_code=404, detail="Screenshot not found")
+    return FileResponse(evidence_store.path_for(digest), media_type=report["screenshot_info"]["content_type"])
+
 @app.get("/api/reports/my-reports")
-async def get_my_reports(current_user: dict = Depends(get_current_user)):
-    reports = list(db.reports.find(
-        {"user_id": current_user["user_id"], "is_active": True}
-    ).sort("created_at", -1))
-    
-    # Convert ObjectId to string and format dates
-    for report in reports:
-        report["_id"] = str(report["_id"])
-        report["created_at"] = report["created_at"].isoformat()
-        report["updated_at"] = report["updated_at"].isoformat()
-    
-    return reports
+async def get_my_reports(
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    return await list_page(
+        db.reports,
+        {"user_id": current_user["user_id"], "is_active": True},
+        "report_id", REPORT_FIELDS, after, limit, fields,
+        user_scope(current_user["user_id"]), "total_reports"
+    )
 
 @app.get("/api/reports/all")
-async def get_all_reports(current_user: dict = Depends(get_current_user)):
+async def get_all_reports(
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    reports = list(db.reports.find({"is_active": True}).sort("created_at", -1))
-    
-    # Convert ObjectId to string and format dates
-    for report in reports:
-        report["_id"] = str(report["_id"])
-        report["created_at"] = report["created_at"].isoformat()
-        report["updated_at"] = report["updated_at"].isoformat()
-    
-    return reports
+    return await list_page(
+        db.reports, {"is_active": True},
+        "report_id", REPORT_FIELDS, after, limit, fields,
+        GLOBAL_ID, "total_reports"
+    )
 
 @app.get("/api/phone-numbers/my-numbers")
-async def get_my_phone_numbers(current_user: dict = Depends(get_current_user)):
+async def get_my_phone_numbers(
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    fields: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     if current_user["role"] not in ["business", "admin"]:
         raise HTTPException(status_code=403, detail="Access denied")
     
     query = {"is_active": True}
+    count_scope, count_field = GLOBAL_ID, "total_phone_numbers"
     if current_user["role"] == "business":
         query["registered_by"] = current_user["user_id"]
+        count_scope, count_field = business_scope(current_user["user_id"]), "registered_numbers"
     
-    phone_numbers = list(db.phone_numbers.find(query).sort("created_at", -1))
-    
-    # Convert ObjectId to string and format dates
-    for phone in phone_numbers:
-        phone["_id"] = str(phone["_id"])
-        phone["created_at"] = phone["created_at"].isoformat()
-        phone["updated_at"] = phone["updated_at"].isoformat()
-    
-    return phone_numbers
+    return await list_page(
+        db.phone_numbers, query,
+        "phone_id", PHONE_FIELDS, after, limit, fields, count_scope, count_field
+    )
 
 @app.get("/api/users/profile")
-async def get_user_profile(current_user: dict = Depends(get_current_user)):
-    user = db.users.find_one({"user_id": current_user["user_id"]})
-    
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+async def get_user_profile(request: Request, current_user: dict = Depends(get_current_user)):
+    async def build():
+        user = await db.users.find_one({"user_id": current_user["user_id"]})
+        
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        return {
+            "user_id": user["user_id"],
+            "username": user["username"],
+            "email": user["email"],
+            "role": user["role"],
+            "company_name": user.get("company_name"),
+            "points": user.get("points", 0),
+            "created_at": user["created_at"],
+            "email_verified": user.get("email_verified", False)
+        }
     
-    return {
-        "user_id": user["user_id"],
-        "username": user["username"],
-        "email": user["email"],
-        "role": user["role"],
-        "company_name": user.get("company_name"),
-        "points": user.get("points", 0),
-        "created_at": user["created_at"].isoformat(),
-        "email_verified": user.get("email_verified", False)
-    }
+    # Points awarded by this worker drop the entry; other workers' show within the TTL
+    return await response_cache.respond(request, PROFILE_CACHE, build, user=current_user)
 
 @app.get("/api/stats/dashboard")
 async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
-    stats = {}
-    
-    if current_user["role"] == "citizen":
-        user_reports = list(db.reports.find({"user_id": current_user["user_id"], "is_active": True}))
-        stats = {
-            "total_reports": len(user_reports),
-            "points_earned": db.users.find_one({"user_id": current_user["user_id"]})["points"],
-            "high_risk_reports": len([r for r in user_reports if r.get("ai_analysis", {}).get("risk_level") == "HIGH"]),
-            "medium_risk_reports": len([r for r in user_reports if r.get("ai_analysis", {}).get("risk_level") == "MEDIUM"]),
-            "low_risk_reports": len([r for r in user_reports if r.get("ai_analysis", {}).get("risk_level") == "LOW"])
-        }
-    elif current_user["role"] == "business":
-        user_phones = list(db.phone_numbers.find({"registered_by": current_user["user_id"], "is_active": True}))
-        total_verifications = sum(phone.get("verification_count", 0) for phone in user_phones)
-        stats = {
-            "registered_numbers": len(user_phones),
-            "verification_checks": total_verifications,
-            "reports_mentioning": db.reports.count_documents({
-                "phone_number": {"$in": [phone["phone_number"] for phone in user_phones]},
-                "is_active": True
-            }),
-            "active_numbers": len([p for p in user_phones if p.get("is_active", True)])
-        }
-    elif current_user["role"] == "admin":
-        all_reports = list(db.reports.find({"is_active": True}))
-        stats = {
-            "total_users": db.users.count_documents({"is_active": True}),
-            "total_reports": len(all_reports),
-            "total_phone_numbers": db.phone_numbers.count_documents({"is_active": True}),
-            "high_risk_reports": len([r for r in all_reports if r.get("ai_analysis", {}).get("risk_level") == "HIGH"]),
-            "pending_reports": len([r for r in all_reports if r.get("status") == "pending"]),
-            "verified_businesses": db.users.count_documents({"role": "business", "is_active": True})
-        }
-    
-    return stats
+    # Counters are maintained on the write paths; this is a single document read
+    return await read_dashboard(db, current_user["role"], current_user["user_id"])
 
 # Enhanced endpoint for detailed analytics
 @app.get("/api/analytics/summary")
-async def get_analytics_summary(current_user: dict = Depends(get_current_user)):
+async def get_analytics_summary(request: Request, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
+    # Shared by all admins. A registry write or a counted report, user or number
+    # on any worker moves the version and rebuilds it
+    await registry_cache.sync_version(db)
+    counters = await read_dashboard(db, "admin", None)
+    return await response_cache.respond(
+        request, ANALYTICS_SUMMARY_CACHE, build_analytics_summary,
+        version=(registry_cache.version, tuple(counters.values()))
+    )
+
+async def build_analytics_summary():
     # Get recent activity
-    recent_reports = list(db.reports.find({"is_active": True}).sort("created_at", -1).limit(10))
-    recent_registrations = list(db.phone_numbers.find({"is_active": True}).sort("created_at", -1).limit(10))
+    recent_reports = await db.reports.find({"is_active": True}).sort("created_at", -1).limit(10).to_list(length=10)
+    recent_registrations = await db.phone_numbers.find({"is_active": True}).sort("created_at", -1).limit(10).to_list(length=10)
     
-    # Calculate trends
-    today = datetime.utcnow()
-    yesterday = today - timedelta(days=1)
-    
-    today_reports = db.reports.count_documents({
-        "created_at": {"$gte": yesterday},
-        "is_active": True
-    })
-    
-    today_verifications = db.phone_numbers.count_documents({
-        "created_at": {"$gte": yesterday},
-        "is_active": True
-    })
+    # Calculate trends from the pre-aggregated buckets: last 24h vs the 24h before
+    now = datetime.utcnow()
+    next_hour = bucket_start(now, "hour") + timedelta(hours=1)
+    hourly = await read_series(db, "hour", next_hour - timedelta(hours=48), next_hour)
+    today = sum_series(hourly[24:])
+    yesterday = sum_series(hourly[:24])
+    sparkline = await read_series(db, "day", bucket_start(now, "day") - timedelta(days=6), now)
     
     return {
         "recent_reports": [
@@ -743,7 +1151,7 @@ async def get_analytics_summary(current_user: dict = Depends(get_current_user)):
                 "report_id": r["report_id"],
                 "type": r["report_type"],
                 "risk_level": r.get("ai_analysis", {}).get("risk_level", "UNKNOWN"),
-                "created_at": r["created_at"].isoformat()
+                "created_at": r["created_at"]
             }
             for r in recent_reports
         ],
@@ -751,14 +1159,48 @@ async def get_analytics_summary(current_user: dict = Depends(get_current_user)):
             {
                 "phone_number": r["phone_number"],
                 "company_name": r["company_name"],
-                "created_at": r["created_at"].isoformat()
+                "created_at": r["created_at"]
             }
             for r in recent_registrations
         ],
         "daily_stats": {
-            "reports_today": today_reports,
-            "verifications_today": today_verifications
-        }
+            "reports_today": today["reports"],
+            "verifications_today": today["verification_attempts"],
+            "registrations_today": today["registrations"]
+        },
+        "trends": {
+            "today": today,
+            "yesterday": yesterday
+        },
+        "sparkline_7d": sparkline
+    }
+
+@app.get("/api/analytics/rollups")
+async def get_analytics_rollups(
+    granularity: str = "hour",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Activity counts per bucket over [start, end) (admin only); defaults to the last 24 hours"""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    
+    # Query strings may carry an offset ("...Z"); buckets are keyed by naive UTC
+    end = naive_utc(end) or datetime.utcnow()
+    start = naive_utc(start) or end - timedelta(days=1)
+    step, _ = GRANULARITIES[granularity]
+    if start >= end or (end - start) / step > MAX_ROLLUP_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Range must be positive and span at most {MAX_ROLLUP_BUCKETS} buckets")
+    
+    series = await read_series(db, granularity, start, end)
+    return {
+        "granularity": granularity,
+        "buckets": series,
+        "totals": sum_series(series)
     }
 
 @app.get("/api/verification-logs")
@@ -767,31 +1209,83 @@ async def get_verification_logs(current_user: dict = Depends(get_current_user),
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    logs = list(db.verification_logs.find().sort("timestamp", -1).limit(limit))
+    logs = await db.verification_logs.find().sort("timestamp", -1).limit(limit).to_list(length=limit)
     
-    # Convert ObjectId to string and format dates
-    for log in logs:
-        log["_id"] = str(log["_id"])
-        log["timestamp"] = log["timestamp"].isoformat()
-    
-    return {
+    return BSONResponse({
         "verification_logs": logs,
-        "total_count": db.verification_logs.count_documents({})
-    }
+        "total_count": await db.verification_logs.count_documents({})
+    })
+
+def export_response(collection, query, time_field, id_field, columns, export_format, start, end, after, name):
+    """Stream an export of collection as NDJSON or CSV from a batched cursor"""
+    try:
+        query = export_query(query, time_field, id_field, start, end, after)
+    except PaginationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    batches = iter_batches(collection, query, time_field, id_field)
+    if export_format == ExportFormat.CSV:
+        return StreamingResponse(
+            csv_stream(batches, columns),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{name}.csv"'}
+        )
+    return StreamingResponse(
+        ndjson_stream(batches),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{name}.ndjson"'}
+    )
+
+@app.get("/api/admin/export/reports")
+async def export_reports(
+    format: ExportFormat = ExportFormat.NDJSON,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    after: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Export active reports created in [start, end), oldest first (admin only)"""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return export_response(
+        db.reports, {"is_active": True}, "created_at", "report_id",
+        REPORT_COLUMNS, format, start, end, after, "reports"
+    )
+
+@app.get("/api/admin/export/verification-logs")
+async def export_verification_logs(
+    format: ExportFormat = ExportFormat.NDJSON,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    after: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Export verification attempts logged in [start, end), oldest first (admin only)"""
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return export_response(
+        db.verification_logs, {}, "timestamp", "log_id",
+        VERIFICATION_LOG_COLUMNS, format, start, end, after, "verification-logs"
+    )
 
 @app.get("/api/sample-numbers")
-async def get_sample_numbers():
+async def get_sample_numbers(request: Request):
     """Get list of sample verified numbers for testing (public endpoint)"""
-    sample_numbers = [
-        {"number": "+31612345678", "company": "Acme Bank"},
-        {"number": "+61298765432", "company": "Gov Australia"}, 
-        {"number": "+14155552020", "company": "TechCorp Support"},
-        {"number": "+442071234567", "company": "British Telecom"}
-    ]
-    return {
-        "sample_numbers": sample_numbers,
-        "message": "Use these numbers to test the verification system"
-    }
+    async def build():
+        sample_numbers = [
+            {"number": "+31612345678", "company": "Acme Bank"},
+            {"number": "+61298765432", "company": "Gov Australia"}, 
+            {"number": "+14155552020", "company": "TechCorp Support"},
+            {"number": "+442071234567", "company": "British Telecom"}
+        ]
+        return {
+            "sample_numbers": sample_numbers,
+            "message": "Use these numbers to test the verification system"
+        }
+    
+    return await response_cache.respond(request, SAMPLE_NUMBERS_CACHE, build)
 
 if __name__ == "__main__":
     import uvicorn
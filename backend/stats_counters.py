@@ -0,0 +1,178 @@
+"""Pre-aggregated dashboard counters kept in the stats_counters collection.
+
+One small document per scope: "global" for admins, "user:<id>" per citizen
+and "business:<id>" per registering business. Write paths $inc them as they
+go, so /api/stats/dashboard is a single find_one however large the data is.
+"""
+from collections import defaultdict
+
+from pymongo import ReplaceOne, UpdateOne
+
+from phone_utils import normalize_e164, phone_lookup_key
+
+GLOBAL_ID = "global"
+
+# Fields (and defaults) each dashboard returns
+CITIZEN_FIELDS = {
+    "total_reports": 0,
+    "points_earned": 0,
+    "high_risk_reports": 0,
+    "medium_risk_reports": 0,
+    "low_risk_reports": 0
+}
+BUSINESS_FIELDS = {
+    "registered_numbers": 0,
+    "verification_checks": 0,
+    "reports_mentioning": 0,
+    "active_numbers": 0
+}
+ADMIN_FIELDS = {
+    "total_users": 0,
+    "total_reports": 0,
+    "total_phone_numbers": 0,
+    "high_risk_reports": 0,
+    "pending_reports": 0,
+    "verified_businesses": 0
+}
+
+
+def user_scope(user_id):
+    return f"user:{user_id}"
+
+
+def business_scope(user_id):
+    return f"business:{user_id}"
+
+
+def _inc(scope, **fields):
+    return UpdateOne({"_id": scope}, {"$inc": fields}, upsert=True)
+
+
+async def record_user_registered(db, role):
+    fields = {"total_users": 1}
+    if role == "business":
+        fields["verified_businesses"] = 1
+    await db.stats_counters.update_one({"_id": GLOBAL_ID}, {"$inc": fields}, upsert=True)
+
+
+async def record_phone_registered(db, owner_id):
+    await db.stats_counters.bulk_write([
+        _inc(business_scope(owner_id), registered_numbers=1, active_numbers=1),
+        _inc(GLOBAL_ID, total_phone_numbers=1)
+    ], ordered=False)
+
+
+async def record_report_submitted(db, user_id, risk_level, status, points, mentioned_owner_id=None):
+    """Count a new report for its author, the business it names (if any) and globally"""
+    risk_field = f"{risk_level.lower()}_risk_reports"
+    global_fields = {"total_reports": 1}
+    if risk_level == "HIGH":
+        global_fields["high_risk_reports"] = 1
+    if status == "pending":
+        global_fields["pending_reports"] = 1
+
+    updates = [
+        _inc(user_scope(user_id), total_reports=1, points_earned=points, **{risk_field: 1}),
+        _inc(GLOBAL_ID, **global_fields)
+    ]
+    if mentioned_owner_id:
+        updates.append(_inc(business_scope(mentioned_owner_id), reports_mentioning=1))
+    await db.stats_counters.bulk_write(updates, ordered=False)
+
+
+def verification_updates(checks_by_owner, attempts):
+    """Counter updates for a flushed batch of verifications (used by the write-behind buffer)"""
+    updates = [
+        _inc(business_scope(owner_id), verification_checks=count)
+        for owner_id, count in checks_by_owner.items()
+    ]
+    if attempts:
+        updates.append(_inc(
+            GLOBAL_ID,
+            verification_attempts=attempts,
+            verification_checks=sum(checks_by_owner.values())
+        ))
+    return updates
+
+
+async def read_dashboard(db, role, user_id):
+    """Return the dashboard stats for a role from its single counter document"""
+    if role == "citizen":
+        scope, fields = user_scope(user_id), CITIZEN_FIELDS
+    elif role == "business":
+        scope, fields = business_scope(user_id), BUSINESS_FIELDS
+    elif role == "admin":
+        scope, fields = GLOBAL_ID, ADMIN_FIELDS
+    else:
+        return {}
+
+    counters = await db.stats_counters.find_one({"_id": scope}, {field: 1 for field in fields}) or {}
+    return {field: counters.get(field, default) for field, default in fields.items()}
+
+
+async def read_counter(db, scope, field):
+    """Read one counter, e.g. a total used as a list endpoint's count estimate"""
+    counters = await db.stats_counters.find_one({"_id": scope}, {field: 1}) or {}
+    return counters.get(field, 0)
+
+
+async def rebuild_stats_counters(db, force=False):
+    """Recompute every counter document from the source collections.
+
+    Runs once as a migration when no counters exist yet; pass force=True to
+    repair drift after manual edits to the data.
+    """
+    if not force and await db.stats_counters.find_one({"_id": GLOBAL_ID}, {"_id": 1}):
+        return
+
+    counters = defaultdict(lambda: defaultdict(int))
+    owners_by_key = {}
+
+    async for user in db.users.find({"is_active": True}, {"user_id": 1, "role": 1, "points": 1}):
+        counters[GLOBAL_ID]["total_users"] += 1
+        if user.get("role") == "business":
+            counters[GLOBAL_ID]["verified_businesses"] += 1
+        counters[user_scope(user["user_id"])]["points_earned"] += user.get("points", 0)
+
+    async for phone in db.phone_numbers.find(
+        {"is_active": True}, {"phone_key": 1, "registered_by": 1, "verification_count": 1}
+    ):
+        scope = business_scope(phone["registered_by"])
+        counters[scope]["registered_numbers"] += 1
+        counters[scope]["active_numbers"] += 1
+        counters[scope]["verification_checks"] += phone.get("verification_count", 0)
+        counters[GLOBAL_ID]["total_phone_numbers"] += 1
+        counters[GLOBAL_ID]["verification_checks"] += phone.get("verification_count", 0)
+        if phone.get("phone_key"):
+            owners_by_key[phone["phone_key"]] = phone["registered_by"]
+
+    async for report in db.reports.find(
+        {"is_active": True}, {"user_id": 1, "phone_number": 1, "status": 1, "ai_analysis.risk_level": 1}
+    ):
+        risk_level = report.get("ai_analysis", {}).get("risk_level")
+        scope = user_scope(report["user_id"])
+        counters[scope]["total_reports"] += 1
+        counters[GLOBAL_ID]["total_reports"] += 1
+        if risk_level in ("HIGH", "MEDIUM", "LOW"):
+            counters[scope][f"{risk_level.lower()}_risk_reports"] += 1
+        if risk_level == "HIGH":
+            counters[GLOBAL_ID]["high_risk_reports"] += 1
+        if report.get("status") == "pending":
+            counters[GLOBAL_ID]["pending_reports"] += 1
+        e164 = normalize_e164(report.get("phone_number"))
+        owner_id = owners_by_key.get(phone_lookup_key(e164)) if e164 else None
+        if owner_id:
+            counters[business_scope(owner_id)]["reports_mentioning"] += 1
+
+    counters[GLOBAL_ID]["verification_attempts"] = await db.verification_logs.estimated_document_count()
+
+    # Replace in place rather than delete and re-insert, so an overlapping rebuild
+    # or write-path upsert cannot hit a duplicate key
+    if counters:
+        await db.stats_counters.bulk_write([
+            ReplaceOne({"_id": scope}, dict(fields), upsert=True) for scope, fields in counters.items()
+        ], ordered=False)
+    stale = [doc["_id"] async for doc in db.stats_counters.find({}, {"_id": 1}) if doc["_id"] not in counters]
+    if stale:
+        await db.stats_counters.delete_many({"_id": {"$in": stale}})
+    print(f"✅ Rebuilt {len(counters)} dashboard counter documents")
@@ -0,0 +1,57 @@
+import hashlib
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    """Bounded LRU cache of already-validated JWT claims keyed by token digest.
+
+    An entry is only served until the token's own exp, so a cached token stops
+    authenticating at exactly the moment jwt.decode would start rejecting it.
+    Raw tokens are never kept in memory, only their SHA-256 digests.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token):
+        """Return the cached claims for token, or None if absent or expired"""
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return claims
+
+    def put(self, token, claims, expires_at):
+        key = self._key(token)
+        self._entries[key] = (expires_at, claims)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0
+        }
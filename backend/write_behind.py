@@ -0,0 +1,167 @@
+import asyncio
+from datetime import datetime
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from rollups import verification_log_updates
+from stats_counters import verification_updates
+
+
+class VerificationWriteBehind:
+    """Buffers verification side effects and writes them to Mongo in batches.
+
+    Counter increments are aggregated per phone_id and log entries are queued.
+    Every flush_interval seconds, or as soon as batch_size log entries are
+    waiting, they are written with one bulk_write or insert_many per
+    collection, together with the matching dashboard counters and rollups.
+    The log queue is bounded: when it is full, producers wait for the flusher
+    instead of growing memory without limit.
+    """
+
+    def __init__(self, db, batch_size=500, flush_interval=0.25, max_queue_size=10000):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self._logs = asyncio.Queue(maxsize=max_queue_size)
+        # Log entries from failed inserts, retried ahead of the queue
+        self._retry_logs = []
+        self._counters = {}
+        self._batch_ready = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+        self.flushed_logs = 0
+        self.flushed_counters = 0
+        self.failed_flushes = 0
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background flusher and write out everything still buffered"""
+        if self._task is not None:
+            # Let an in-flight flush finish rather than cancelling it halfway
+            self._stopping.set()
+            self._batch_ready.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def increment(self, phone_id, owner_id=None, verified_at=None, count=1):
+        """Count verifications for phone_id; merged with others before writing"""
+        verified_at = verified_at or datetime.utcnow()
+        pending = self._counters.get(phone_id)
+        if pending is None:
+            self._counters[phone_id] = [count, verified_at, owner_id]
+        else:
+            pending[0] += count
+            if verified_at > pending[1]:
+                pending[1] = verified_at
+
+    async def enqueue_log(self, log_entry):
+        """Queue a verification_logs document, waiting if the buffer is full"""
+        await self._logs.put(log_entry)
+        if self._logs.qsize() >= self.batch_size:
+            self._batch_ready.set()
+
+    def stats(self):
+        return {
+            "queued_logs": self._logs.qsize() + len(self._retry_logs),
+            "pending_counters": len(self._counters),
+            "flushed_logs": self.flushed_logs,
+            "flushed_counters": self.flushed_counters,
+            "failed_flushes": self.failed_flushes
+        }
+
+    async def flush(self):
+        async with self._flush_lock:
+            counters, self._counters = self._counters, {}
+            logs, self._retry_logs = self._retry_logs, []
+            # Entries still waiting for a retry count against the queue bound
+            while not self._logs.empty() and len(logs) < self.max_queue_size:
+                logs.append(self._logs.get_nowait())
+
+            if counters:
+                try:
+                    await self.db.phone_numbers.bulk_write([
+                        UpdateOne(
+                            {"phone_id": phone_id},
+                            {
+                                "$inc": {"verification_count": count},
+                                "$max": {"last_verified": last_verified}
+                            }
+                        )
+                        for phone_id, (count, last_verified, _) in counters.items()
+                    ], ordered=False)
+                    self.flushed_counters += len(counters)
+                except PyMongoError as e:
+                    # Fold the increments back in so the next flush retries them
+                    self.failed_flushes += 1
+                    for phone_id, (count, last_verified, owner_id) in counters.items():
+                        self.increment(phone_id, owner_id, last_verified, count)
+                    print(f"Warning: Could not flush verification counters: {e}")
+                    counters = {}
+
+            written_logs = []
+            for start in range(0, len(logs), self.batch_size):
+                chunk = logs[start:start + self.batch_size]
+                failed = await self._insert_logs(chunk)
+                if failed:
+                    self._retry_logs.extend(failed)
+                    failed_ids = {id(entry) for entry in failed}
+                    chunk = [entry for entry in chunk if id(entry) not in failed_ids]
+                written_logs.extend(chunk)
+                self.flushed_logs += len(chunk)
+            logs = written_logs
+
+            checks_by_owner = {}
+            for count, _, owner_id in counters.values():
+                if owner_id:
+                    checks_by_owner[owner_id] = checks_by_owner.get(owner_id, 0) + count
+            stats_updates = verification_updates(checks_by_owner, len(logs))
+            if stats_updates:
+                try:
+                    await self.db.stats_counters.bulk_write(stats_updates, ordered=False)
+                except PyMongoError as e:
+                    self.failed_flushes += 1
+                    print(f"Warning: Could not update verification stats: {e}")
+
+            if logs:
+                try:
+                    await self.db.rollups.bulk_write(verification_log_updates(logs), ordered=False)
+                except PyMongoError as e:
+                    self.failed_flushes += 1
+                    print(f"Warning: Could not update verification rollups: {e}")
+
+    async def _insert_logs(self, chunk):
+        """Insert a chunk of log entries; returns the entries that were not written"""
+        try:
+            await self.db.verification_logs.insert_many(chunk, ordered=False)
+            return []
+        except BulkWriteError as e:
+            # insert_many gave every entry an _id, so a retried entry that did land
+            # comes back as a duplicate key and is not written twice
+            failed = [chunk[error["index"]] for error in e.details.get("writeErrors", []) if error.get("code") != 11000]
+            if failed:
+                self.failed_flushes += 1
+                print(f"Warning: Could not log {len(failed)} verification attempts, will retry: {e}")
+            return failed
+        except PyMongoError as e:
+            self.failed_flushes += 1
+            print(f"Warning: Could not log {len(chunk)} verification attempts, will retry: {e}")
+            return chunk
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            if self._stopping.is_set():
+                break
+            await self.flush()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test and SLO check for the Check Vero backend.
+
+Starts backend/server.py locally (against MONGO_URL, or an in-memory
+mongomock stand-in with --in-memory), drives a weighted mix of verify, login
+and report traffic from many concurrent clients, then prints throughput and
+p50/p95/p99 per route. Exits non-zero when a route misses the README SLOs
+(p50 < 200 ms, p95 < 300 ms, p99 < 400 ms), the error rate is too high, or
+latencies regressed against a saved baseline.
+
+    python load_test.py --in-memory --concurrency 50 --duration 30
+    python load_test.py --mix verify=90,report=10 --save baseline.json
+    python load_test.py --baseline baseline.json --tolerance 0.2
+    python load_test.py --url http://localhost:8001   # an already running server
+
+Requires httpx (and mongomock-motor for --in-memory).
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+
+# README operational SLOs in milliseconds
+DEFAULT_SLO = {"p50": 200, "p95": 300, "p99": 400}
+
+REPORT_DESCRIPTIONS = [
+    "Caller claimed to be from my bank and asked me to verify account details urgently",
+    "Received a message saying I won a prize and must pay a fee to claim it",
+    "Someone called about a tax refund and wanted my credit card number",
+    "Friendly call asking about my internet provider, nothing suspicious",
+]
+
+
+def log(message):
+    print(f"[{time.strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+def parse_mix(value):
+    """Parse "verify=80,login=10,report=10" into {route: weight}"""
+    mix = {}
+    for part in value.split(","):
+        route, _, weight = part.partition("=")
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f"Unknown route {route!r}, expected one of: {', '.join(ROUTES)}")
+        mix[route] = float(weight or 1)
+    return mix
+
+
+def parse_route_slo(value):
+    """Parse "login=800,1000,1500" into (route, {p50, p95, p99})"""
+    route, _, limits = value.partition("=")
+    p50, p95, p99 = (float(limit) for limit in limits.split(","))
+    return route, {"p50": p50, "p95": p95, "p99": p99}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+# Local server
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(port, in_memory, workers):
+    """Child process: run the backend on 127.0.0.1:port"""
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+    import uvicorn
+
+    if in_memory:
+        import motor.motor_asyncio
+        from mongomock_motor import AsyncMongoMockClient
+
+        # Every Mongo call goes to one in-process mock database
+        mock_client = AsyncMongoMockClient()
+        motor.motor_asyncio.AsyncIOMotorClient = lambda *args, **kwargs: mock_client
+        import server
+        uvicorn.run(server.app, host="127.0.0.1", port=port, log_level="warning")
+    else:
+        uvicorn.run("server:app", host="127.0.0.1", port=port, log_level="warning", workers=workers)
+
+
+def start_server(args):
+    port = free_port()
+    env = dict(os.environ)
+    # Measure the application, not the rate limiter
+    env.setdefault("RATE_LIMIT_ENABLED", "0")
+    env.setdefault("EVIDENCE_STORE_DIR", tempfile.mkdtemp(prefix="checkvero-load-"))
+    command = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port), "--workers", str(args.workers)]
+    if args.in_memory:
+        command.append("--in-memory")
+    process = subprocess.Popen(command, env=env)
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_until_ready(client, base_url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if (await client.get(f"{base_url}/api/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError("Server did not become ready in time")
+
+
+# Traffic
+class LoadState:
+    """Users and numbers created during setup, shared by all clients"""
+
+    def __init__(self):
+        self.citizens = []  # (username, password, token)
+        self.registered_numbers = []
+
+
+async def setup(client, base_url, users, numbers):
+    """Create the citizens and registered numbers the traffic mix uses"""
+    state = LoadState()
+    run_id = uuid.uuid4().hex[:8]
+    password = "loadtest-password"
+
+    response = await client.post(f"{base_url}/api/register", json={
+        "username": f"load_biz_{run_id}", "email": f"load_biz_{run_id}@example.com",
+        "password": password, "role": "business", "company_name": "Load Test BV"
+    })
+    response.raise_for_status()
+    business_token = response.json()["access_token"]
+
+    for index in range(numbers):
+        phone_number = f"+3120{run_id[:3].translate(str.maketrans('abcdef', '123456'))}{index:04d}"
+        response = await client.post(
+            f"{base_url}/api/phone-numbers/register",
+            json={"phone_number": phone_number, "company_name": "Load Test BV"},
+            headers={"Authorization": f"Bearer {business_token}"}
+        )
+        if response.status_code == 200:
+            state.registered_numbers.append(phone_number)
+
+    for index in range(users):
+        username = f"load_user_{run_id}_{index}"
+        response = await client.post(f"{base_url}/api/register", json={
+            "username": username, "email": f"{username}@example.com",
+            "password": password, "role": "citizen"
+        })
+        response.raise_for_status()
+        state.citizens.append((username, password, response.json()["access_token"]))
+
+    log(f"Setup: {len(state.citizens)} citizens, {len(state.registered_numbers)} registered numbers")
+    return state
+
+
+async def do_verify(client, base_url, state):
+    if state.registered_numbers and random.random() < 0.8:
+        phone_number = random.choice(state.registered_numbers)
+    else:
+        phone_number = f"+3160{random.randint(0, 9999999):07d}"
+    return await client.post(f"{base_url}/api/verify-phone", json={"phone_number": phone_number})
+
+
+async def do_login(client, base_url, state):
+    username, password, _ = random.choice(state.citizens)
+    return await client.post(f"{base_url}/api/login", json={"username": username, "password": password})
+
+
+async def do_report(client, base_url, state):
+    _, _, token = random.choice(state.citizens)
+    return await client.post(
+        f"{base_url}/api/reports/submit",
+        json={
+            "report_type": "call",
+            "phone_number": f"+3160{random.randint(0, 9999999):07d}",
+            "description": random.choice(REPORT_DESCRIPTIONS)
+        },
+        headers={"Authorization": f"Bearer {token}"}
+    )
+
+
+ROUTES = {
+    "verify": do_verify,
+    "login": do_login,
+    "report": do_report,
+}
+
+
+async def run_client(client, base_url, state, mix, deadline, measure_from, samples):
+    routes, weights = zip(*mix.items())
+    while time.monotonic() < deadline:
+        route = random.choices(routes, weights)[0]
+        started = time.monotonic()
+        try:
+            response = await ROUTES[route](client, base_url, state)
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        finished = time.monotonic()
+        if started >= measure_from:
+            samples.append((route, (finished - started) * 1000, ok))
+
+
+async def run_load(args):
+    import httpx
+
+    process = None
+    base_url = args.url
+    if not base_url:
+        process, base_url = start_server(args)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+            await wait_until_ready(client, base_url, process)
+            state = await setup(client, base_url, args.users, args.numbers)
+
+            log(f"Running {args.concurrency} clients for {args.duration}s "
+                f"(+{args.warmup}s warm-up) with mix {args.mix}")
+            samples = []
+            measure_from = time.monotonic() + args.warmup
+            deadline = measure_from + args.duration
+            await asyncio.gather(*(
+                run_client(client, base_url, state, args.mix, deadline, measure_from, samples)
+                for _ in range(args.concurrency)
+            ))
+            return summarize(samples, args.duration)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+
+# Reporting
+def summarize(samples, duration):
+    results = {}
+    for route in sorted({route for route, _, _ in samples}):
+        latencies = sorted(latency for name, latency, _ in samples if name == route)
+        errors = sum(1 for name, _, ok in samples if name == route and not ok)
+        results[route] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "error_rate": round(errors / len(latencies), 4),
+            "rps": round(len(latencies) / duration, 1),
+            "p50": round(percentile(latencies, 0.50), 1),
+            "p95": round(percentile(latencies, 0.95), 1),
+            "p99": round(percentile(latencies, 0.99), 1),
+            "max": round(latencies[-1], 1),
+        }
+    return {
+        "duration": duration,
+        "total_requests": len(samples),
+        "throughput_rps": round(len(samples) / duration, 1),
+        "routes": results,
+    }
+
+
+def print_report(summary):
+    print()
+    print(f"{'route':<10}{'requests':>10}{'errors':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    print("-" * 73)
+    for route, stats in summary["routes"].items():
+        print(f"{route:<10}{stats['requests']:>10}{stats['errors']:>8}{stats['rps']:>9}"
+              f"{stats['p50']:>9}{stats['p95']:>9}{stats['p99']:>9}{stats['max']:>9}")
+    print("-" * 73)
+    print(f"Total: {summary['total_requests']} requests, {summary['throughput_rps']} req/s")
+    print()
+
+
+def check_thresholds(summary, slo, route_slos, max_error_rate, baseline=None, tolerance=0.2):
+    """Return a list of human-readable failures (empty when everything passes)"""
+    failures = []
+    for route, stats in summary["routes"].items():
+        limits = route_slos.get(route, slo)
+        for name, limit in limits.items():
+            if stats[name] > limit:
+                failures.append(f"{route} {name} {stats[name]} ms exceeds SLO {limit} ms")
+        if stats["error_rate"] > max_error_rate:
+            failures.append(f"{route} error rate {stats['error_rate']:.2%} exceeds {max_error_rate:.2%}")
+
+        previous = (baseline or {}).get("routes", {}).get(route)
+        if previous:
+            for name in ("p50", "p95", "p99"):
+                allowed = previous[name] * (1 + tolerance)
+                if stats[name] > allowed:
+                    failures.append(f"{route} {name} regressed: {stats[name]} ms vs baseline {previous[name]} ms")
+            if stats["rps"] < previous["rps"] * (1 - tolerance):
+                failures.append(f"{route} throughput regressed: {stats['rps']} vs baseline {previous['rps']} req/s")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check Vero concurrent load test and SLO check")
+    parser.add_argument("--url", help="test an already running server instead of starting one")
+    parser.add_argument("--in-memory", action="store_true", help="start the server on an in-memory Mongo stand-in")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local server (real Mongo only)")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3, help="unmeasured seconds before measuring")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("verify=80,login=10,report=10"),
+                        help="weighted route mix, e.g. verify=80,login=10,report=10")
+    parser.add_argument("--users", type=int, default=20, help="citizens created for login/report traffic")
+    parser.add_argument("--numbers", type=int, default=50, help="registered numbers for verify traffic")
+    parser.add_argument("--p50", type=float, default=DEFAULT_SLO["p50"], help="p50 SLO in ms")
+    parser.add_argument("--p95", type=float, default=DEFAULT_SLO["p95"], help="p95 SLO in ms")
+    parser.add_argument("--p99", type=float, default=DEFAULT_SLO["p99"], help="p99 SLO in ms")
+    parser.add_argument("--route-slo", type=parse_route_slo, action="append", default=[],
+                        help="per-route SLO override in ms, e.g. login=800,1000,1500")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="allowed error rate per route")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression vs baseline (0.2 = 20%%)")
+    parser.add_argument("--save", help="write this run's results to a JSON file")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port, args.in_memory, args.workers)
+        return 0
+
+    summary = asyncio.run(run_load(args))
+    print_report(summary)
+
+    if args.save:
+        with open(args.save, "w") as results_file:
+            json.dump(summary, results_file, indent=2)
+        log(f"Results saved to {args.save}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    failures = check_thresholds(
+        summary,
+        {"p50": args.p50, "p95": args.p95, "p99": args.p99},
+        dict(args.route_slo),
+        args.max_error_rate,
+        baseline,
+        args.tolerance
+    )
+    for failure in failures:
+        log(f"❌ {failure}")
+    if failures:
+        return 1
+    log("✅ All routes within SLO")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""Make the apps' modules importable the way they import each other.
+
+backend/ modules run with backend/ as the working directory and import their
+siblings as top-level modules; the Vercel API does the same from api/.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (
+    os.path.join(ROOT, "backend"),
+    os.path.join(ROOT, "vercel-backend"),
+    os.path.join(ROOT, "vercel-backend", "api"),
+):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture(scope="session")
+def api(tmp_path_factory):
+    """TestClient for backend/server.py on an in-memory Mongo (mongomock-motor)"""
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+    os.environ.setdefault("EVIDENCE_STORE_DIR", str(tmp_path_factory.mktemp("evidence")))
+    with pytest.MonkeyPatch.context() as patch:
+        import motor.motor_asyncio
+        from mongomock_motor import AsyncMongoMockClient
+        patch.setattr(motor.motor_asyncio, "AsyncIOMotorClient", lambda *args, **kwargs: AsyncMongoMockClient())
+
+        import server
+        from fastapi.testclient import TestClient
+        with TestClient(server.app) as client:
+            yield client
+
+
+@pytest.fixture(scope="session")
+def admin_headers(api):
+    response = api.post("/api/register", json={
+        "username": "test_admin", "email": "admin@example.com", "password": "password1", "role": "admin"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,63 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+from blob_store import BlobStore, BlobTooLarge, EmptyBlob, UnsupportedBlobType
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+
+def save(store, *chunks):
+    async def stream():
+        for chunk in chunks:
+            yield chunk
+    return asyncio.run(store.save_stream(stream()))
+
+
+def leftover_temp_files(store):
+    return os.listdir(os.path.join(store.root, "tmp"))
+
+
+def test_identical_uploads_share_one_file(tmp_path):
+    store = BlobStore(str(tmp_path), max_bytes=1000)
+    # The format is sniffed across chunk boundaries
+    digest, size, content_type, duplicate = save(store, PNG[:5], PNG[5:])
+    assert (digest, size, content_type, duplicate) == (hashlib.sha256(PNG).hexdigest(), len(PNG), "image/png", False)
+    assert save(store, PNG)[3] is True
+    assert store.exists(digest)
+    with open(store.path_for(digest), "rb") as stored:
+        assert stored.read() == PNG
+    assert leftover_temp_files(store) == []
+
+
+@pytest.mark.parametrize("chunks, error", [
+    ([PNG, b"\x00" * 1000], BlobTooLarge),
+    ([b"%PDF-1.7 not evidence"], UnsupportedBlobType),
+    ([b"GIF"], UnsupportedBlobType),
+    ([], EmptyBlob),
+    ([b""], EmptyBlob),
+])
+def test_rejected_uploads_leave_nothing_behind(tmp_path, chunks, error):
+    store = BlobStore(str(tmp_path), max_bytes=1000)
+    with pytest.raises(error):
+        save(store, *chunks)
+    assert leftover_temp_files(store) == []
+
+
+def test_exists_rejects_non_digests(tmp_path):
+    assert not BlobStore(str(tmp_path), max_bytes=1000).exists("../../etc/passwd")
+
+
+def test_evidence_endpoint_status_codes(api):
+    response = api.post("/api/register", json={
+        "username": "evidence_citizen", "email": "evidence@example.com", "password": "password1", "role": "citizen"
+    })
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    assert api.post("/api/reports/evidence", content=b"", headers=headers).status_code == 400
+    assert api.post("/api/reports/evidence", content=b"plain text", headers=headers).status_code == 415
+    response = api.post("/api/reports/evidence", content=PNG, headers=headers)
+    assert response.status_code == 200
+    assert response.json()["content_type"] == "image/png"
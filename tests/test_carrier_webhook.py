@@ -0,0 +1,101 @@
+import asyncio
+import base64
+import time
+
+import pytest
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+from carrier_webhook import SIGNATURE_PREFIX, NonceCache, WebhookError, WebhookVerifier, signed_message
+
+E164 = "+31201234567"
+
+
+@pytest.fixture
+def private_key():
+    return Ed25519PrivateKey.generate()
+
+
+@pytest.fixture
+def verifier(private_key):
+    public_key = base64.b64encode(private_key.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)).decode()
+    loads = []
+
+    async def load_key(key_id):
+        loads.append(key_id)
+        return public_key if key_id == "carrier-1" else None
+
+    verifier = WebhookVerifier(load_key, max_skew=300)
+    verifier.loads = loads
+    yield verifier
+    verifier.shutdown()
+
+
+def sign(private_key, ts, nonce, e164=E164):
+    return SIGNATURE_PREFIX + base64.b64encode(private_key.sign(signed_message(ts, nonce, e164))).decode()
+
+
+def verify(verifier, key_id="carrier-1", e164=E164, ts=None, nonce="n1", sig=None):
+    return asyncio.run(verifier.verify(key_id, e164, ts, nonce, sig))
+
+
+def rejection(call):
+    with pytest.raises(WebhookError) as raised:
+        call()
+    return raised.value.status_code, raised.value.detail
+
+
+def test_valid_call_is_accepted_once(verifier, private_key):
+    ts = int(time.time())
+    sig = sign(private_key, ts, "n1")
+    verify(verifier, ts=ts, sig=sig)
+    assert rejection(lambda: verify(verifier, ts=ts, sig=sig)) == (409, "Nonce already used")
+    # The key was loaded once and then served from the cache
+    assert verifier.loads == ["carrier-1"]
+
+
+def test_signature_must_cover_the_number(verifier, private_key):
+    ts = int(time.time())
+    sig = sign(private_key, ts, "n1", e164="+31209999999")
+    assert rejection(lambda: verify(verifier, ts=ts, sig=sig)) == (401, "Invalid signature")
+
+
+def test_forged_signature_does_not_burn_the_nonce(verifier, private_key):
+    ts = int(time.time())
+    forged = sign(Ed25519PrivateKey.generate(), ts, "n1")
+    assert rejection(lambda: verify(verifier, ts=ts, sig=forged))[0] == 401
+    verify(verifier, ts=ts, sig=sign(private_key, ts, "n1"))
+
+
+def test_stale_timestamp(verifier, private_key):
+    ts = int(time.time()) - 301
+    assert rejection(lambda: verify(verifier, ts=ts, sig=sign(private_key, ts, "n1")))[0] == 401
+
+
+def test_unknown_key(verifier, private_key):
+    ts = int(time.time())
+    assert rejection(lambda: verify(verifier, key_id="other", ts=ts, sig=sign(private_key, ts, "n1"))) == (
+        401, "Unknown or revoked key_id"
+    )
+
+
+@pytest.mark.parametrize("sig", ["hmac:abc", SIGNATURE_PREFIX + "not base64!"])
+def test_malformed_signature(verifier, sig):
+    assert rejection(lambda: verify(verifier, ts=int(time.time()), sig=sig))[0] == 400
+
+
+def test_nonce_cache_expires_and_refuses_when_full(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("carrier_webhook.time.monotonic", lambda: clock[0])
+    cache = NonceCache(max_entries=2, max_skew=10)
+    assert cache.add("k", "a")
+    assert not cache.add("k", "a")
+    # Nonces are scoped per key_id
+    assert cache.add("other", "a")
+    with pytest.raises(WebhookError) as raised:
+        cache.add("k", "c")
+    assert raised.value.status_code == 503
+    # After 2 * max_skew the oldest nonces can no longer pass the skew check
+    clock[0] += 20
+    assert cache.add("k", "a")
+    assert len(cache) == 1
@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import db_schema
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    async def first_migration(db):
+        calls.append("first")
+        await asyncio.sleep(0.01)
+
+    async def second_migration(db):
+        calls.append("second")
+
+    monkeypatch.setattr(db_schema, "MIGRATIONS", [first_migration, second_migration])
+    return calls
+
+
+def test_migrations_are_applied_once(calls):
+    async def scenario():
+        db = AsyncMongoMockClient().checkvero
+        await db_schema.run_migrations(db)
+        await db_schema.run_migrations(db)
+        return await db_schema.applied_migrations(db)
+
+    assert run(scenario()) == {"first_migration", "second_migration"}
+    assert calls == ["first", "second"]
+
+
+def test_concurrent_workers_wait_for_the_lock(calls):
+    async def scenario():
+        db = AsyncMongoMockClient().checkvero
+        await asyncio.gather(*(db_schema.run_migrations(db, poll_interval=0.005) for _ in range(3)))
+        return await db.schema_migrations.find_one({"_id": db_schema.MIGRATION_LOCK_ID})
+
+    assert run(scenario()) is None
+    assert calls == ["first", "second"]
+
+
+def test_lock_is_exclusive_until_it_expires():
+    async def scenario():
+        db = AsyncMongoMockClient().checkvero
+        assert await db_schema.acquire_migration_lock(db, "a")
+        assert not await db_schema.acquire_migration_lock(db, "b")
+        # "a" died without releasing it
+        await db.schema_migrations.update_one(
+            {"_id": db_schema.MIGRATION_LOCK_ID}, {"$set": {"expires_at": datetime(2000, 1, 1)}}
+        )
+        return await db_schema.acquire_migration_lock(db, "b")
+
+    assert run(scenario())
+
+
+def test_failed_migration_is_retried_and_releases_the_lock(monkeypatch):
+    attempts = []
+
+    async def flaky_migration(db):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(db_schema, "MIGRATIONS", [flaky_migration])
+
+    async def scenario():
+        db = AsyncMongoMockClient().checkvero
+        with pytest.raises(RuntimeError):
+            await db_schema.run_migrations(db)
+        assert await db_schema.applied_migrations(db) == set()
+        await db_schema.run_migrations(db)
+        return await db_schema.applied_migrations(db)
+
+    assert run(scenario()) == {"flaky_migration"}
+    assert len(attempts) == 2
@@ -0,0 +1,131 @@
+import os
+from datetime import datetime
+
+import pytest
+
+from _journal import journal_generations, journal_path, read_journal, read_snapshot
+from _storage import JournaledMemoryStorage
+
+NOW = datetime(2025, 9, 1)
+
+
+def phone(number):
+    return {"phone_id": number, "phone_number": number, "company_name": "Acme", "is_active": True,
+            "verification_count": 0, "created_at": NOW}
+
+
+def user(name):
+    return {"username": name, "email": f"{name}@example.com", "user_id": name, "points": 0}
+
+
+def report(report_id, user_id, risk_level):
+    return {"report_id": report_id, "user_id": user_id, "ai_analysis": {"risk_level": risk_level}}
+
+
+def crash(storage):
+    """Stop the flusher and flush what is buffered, as the last group commit before a crash"""
+    storage.journal._stop.set()
+    storage.journal._thread.join()
+    storage.journal.flush()
+    storage.journal._file.close()
+
+
+def populate(storage):
+    storage.create_user(user("alice"))
+    storage.add_points("alice", 30)
+    storage.create_phones([phone("+31201234567"), phone("+31207654321")])
+    storage.verify("+31201234567", NOW)
+    storage.verify("+31200000000", NOW)
+    storage.create_report(report("r1", "alice", "HIGH"))
+
+
+def assert_populated(storage):
+    assert storage.get_user("alice")["points"] == 30
+    assert storage.get_phone("+31201234567")["verification_count"] == 1
+    assert storage.get_phone("+31207654321")["verification_count"] == 0
+    assert storage.user_report_stats("alice") == {"total_reports": 1, "high_risk_reports": 1}
+    assert storage.counts() == {"users": 1, "phone_numbers": 2, "reports": 1, "verifications": 2}
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / "journal")
+
+
+def test_journal_replays_after_a_crash(directory):
+    storage = JournaledMemoryStorage(directory, flush_interval=60)
+    populate(storage)
+    crash(storage)
+
+    recovered = JournaledMemoryStorage(directory, flush_interval=60)
+    assert_populated(recovered)
+    # Recovery appends to a fresh generation
+    assert recovered.journal.generation == 2
+    recovered.close()
+
+
+def test_replay_stops_at_a_torn_record(directory):
+    storage = JournaledMemoryStorage(directory, flush_interval=60)
+    storage.create_user(user("alice"))
+    storage.create_user(user("bob"))
+    crash(storage)
+    path = journal_path(directory, 1)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 3)
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 5)
+
+    assert [op for op, _ in read_journal(directory, 1)] == ["create_user"]
+    recovered = JournaledMemoryStorage(directory, flush_interval=60)
+    assert recovered.get_user("alice") is not None
+    assert recovered.get_user("bob") is None
+    recovered.close()
+
+
+def test_snapshot_plus_later_journal(directory):
+    storage = JournaledMemoryStorage(directory, flush_interval=60)
+    populate(storage)
+    storage.compact()
+    # Journals covered by the snapshot are gone
+    assert journal_generations(directory) == [2]
+    storage.verify("+31207654321", NOW)
+    storage.create_phones([phone("+31209999999")])
+    crash(storage)
+
+    generation, _, records = read_snapshot(directory)
+    assert generation == 1 and len(records) == 2
+    recovered = JournaledMemoryStorage(directory, flush_interval=60)
+    assert recovered.get_user("alice")["points"] == 30
+    assert recovered.get_phone("+31207654321")["verification_count"] == 1
+    assert recovered.get_phone("+31209999999") is not None
+    assert recovered.counts()["phone_numbers"] == 3
+    recovered.close()
+
+
+def test_close_compacts_so_recovery_replays_nothing(directory, capsys):
+    storage = JournaledMemoryStorage(directory, flush_interval=60)
+    populate(storage)
+    storage.close()
+    assert journal_generations(directory) == [2]
+    assert os.path.getsize(journal_path(directory, 2)) == 0
+
+    recovered = JournaledMemoryStorage(directory, flush_interval=60)
+    assert "(0 journal records)" in capsys.readouterr().out
+    assert_populated(recovered)
+    # Empty journals left by clean shutdowns are removed rather than piling up
+    assert journal_generations(directory) == [3]
+    recovered.close()
+
+
+def test_compaction_triggers_on_journal_size(directory):
+    storage = JournaledMemoryStorage(directory, flush_interval=60, compact_bytes=1)
+    populate(storage)
+    storage.journal.flush()
+    storage._maybe_compact()
+    assert read_snapshot(directory)[0] == 1
+    assert storage.journal.pending_bytes == 0
+    crash(storage)
+
+    recovered = JournaledMemoryStorage(directory, flush_interval=60)
+    assert_populated(recovered)
+    recovered.close()
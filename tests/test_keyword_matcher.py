@@ -0,0 +1,38 @@
+import random
+
+from keyword_matcher import KeywordMatcher
+from risk_scoring import ANALYSIS_KEYWORDS
+
+
+def naive_match(groups, text):
+    return {name: [keyword for keyword in keywords if keyword in text] for name, keywords in groups.items()}
+
+
+def test_overlapping_and_shared_keywords():
+    groups = {"a": ["he", "she", "his", "hers"], "b": ["hers", "s"], "c": ["x"]}
+    matcher = KeywordMatcher(groups)
+    # "she" and "he" end on the same character; "hers" belongs to two groups
+    assert matcher.match("ushers") == {"a": ["he", "she", "hers"], "b": ["hers", "s"], "c": []}
+    assert matcher.match("") == {"a": [], "b": [], "c": []}
+
+
+def test_matches_substring_checks_on_random_text():
+    rng = random.Random(6)
+    alphabet = "abcab "
+    groups = {
+        name: ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(8)]
+        for name in ("one", "two", "three")
+    }
+    matcher = KeywordMatcher(groups)
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        assert matcher.match(text) == naive_match(groups, text)
+
+
+def test_analysis_keywords_match_substring_checks():
+    rng = random.Random(7)
+    vocabulary = [keyword for keywords in ANALYSIS_KEYWORDS.groups.values() for keyword in keywords]
+    vocabulary += ["the", "bank", "called", "me", "about", "clicking", "now!", "a", "s"]
+    for _ in range(2000):
+        text = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(0, 20)))
+        assert ANALYSIS_KEYWORDS.match(text) == naive_match(ANALYSIS_KEYWORDS.groups, text)
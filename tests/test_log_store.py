@@ -0,0 +1,22 @@
+import pytest
+
+from _log_store import LogResult, VerificationLogStore
+
+
+@pytest.mark.parametrize("capacity", [0, -1])
+def test_capacity_must_be_positive(capacity):
+    with pytest.raises(ValueError):
+        VerificationLogStore(capacity)
+
+
+def test_oldest_attempts_are_overwritten():
+    log = VerificationLogStore(capacity=2)
+    log.append("+31201234567", LogResult.VERIFIED, timestamp=1)
+    log.append("+31207654321", LogResult.NOT_VERIFIED, timestamp=2)
+    log.append("+31200000000", LogResult.VERIFIED, timestamp=3)
+
+    assert [entry["phone_number"] for entry in log.recent()] == ["+31200000000", "+31207654321"]
+    # Totals still count the overwritten attempt, but its number is no longer interned
+    assert log.stats() == {
+        "capacity": 2, "stored": 2, "distinct_numbers": 2, "total": 3, "verified": 2, "not_verified": 1
+    }
@@ -0,0 +1,32 @@
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from metrics import Gauge, Histogram, MetricsMiddleware
+from rate_limit import RateLimitMiddleware, RatePolicy, ShardedMemoryStore
+
+
+def test_routes_are_labelled_even_when_rejected_before_routing():
+    request_duration = Histogram("http_request_duration_seconds", "Request latency", ("method", "route", "status"))
+    app = Starlette(routes=[Route("/api/items/{item_id}", lambda request: PlainTextResponse("ok"))])
+    app.add_middleware(
+        RateLimitMiddleware, store=ShardedMemoryStore(), default_policy=RatePolicy("default", rate=0.01, burst=1)
+    )
+    app.add_middleware(
+        MetricsMiddleware, requests_in_flight=Gauge("in_flight", "In flight"), request_duration=request_duration
+    )
+    client = TestClient(app)
+
+    assert client.get("/api/items/1").status_code == 200
+    assert client.get("/api/items/2").status_code == 429
+    assert client.post("/api/items/3").status_code == 429
+    assert client.get("/wp-login.php").status_code == 429
+
+    counts = {labels: value for name, labels, value in request_duration.samples() if name.endswith("_count")}
+    assert counts == {
+        '{method="GET",route="/api/items/{item_id}",status="200"}': 1,
+        '{method="GET",route="/api/items/{item_id}",status="429"}': 1,
+        '{method="POST",route="/api/items/{item_id}",status="429"}': 1,
+        '{method="GET",route="unmatched",status="429"}': 1,
+    }
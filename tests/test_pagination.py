@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from pagination import PaginationError, build_projection, encode_cursor, fetch_page, parse_cursor
+
+FIELDS = {"phone_id", "phone_number", "created_at"}
+
+
+def test_cursor_round_trip():
+    document = {"created_at": datetime(2025, 9, 1, 12, 30, 0, 123000), "phone_id": "a,b"}
+    assert parse_cursor(encode_cursor(document, "phone_id")) == (document["created_at"], "a,b")
+
+
+@pytest.mark.parametrize("after", ["", "no-comma", "yesterday,abc"])
+def test_malformed_cursor(after):
+    with pytest.raises(PaginationError):
+        parse_cursor(after)
+
+
+def test_default_projection_only_exposes_allowed_fields():
+    assert build_projection(None, FIELDS, "phone_id") == {
+        "_id": 0, "created_at": 1, "phone_id": 1, "phone_number": 1
+    }
+
+
+def test_requested_fields_keep_the_sort_keys():
+    assert build_projection("phone_number", FIELDS, "phone_id") == {
+        "_id": 0, "created_at": 1, "phone_id": 1, "phone_number": 1
+    }
+    with pytest.raises(PaginationError):
+        build_projection("phone_key", FIELDS, "phone_id")
+
+
+@pytest.mark.parametrize("fields", ["ai_analysis,ai_analysis.risk_level", "ai_analysis.risk_level, ai_analysis"])
+def test_overlapping_fields_collapse_to_the_parent(fields):
+    allowed = {"report_id", "created_at", "ai_analysis"}
+    projection = build_projection(fields, allowed, "report_id")
+    assert projection == {"_id": 0, "ai_analysis": 1, "created_at": 1, "report_id": 1}
+
+    async def query():
+        collection = AsyncMongoMockClient().checkvero.reports
+        await collection.insert_one({"report_id": "r1", "created_at": datetime(2025, 9, 1),
+                                     "ai_analysis": {"risk_level": "HIGH", "risk_score": 90}})
+        return await collection.find_one({}, projection)
+    assert asyncio.run(query())["ai_analysis"] == {"risk_level": "HIGH", "risk_score": 90}
+    # Sibling subfields are kept apart
+    assert build_projection("ai_analysis.risk_level,ai_analysis.risk_score", allowed, "report_id") == {
+        "_id": 0, "ai_analysis.risk_level": 1, "ai_analysis.risk_score": 1, "created_at": 1, "report_id": 1
+    }
+
+
+def test_pages_cover_every_document_once_across_timestamp_ties():
+    async def scenario():
+        collection = AsyncMongoMockClient().checkvero.phone_numbers
+        created = datetime(2025, 9, 1)
+        # Pairs of documents share a created_at, so the id breaks the tie
+        await collection.insert_many([
+            {"phone_id": f"p{i:02d}", "phone_key": "secret", "created_at": created + timedelta(seconds=i // 2)}
+            for i in range(11)
+        ])
+        pages = []
+        after = None
+        while True:
+            documents, after = await fetch_page(
+                collection, {}, "phone_id", after, limit=3, projection=build_projection(None, FIELDS, "phone_id")
+            )
+            pages.append(documents)
+            if after is None:
+                return pages
+
+    pages = asyncio.run(scenario())
+    ids = [document["phone_id"] for page in pages for document in page]
+    assert ids == [f"p{i:02d}" for i in reversed(range(11))]
+    assert [len(page) for page in pages] == [3, 3, 3, 2]
+    assert all(set(document) <= FIELDS for page in pages for document in page)
+
+
+def test_limit_bounds():
+    with pytest.raises(PaginationError):
+        asyncio.run(fetch_page(AsyncMongoMockClient().checkvero.reports, {}, "report_id", limit=0))
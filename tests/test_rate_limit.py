@@ -0,0 +1,98 @@
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from rate_limit import RateLimitMiddleware, RatePolicy, ShardedMemoryStore, client_identity
+
+
+def test_bucket_allows_burst_then_refills():
+    store = ShardedMemoryStore(shards=2)
+    results = [store.take_now("ip:1", rate=1, burst=3, now=100.0)[0] for _ in range(4)]
+    assert results == [True, True, True, False]
+    # Half a second refills half a token: still short
+    assert store.take_now("ip:1", rate=1, burst=3, now=100.5) == (False, 0.5)
+    assert store.take_now("ip:1", rate=1, burst=3, now=101.0)[0]
+    # Other clients have their own bucket
+    assert store.take_now("ip:2", rate=1, burst=3, now=101.0) == (True, 2)
+
+
+def test_refill_is_capped_at_burst():
+    store = ShardedMemoryStore()
+    store.take_now("ip:1", rate=10, burst=2, now=0.0)
+    assert store.take_now("ip:1", rate=10, burst=2, now=1000.0) == (True, 1)
+
+
+def test_evicted_bucket_starts_full():
+    store = ShardedMemoryStore(shards=1, max_keys_per_shard=1)
+    store.take_now("ip:1", rate=1, burst=1, now=0.0)
+    store.take_now("ip:2", rate=1, burst=1, now=0.0)
+    assert store.take_now("ip:1", rate=1, burst=1, now=0.0)[0]
+
+
+def make_client():
+    app = Starlette(routes=[
+        Route("/api/login", lambda request: PlainTextResponse("ok"), methods=["POST", "OPTIONS"]),
+        Route("/api/health", lambda request: PlainTextResponse("ok")),
+        Route("/api/other", lambda request: PlainTextResponse("ok")),
+    ])
+    app.add_middleware(
+        RateLimitMiddleware,
+        store=ShardedMemoryStore(),
+        policies={"/api/login": RatePolicy("auth", rate=0.01, burst=2), "/api/health": None},
+        default_policy=RatePolicy("default", rate=0.01, burst=5)
+    )
+    return TestClient(app)
+
+
+def test_middleware_rejects_with_retry_after():
+    client = make_client()
+    assert [client.post("/api/login").status_code for _ in range(3)] == [200, 200, 429]
+
+    response = client.post("/api/login")
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert response.headers["ratelimit-limit"] == "2"
+    assert response.json() == {"detail": "Rate limit exceeded, please retry later"}
+
+    # Separate policies keep separate buckets; exempt paths and preflights are never limited
+    assert client.get("/api/other").headers["ratelimit-remaining"] == "4"
+    assert all(client.get("/api/health").status_code == 200 for _ in range(10))
+    assert client.options("/api/login").status_code == 200
+
+
+def test_client_identity_uses_the_ip_address():
+    def request(headers):
+        return Request({
+            "type": "http", "method": "GET", "path": "/", "client": ("10.0.0.1", 1234),
+            "headers": [(name.encode(), value.encode()) for name, value in headers.items()]
+        })
+
+    assert client_identity(request({})) == "ip:10.0.0.1"
+    assert client_identity(request({"x-forwarded-for": "1.2.3.4"})) == "ip:10.0.0.1"
+    assert client_identity(request({"x-forwarded-for": "1.2.3.4, 10.0.0.1"}), trust_proxy=True) == "ip:1.2.3.4"
+    # An unvalidated API key must not buy a fresh bucket
+    assert client_identity(request({"x-api-key": "secret"})) == "ip:10.0.0.1"
+
+
+def test_bearer_token_is_decoded_once_per_request(api, monkeypatch):
+    import server
+
+    token = server.create_access_token({"sub": "limited", "user_id": "user-1", "role": "citizen"})
+    decodes = []
+    decode = server.jwt.decode
+    monkeypatch.setattr(server.jwt, "decode", lambda *args, **kwargs: decodes.append(1) or decode(*args, **kwargs))
+    misses, hits = server.token_cache.misses, server.token_cache.hits
+
+    request = Request({
+        "type": "http", "method": "GET", "path": "/api/users/profile", "client": ("10.0.0.1", 1234),
+        "headers": [(b"authorization", f"Bearer {token}".encode())]
+    })
+    assert server.rate_limit_identity(request) == "user:user-1"
+    user = server.get_current_user(request, HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+
+    assert user["user_id"] == "user-1"
+    assert len(decodes) == 1
+    assert (server.token_cache.misses - misses, server.token_cache.hits - hits) == (1, 0)
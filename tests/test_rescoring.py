@@ -0,0 +1,90 @@
+import asyncio
+import random
+from datetime import datetime
+
+import numpy as np
+from mongomock_motor import AsyncMongoMockClient
+
+import rescoring
+from rescoring import analyse_batch, rescore_reports, rescore_updates, score_batch
+from risk_scoring import FEATURES, RISK_BANDS, advanced_ai_analysis, risk_band, risk_score
+
+NOW = datetime(2025, 9, 1)
+
+WORDS = ["urgent", "prize", "click here", "verify", "free", "cash", "money", "account", "suspend",
+         "password", "asap", "hello", "meeting", "parcel", "bitcoin", "act now", "immediately"]
+PHONES = ["", "+18005551234", "+31201234567", "hidden", "12345", "private"]
+EMAILS = ["", "a@gmail.com", "b@mailinator.com", "c@paypal.com.secure-login.net", "d@example.org"]
+
+
+def random_reports(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {"_id": index, "description": " ".join(rng.choices(WORDS, k=rng.randint(0, 12))),
+         "phone_number": rng.choice(PHONES), "email_address": rng.choice(EMAILS)}
+        for index in range(count)
+    ]
+
+
+def test_score_batch_matches_the_scalar_tables():
+    rng = np.random.default_rng(3)
+    features = rng.integers(0, 4, size=(200, len(FEATURES)))
+    scores, bands, confidences = score_batch(features)
+    for row, score, band, confidence in zip(features.tolist(), scores.tolist(), bands.tolist(), confidences.tolist()):
+        assert score == risk_score(row)
+        assert (RISK_BANDS[band][1], confidence) == risk_band(score)[0::2]
+
+
+def test_analyse_batch_matches_advanced_ai_analysis():
+    reports = random_reports(300)
+    assert analyse_batch(reports) == [advanced_ai_analysis(report) for report in reports]
+    assert {analysis["risk_level"] for analysis in analyse_batch(reports)} == {"HIGH", "MEDIUM", "LOW"}
+
+
+def test_unchanged_reports_produce_no_writes():
+    reports = random_reports(50)
+    for report in reports:
+        report["ai_analysis"] = advanced_ai_analysis(report)
+    assert rescore_updates(reports, NOW) == ([], 0)
+
+
+def test_points_awarded_are_kept():
+    report = {"_id": 1, "description": "urgent prize click here bitcoin", "phone_number": "", "email_address": "",
+              "ai_analysis": {"risk_level": "LOW", "points_awarded": 10}}
+    (update,), level_changes = rescore_updates([report], NOW)
+    analysis = update._doc["$set"]["ai_analysis"]
+    assert analysis["risk_level"] == "HIGH" and level_changes == 1
+    assert analysis["points_awarded"] == 10
+
+
+def test_level_changes_rebuild_the_counters(monkeypatch):
+    rebuilds = []
+
+    async def rebuild(db, force=False):
+        rebuilds.append(force)
+    monkeypatch.setattr(rescoring, "rebuild_stats_counters", rebuild)
+
+    async def scenario():
+        db = AsyncMongoMockClient().checkvero
+        reports = random_reports(40)
+        for report in reports:
+            report.update(is_active=True, ai_analysis=advanced_ai_analysis(report))
+        # One stale level and one stale score within the same level
+        reports[0]["ai_analysis"] = dict(reports[0]["ai_analysis"], risk_level="STALE")
+        reports[1]["ai_analysis"] = dict(reports[1]["ai_analysis"], risk_score=-1)
+        await db.reports.insert_many(reports)
+
+        assert await rescore_reports(db, chunk_size=16, dry_run=True) == {
+            "scanned": 40, "changed": 2, "level_changes": 1
+        }
+        assert rebuilds == []
+        await rescore_reports(db, chunk_size=16)
+        assert rebuilds == [True]
+        stored = await db.reports.find_one({"_id": 0})
+        assert stored["ai_analysis"] == advanced_ai_analysis(stored) and stored["updated_at"]
+
+        # Same level, new score: written back without a rebuild
+        await db.reports.update_one({"_id": 1}, {"$set": {"ai_analysis.risk_score": -1}})
+        assert await rescore_reports(db) == {"scanned": 40, "changed": 1, "level_changes": 0}
+        assert rebuilds == [True]
+    asyncio.run(scenario())
@@ -0,0 +1,17 @@
+def test_analytics_summary_shows_a_report_submitted_within_its_ttl(api, admin_headers):
+    response = api.post("/api/register", json={
+        "username": "summary_citizen", "email": "summary@example.com", "password": "password1", "role": "citizen"
+    })
+    citizen = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    first = api.get("/api/analytics/summary", headers=admin_headers)
+    assert first.status_code == 200
+    assert api.get("/api/analytics/summary", headers={**admin_headers, "If-None-Match": first.headers["etag"]}).status_code == 304
+
+    response = api.post("/api/reports/submit", headers=citizen, json={
+        "report_type": "call", "phone_number": "+31612345678", "description": "urgent prize, act now"
+    })
+    assert response.status_code == 200
+
+    second = api.get("/api/analytics/summary", headers={**admin_headers, "If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert response.json()["report_id"] in [report["report_id"] for report in second.json()["recent_reports"]]
@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from mongomock_motor import AsyncMongoMockClient
+
+from rollups import bucket_updates, naive_utc, read_series, sum_series
+
+
+def test_naive_utc():
+    amsterdam = timezone(timedelta(hours=2))
+    assert naive_utc(datetime(2025, 1, 1, 2, 0, tzinfo=amsterdam)) == datetime(2025, 1, 1, 0, 0)
+    assert naive_utc(datetime(2025, 1, 1)) == datetime(2025, 1, 1)
+    assert naive_utc(None) is None
+
+
+def test_read_series_with_aware_range():
+    async def scenario():
+        db = AsyncMongoMockClient().checkvero
+        await db.rollups.bulk_write(bucket_updates([
+            (datetime(2025, 1, 1, 10, 15), {"reports": 2}),
+            (datetime(2025, 1, 1, 12, 40), {"registrations": 1}),
+        ]))
+        return await read_series(
+            db, "hour", datetime.fromisoformat("2025-01-01T00:00:00Z"), datetime.fromisoformat("2025-01-02T00:00:00Z")
+        )
+
+    series = asyncio.run(scenario())
+    assert len(series) == 24
+    assert sum_series(series) == {"reports": 2, "registrations": 1, "verification_attempts": 0, "verified": 0}
+
+
+def test_rollups_endpoint_accepts_z_suffixed_range(api, admin_headers):
+    api.post("/api/verify-phone", json={"phone_number": "+31612345678"})
+    now = datetime.utcnow()
+    since = (now - timedelta(hours=2)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    until = (now + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    response = api.get("/api/analytics/rollups", params={"start": since}, headers=admin_headers)
+    assert response.status_code == 200
+
+    # Sample registrations are counted at startup
+    response = api.get("/api/analytics/rollups", params={"start": since, "end": until}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["totals"]["registrations"] > 0
@@ -0,0 +1,6 @@
+from sync_shared import stale_copies
+
+
+def test_vercel_copies_match_backend():
+    # Run `python vercel-backend/sync_shared.py` and commit the result if this fails
+    assert stale_copies() == []
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+import mongomock
+import pytest
+
+import _storage
+from _storage import DuplicateError, MongoStorage
+
+
+def phone(number):
+    now = datetime(2025, 9, 1)
+    return {
+        "phone_id": number, "phone_number": number, "company_name": "Acme", "registered_by": "system",
+        "verified": True, "created_at": now, "updated_at": now, "is_active": True, "verification_count": 0
+    }
+
+
+@pytest.fixture
+def mongo_storage(monkeypatch):
+    monkeypatch.setattr("pymongo.MongoClient", mongomock.MongoClient)
+    storage = MongoStorage("mongodb://localhost:27017/")
+    yield storage
+    storage.close()
+
+
+def test_mongo_storage_refuses_the_backend_database():
+    with pytest.raises(ValueError):
+        MongoStorage("mongodb://localhost:27017/", db_name=_storage.BACKEND_DB_NAME)
+
+
+def test_mongo_storage_keeps_to_its_own_database(mongo_storage):
+    assert mongo_storage.db.name == "checkvero_vercel"
+    assert mongo_storage.create_phones([phone("+31201234567"), phone("+31207654321")]) == 2
+    with pytest.raises(DuplicateError):
+        mongo_storage.create_phone(phone("+31201234567"))
+
+    verified = mongo_storage.verify("+31201234567", datetime(2025, 9, 2))
+    assert verified["verification_count"] == 1
+    assert mongo_storage.verify("+31200000000", datetime(2025, 9, 2)) is None
+    assert sorted(log["result"] for log in mongo_storage.recent_logs()) == ["not_verified", "verified"]
+    # Nothing is written for the main backend's registry cache
+    assert "registry_meta" not in mongo_storage.db.list_collection_names()
@@ -0,0 +1,137 @@
+import asyncio
+from datetime import datetime
+
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from write_behind import VerificationWriteBehind
+
+
+class FakeCollection:
+    """Records writes; `failures` queues exceptions raised by the next calls"""
+
+    def __init__(self):
+        self.writes = []
+        self.documents = []
+        self.failures = []
+        self.gate = None
+
+    async def bulk_write(self, operations, ordered=True):
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.failures:
+            raise self.failures.pop(0)
+        self.writes.extend(operations)
+
+    async def insert_many(self, documents, ordered=True):
+        if self.failures:
+            raise self.failures.pop(0)
+        self.documents.extend(documents)
+
+
+class FakeDB:
+    def __init__(self):
+        self.phone_numbers = FakeCollection()
+        self.verification_logs = FakeCollection()
+        self.stats_counters = FakeCollection()
+        self.rollups = FakeCollection()
+
+
+def log_entry(n):
+    return {"log_id": str(n), "phone_number": "+31201234567", "result": "verified", "timestamp": datetime(2025, 9, 1)}
+
+
+def test_stop_during_flush_writes_everything():
+    async def scenario():
+        db = FakeDB()
+        db.phone_numbers.gate = asyncio.Event()
+        buffer = VerificationWriteBehind(db, flush_interval=0.01)
+        buffer.start()
+        buffer.increment("phone-1", "owner-1")
+        await buffer.enqueue_log(log_entry(1))
+        # Let the flusher swap the batch out and block inside bulk_write
+        await asyncio.sleep(0.05)
+        assert buffer.stats()["pending_counters"] == 0
+
+        stopping = asyncio.create_task(buffer.stop())
+        await asyncio.sleep(0.01)
+        db.phone_numbers.gate.set()
+        await stopping
+        return db, buffer
+
+    db, buffer = asyncio.run(scenario())
+    assert len(db.phone_numbers.writes) == 1
+    assert [entry["log_id"] for entry in db.verification_logs.documents] == ["1"]
+    assert buffer.stats()["flushed_counters"] == 1
+    assert buffer.stats()["flushed_logs"] == 1
+
+
+def test_stop_flushes_what_arrived_after_the_last_flush():
+    async def scenario():
+        db = FakeDB()
+        buffer = VerificationWriteBehind(db, flush_interval=60)
+        buffer.start()
+        buffer.increment("phone-1")
+        await buffer.enqueue_log(log_entry(1))
+        await buffer.stop()
+        return db
+
+    db = asyncio.run(scenario())
+    assert len(db.phone_numbers.writes) == 1
+    assert len(db.verification_logs.documents) == 1
+
+
+def test_failed_counter_write_is_retried():
+    async def scenario():
+        db = FakeDB()
+        db.phone_numbers.failures.append(AutoReconnect("down"))
+        buffer = VerificationWriteBehind(db)
+        buffer.increment("phone-1", count=2)
+        await buffer.flush()
+        assert buffer.stats()["pending_counters"] == 1
+        assert db.stats_counters.writes == []
+        buffer.increment("phone-1")
+        await buffer.flush()
+        return db, buffer
+
+    db, buffer = asyncio.run(scenario())
+    (update,) = db.phone_numbers.writes
+    assert update._doc["$inc"] == {"verification_count": 3}
+    assert buffer.stats()["failed_flushes"] == 1
+
+
+def test_failed_log_insert_is_requeued():
+    async def scenario():
+        db = FakeDB()
+        db.verification_logs.failures.append(AutoReconnect("down"))
+        buffer = VerificationWriteBehind(db)
+        await buffer.enqueue_log(log_entry(1))
+        await buffer.flush()
+        assert buffer.stats()["queued_logs"] == 1
+        assert db.rollups.writes == []
+        await buffer.flush()
+        return db, buffer
+
+    db, buffer = asyncio.run(scenario())
+    assert [entry["log_id"] for entry in db.verification_logs.documents] == ["1"]
+    assert buffer.stats()["queued_logs"] == 0
+    assert buffer.stats()["flushed_logs"] == 1
+    assert len(db.rollups.writes) == 3
+
+
+def test_partial_log_insert_retries_only_failed_entries():
+    async def scenario():
+        db = FakeDB()
+        db.verification_logs.failures.append(BulkWriteError({
+            "writeErrors": [{"index": 0, "code": 11000}, {"index": 2, "code": 121}],
+            "nInserted": 1
+        }))
+        buffer = VerificationWriteBehind(db)
+        for n in range(3):
+            await buffer.enqueue_log(log_entry(n))
+        await buffer.flush()
+        assert buffer.stats()["flushed_logs"] == 2
+        await buffer.flush()
+        return db
+
+    db = asyncio.run(scenario())
+    assert [entry["log_id"] for entry in db.verification_logs.documents] == ["2"]
@@ -0,0 +1,281 @@
+"""Append-only journal and binary snapshots for the in-memory store.
+
+Mutations are pickled into an in-process buffer as they happen; a flusher
+thread writes whatever has accumulated every `flush_interval` seconds with
+one write() and one fsync() (group commit), so request handlers never wait
+on the disk. A crash loses at most the last interval of writes.
+
+Journal files are numbered by generation (journal.00000001.log, ...). Each
+record is a (length, crc32) header followed by its pickle; replay stops at
+the first torn or corrupt record.
+
+A snapshot is written to a temporary file and renamed into place. After a
+fixed header naming the last journal generation it covers comes a pickle
+of the small state (users, reports, logs), then the phone registry as a
+record section: a sorted table of fixed-width keys, an offset table and
+the pickled records back to back. Recovery memory-maps the file and wraps
+the section in MappedRecords, which binary-searches the key table in place
+and unpickles a record only when it is first read, so start-up time does
+not grow with the size of the registry. Only the journal generations after
+the snapshot are replayed.
+"""
+import glob
+import mmap
+import os
+import pickle
+import struct
+import sys
+import threading
+import zlib
+from array import array
+
+SNAPSHOT_MAGIC = b"CVSNAP01"
+SNAPSHOT_HEADER = struct.Struct("<8sQQI")  # magic, generation, state length, state crc32
+RECORD_HEADER = struct.Struct("<II")  # payload length, crc32
+SECTION_HEADER = struct.Struct("<QI")  # record count, key width
+OFFSET_PAIR = struct.Struct("<QQ")  # start and end of one record
+
+
+def journal_path(directory, generation):
+    return os.path.join(directory, f"journal.{generation:08d}.log")
+
+
+def journal_generations(directory):
+    """Generations of the journal files in `directory`, oldest first"""
+    generations = []
+    for path in glob.glob(os.path.join(directory, "journal.*.log")):
+        try:
+            generations.append(int(os.path.basename(path).split(".")[1]))
+        except ValueError:
+            continue
+    return sorted(generations)
+
+
+def read_journal(directory, generation):
+    """Yield the records of one journal file up to the first torn or corrupt one"""
+    path = journal_path(directory, generation)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        offset = 0
+        while offset + RECORD_HEADER.size <= len(data):
+            length, crc = RECORD_HEADER.unpack_from(data, offset)
+            start = offset + RECORD_HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                print(f"⚠️ Warning: Journal {generation} ends in a torn record at byte {offset}, ignoring the rest")
+                return
+            yield pickle.loads(payload)
+            offset = start + length
+
+
+class MappedRecords:
+    """Mapping of string key -> record dict over a snapshot record section.
+
+    Records read or written since the snapshot live in an overlay dict, so
+    in-place changes to a returned record stick. Supports the dict subset
+    MemoryStorage uses: get, [], in, len.
+    """
+
+    def __init__(self, data=None, offset=0):
+        self._overlay = {}
+        self._added = 0
+        self._count = 0
+        self._width = 0
+        self._keys = self._offsets = self._records = b""
+        if data is None:
+            return
+        self._count, self._width = SECTION_HEADER.unpack_from(data, offset)
+        keys_at = offset + SECTION_HEADER.size
+        offsets_at = keys_at + self._count * self._width
+        records_at = offsets_at + (self._count + 1) * 8
+        view = memoryview(data)
+        self._keys = view[keys_at:offsets_at]
+        self._offsets = view[offsets_at:records_at]
+        self._records = view[records_at:]
+
+    def _key_at(self, index):
+        return bytes(self._keys[index * self._width:(index + 1) * self._width]).rstrip(b"\0")
+
+    def _find(self, key):
+        encoded = key.encode()
+        if len(encoded) > self._width:
+            return -1
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        return low if low < self._count and self._key_at(low) == encoded else -1
+
+    def _raw(self, index):
+        start, end = OFFSET_PAIR.unpack_from(self._offsets, index * 8)
+        return self._records[start:end]
+
+    def get(self, key, default=None):
+        record = self._overlay.get(key)
+        if record is None:
+            index = self._find(key)
+            if index < 0:
+                return default
+            record = self._overlay[key] = pickle.loads(self._raw(index))
+        return record
+
+    def __getitem__(self, key):
+        record = self.get(key)
+        if record is None:
+            raise KeyError(key)
+        return record
+
+    def __contains__(self, key):
+        return key in self._overlay or self._find(key) >= 0
+
+    def __setitem__(self, key, record):
+        if key not in self._overlay and self._find(key) < 0:
+            self._added += 1
+        self._overlay[key] = record
+
+    def __len__(self):
+        return self._count + self._added
+
+    def copy_overlay(self):
+        """Shallow-copy the changed records so the section can be written without holding a lock.
+
+        Record values are scalars, so a shallow copy is a consistent view.
+        """
+        return {key: dict(record) for key, record in self._overlay.items()}
+
+    def write_section(self, f, overlay):
+        """Write a merged record section: this mapping's records, replaced or extended by `overlay`"""
+        keys = bytes(self._keys)
+        base = [(keys[i * self._width:(i + 1) * self._width].rstrip(b"\0"), i) for i in range(self._count)]
+        changed = {
+            key.encode(): pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL) for key, record in overlay.items()
+        }
+        # Unchanged records are copied from the old snapshot without unpickling them
+        entries = sorted(
+            [(key, self._raw(i)) for key, i in base if key not in changed] + list(changed.items()),
+            key=lambda entry: entry[0]
+        )
+
+        width = max([len(key) for key, _ in entries] + [1])
+        f.write(SECTION_HEADER.pack(len(entries), width))
+        f.write(b"".join(key.ljust(width, b"\0") for key, _ in entries))
+        offsets = array("Q", [0])
+        for _, payload in entries:
+            offsets.append(offsets[-1] + len(payload))
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        f.write(offsets.tobytes())
+        for _, payload in entries:
+            f.write(payload)
+
+
+def write_snapshot(directory, generation, payload, records, overlay):
+    """Atomically replace the snapshot, covering journals up to `generation`.
+
+    `payload` is the pickled state; the record section merges `records`
+    (the current MappedRecords) with `overlay` from its copy_overlay().
+    """
+    path = os.path.join(directory, "snapshot.bin")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, generation, len(payload), zlib.crc32(payload)))
+        f.write(payload)
+        records.write_section(f, overlay)
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    os.replace(tmp_path, path)
+    return size
+
+
+def read_snapshot(directory):
+    """Return (generation, state, MappedRecords), or (0, None, empty MappedRecords) if there is none.
+
+    The file stays mapped for as long as the returned records are in use.
+    """
+    path = os.path.join(directory, "snapshot.bin")
+    if not os.path.exists(path):
+        return 0, None, MappedRecords()
+    with open(path, "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, generation, length, crc = SNAPSHOT_HEADER.unpack_from(data, 0)
+    payload = data[SNAPSHOT_HEADER.size:SNAPSHOT_HEADER.size + length]
+    if magic != SNAPSHOT_MAGIC or len(payload) != length or zlib.crc32(payload) != crc:
+        raise ValueError(f"Snapshot {path} is corrupt")
+    return generation, pickle.loads(payload), MappedRecords(data, SNAPSHOT_HEADER.size + length)
+
+
+class Journal:
+    def __init__(self, directory, generation, flush_interval=0.01, on_flush=None):
+        self.directory = directory
+        self.generation = generation
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        # Bytes in journal files not yet folded into a snapshot
+        self.pending_bytes = 0
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._file = open(journal_path(directory, generation), "ab")
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="journal-flusher", daemon=True)
+        self._thread.start()
+
+    def append(self, record):
+        """Queue one record; it is durable after the next group commit"""
+        payload = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        entry = RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._buffer_lock:
+            self._buffer.append(entry)
+
+    def flush(self):
+        """Write and fsync everything queued so far"""
+        with self._io_lock:
+            with self._buffer_lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return
+            data = b"".join(batch)
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.pending_bytes += len(data)
+
+    def rotate(self):
+        """Flush and start the next generation; return the generation just closed"""
+        with self._io_lock:
+            with self._buffer_lock:
+                batch, self._buffer = self._buffer, []
+            if batch:
+                self._file.write(b"".join(batch))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            closed = self.generation
+            self.generation += 1
+            self._file = open(journal_path(self.directory, self.generation), "ab")
+            self.pending_bytes = 0
+            return closed
+
+    def discard_through(self, generation):
+        """Delete journal files already covered by a snapshot"""
+        for old in journal_generations(self.directory):
+            if old <= generation:
+                os.unlink(journal_path(self.directory, old))
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                if self.on_flush is not None:
+                    self.on_flush()
+            except Exception as e:
+                print(f"⚠️ Warning: Journal flush failed: {e}")
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        self._file.close()
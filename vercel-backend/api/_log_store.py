@@ -0,0 +1,109 @@
+"""Fixed-capacity ring buffer of verification attempts.
+
+Each attempt costs a few bytes in parallel arrays: a 32-bit epoch second,
+a one-byte result code and a 32-bit id into a table of interned phone
+numbers. Numbers are reference counted by the slots that use them, so the
+table never holds more than `capacity` entries and memory stays flat no
+matter how long the instance lives. Running totals cover every attempt,
+including those already overwritten.
+"""
+import time
+from array import array
+from datetime import datetime
+from enum import IntEnum
+
+
+class LogResult(IntEnum):
+    NOT_VERIFIED = 0
+    VERIFIED = 1
+
+
+RESULT_NAMES = {LogResult.NOT_VERIFIED: "not_verified", LogResult.VERIFIED: "verified"}
+
+
+class VerificationLogStore:
+    __slots__ = (
+        "capacity", "_timestamps", "_results", "_phones", "_size", "_next",
+        "_phone_ids", "_phone_numbers", "_phone_refs", "_free_ids", "total", "verified"
+    )
+
+    def __init__(self, capacity=10000):
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self._timestamps = array("I", [0]) * capacity
+        self._results = bytearray(capacity)
+        self._phones = array("I", [0]) * capacity
+        self._size = 0
+        self._next = 0
+        # Interned phone numbers: number -> id, id -> number, id -> live slots
+        self._phone_ids = {}
+        self._phone_numbers = []
+        self._phone_refs = array("I")
+        self._free_ids = []
+        self.total = 0
+        self.verified = 0
+
+    def _intern(self, phone_number):
+        phone_id = self._phone_ids.get(phone_number)
+        if phone_id is None:
+            if self._free_ids:
+                phone_id = self._free_ids.pop()
+                self._phone_numbers[phone_id] = phone_number
+            else:
+                phone_id = len(self._phone_numbers)
+                self._phone_numbers.append(phone_number)
+                self._phone_refs.append(0)
+            self._phone_ids[phone_number] = phone_id
+        self._phone_refs[phone_id] += 1
+        return phone_id
+
+    def _release(self, phone_id):
+        self._phone_refs[phone_id] -= 1
+        if self._phone_refs[phone_id] == 0:
+            del self._phone_ids[self._phone_numbers[phone_id]]
+            self._phone_numbers[phone_id] = None
+            self._free_ids.append(phone_id)
+
+    def append(self, phone_number, result, timestamp=None):
+        """Record one attempt, overwriting the oldest once the buffer is full"""
+        slot = self._next
+        if self._size == self.capacity:
+            self._release(self._phones[slot])
+        else:
+            self._size += 1
+
+        self._phones[slot] = self._intern(phone_number)
+        self._timestamps[slot] = int(time.time() if timestamp is None else timestamp)
+        self._results[slot] = result
+        self._next = (slot + 1) % self.capacity
+
+        self.total += 1
+        if result == LogResult.VERIFIED:
+            self.verified += 1
+
+    def recent(self, limit=100):
+        """Newest first, as JSON-ready dicts"""
+        entries = []
+        slot = self._next
+        for _ in range(min(limit, self._size)):
+            slot = (slot - 1) % self.capacity
+            entries.append({
+                "phone_number": self._phone_numbers[self._phones[slot]],
+                "result": RESULT_NAMES[self._results[slot]],
+                "timestamp": datetime.utcfromtimestamp(self._timestamps[slot]).isoformat()
+            })
+        return entries
+
+    def __len__(self):
+        return self._size
+
+    def stats(self):
+        return {
+            "capacity": self.capacity,
+            "stored": self._size,
+            "distinct_numbers": len(self._phone_ids),
+            "total": self.total,
+            "verified": self.verified,
+            "not_verified": self.total - self.verified
+        }
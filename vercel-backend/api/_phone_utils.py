@@ -0,0 +1,39 @@
+# Generated from backend/phone_utils.py by vercel-backend/sync_shared.py; edit that file instead.
+import hashlib
+import os
+import re
+
+# Loose shape check used for free-text numbers in reports
+PHONE_FORMAT = re.compile(r'^[\+]?[1-9][\d\-\s\(\)]{7,15}$')
+
+# Canonical E.164: "+", country code, at most 15 digits in total
+E164_FORMAT = re.compile(r'^\+[1-9]\d{6,14}$')
+
+# Separators people type between digit groups
+_SEPARATORS = re.compile(r'[\s\-\.\(\)/]')
+
+PHONE_HASH_PEPPER = os.environ.get('PHONE_HASH_PEPPER', 'check-vero-dev-pepper')
+
+
+def normalize_e164(phone_number):
+    """Return the canonical E.164 form of phone_number, or None if it is not one.
+
+    "+31 6 1234 5678", "+31-6-12345678" and "0031612345678" all normalise to
+    "+31612345678". Numbers without an international prefix are assumed to
+    already start with their country code.
+    """
+    if not phone_number:
+        return None
+
+    digits = _SEPARATORS.sub("", phone_number.strip())
+    if digits.startswith("00"):
+        digits = "+" + digits[2:]
+    elif not digits.startswith("+"):
+        digits = "+" + digits
+
+    return digits if E164_FORMAT.match(digits) else None
+
+
+def phone_lookup_key(e164):
+    """Fixed-width registry key: hex SHA-256 of the E.164 number plus the pepper"""
+    return hashlib.sha256((e164 + PHONE_HASH_PEPPER).encode("utf-8")).hexdigest()
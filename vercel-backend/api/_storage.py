@@ -0,0 +1,526 @@
+"""Storage backends for the Check Vero API: memory, SQLite and MongoDB.
+
+All three implement one small repository interface over users, phone
+numbers, reports and verification logs, so the same app can be deployed in
+any mode (STORAGE_BACKEND=memory|journal|sqlite|mongo) and benchmarked across them
+with bench_storage.py. Each is tuned for its medium:
+
+* MemoryStorage keeps a dict per lookup key, running per-user report
+  counters and the ring-buffer log store. JournaledMemoryStorage adds a
+  group-committed journal and snapshots so that state survives restarts.
+* SQLiteStorage uses WAL mode, indexed columns for every lookup, cached
+  prepared statements and executemany for bulk inserts.
+* MongoStorage keeps the same document shapes in a database of its own.
+  It refuses the main backend's database: writes from here would bypass
+  the backend's dashboard counters and rollups and leave them drifting.
+
+Documents are plain dicts with naive UTC datetimes. Phone numbers are
+passed in E.164 form.
+"""
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from _journal import Journal, journal_generations, journal_path, read_journal, read_snapshot, write_snapshot
+from _log_store import LogResult, VerificationLogStore
+from _phone_utils import phone_lookup_key
+
+# MongoStorage's database; backend/server.py owns BACKEND_DB_NAME
+MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME', 'checkvero_vercel')
+BACKEND_DB_NAME = "checkvero"
+
+# Document fields stored as datetimes
+DATETIME_FIELDS = ("created_at", "updated_at", "verification_date", "last_verified", "timestamp")
+
+
+class DuplicateError(ValueError):
+    """Raised when a unique value (username, email, phone number) is already taken"""
+
+
+def _empty_report_stats():
+    return {"total_reports": 0, "high_risk_reports": 0}
+
+
+def _is_high_risk(report):
+    return (report.get("ai_analysis") or {}).get("risk_level") == "HIGH"
+
+
+class MemoryStorage:
+    def __init__(self, log_capacity=10000):
+        self.users = {}  # username -> user
+        self.emails = set()
+        self.phones = {}  # E.164 -> phone record
+        self.reports = {}  # report_id -> report
+        self.report_stats = {}  # user_id -> running report counters
+        self.logs = VerificationLogStore(log_capacity)
+
+    def get_user(self, username):
+        return self.users.get(username)
+
+    def create_user(self, user):
+        if user["username"] in self.users:
+            raise DuplicateError("Username already registered")
+        if user["email"] in self.emails:
+            raise DuplicateError("Email already registered")
+        self.users[user["username"]] = user
+        self.emails.add(user["email"])
+
+    def add_points(self, username, points):
+        user = self.users.get(username)
+        if user is not None:
+            user["points"] = user.get("points", 0) + points
+
+    def get_phone(self, e164):
+        return self.phones.get(e164)
+
+    def create_phones(self, phones, skip_existing=False):
+        """Insert phone records, returning how many were new"""
+        inserted = 0
+        for phone in phones:
+            if phone["phone_number"] in self.phones:
+                if skip_existing:
+                    continue
+                raise DuplicateError("Phone number already registered")
+            self.phones[phone["phone_number"]] = phone
+            inserted += 1
+        return inserted
+
+    def create_phone(self, phone):
+        self.create_phones([phone])
+
+    def verify(self, e164, verified_at):
+        """Count and log a verification attempt; return the phone record or None"""
+        phone = self.phones.get(e164)
+        if phone is not None:
+            phone["verification_count"] = phone.get("verification_count", 0) + 1
+            phone["last_verified"] = verified_at
+        self.logs.append(
+            e164, LogResult.VERIFIED if phone else LogResult.NOT_VERIFIED,
+            timestamp=verified_at.replace(tzinfo=timezone.utc).timestamp()
+        )
+        return phone
+
+    def create_report(self, report):
+        self.reports[report["report_id"]] = report
+        stats = self.report_stats.setdefault(report["user_id"], _empty_report_stats())
+        stats["total_reports"] += 1
+        if _is_high_risk(report):
+            stats["high_risk_reports"] += 1
+
+    def user_report_stats(self, user_id):
+        return dict(self.report_stats.get(user_id) or _empty_report_stats())
+
+    def recent_logs(self, limit=100):
+        return self.logs.recent(limit)
+
+    def counts(self):
+        return {
+            "users": len(self.users),
+            "phone_numbers": len(self.phones),
+            "reports": len(self.reports),
+            "verifications": self.logs.total
+        }
+
+    def close(self):
+        pass
+
+
+class JournaledMemoryStorage(MemoryStorage):
+    """MemoryStorage whose mutations are journaled and periodically compacted.
+
+    Every mutating call is applied and journaled under one lock, so a
+    snapshot taken under that lock plus the journals after it always replay
+    to the same state. Phone records are served from the memory-mapped
+    snapshot (see MappedRecords). Compaction runs on the journal's flusher
+    thread once `compact_bytes` of journal have built up since the last
+    snapshot; the lock is held only while the state is pickled and changed
+    phone records are copied.
+    """
+
+    STATE_FIELDS = ("users", "emails", "reports", "report_stats", "logs")
+
+    def __init__(self, directory, log_capacity=10000, flush_interval=0.01, compact_bytes=64 * 1024 * 1024):
+        super().__init__(log_capacity)
+        self.directory = directory
+        self.compact_bytes = compact_bytes
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        started = time.perf_counter()
+        snapshot_generation, state, self.phones = read_snapshot(directory)
+        if state is not None:
+            for field in self.STATE_FIELDS:
+                setattr(self, field, state[field])
+        replayed = 0
+        pending_bytes = 0
+        generations = [g for g in journal_generations(directory) if g > snapshot_generation]
+        for generation in generations:
+            path = journal_path(directory, generation)
+            if not os.path.getsize(path):
+                os.unlink(path)
+                continue
+            for op, args in read_journal(directory, generation):
+                getattr(MemoryStorage, op)(self, *args)
+                replayed += 1
+            pending_bytes += os.path.getsize(path)
+        print(
+            f"✅ Journal recovered {len(self.users)} users, {len(self.phones)} phone numbers, "
+            f"{len(self.reports)} reports ({replayed} journal records) in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+        # Always append to a fresh generation so a torn tail is never extended
+        next_generation = max([snapshot_generation] + generations) + 1
+        self.journal = Journal(directory, next_generation, flush_interval, on_flush=self._maybe_compact)
+        self.journal.pending_bytes = pending_bytes
+
+    def _apply(self, op, *args):
+        with self._lock:
+            result = getattr(MemoryStorage, op)(self, *args)
+            self.journal.append((op, args))
+        return result
+
+    def create_user(self, user):
+        self._apply("create_user", user)
+
+    def add_points(self, username, points):
+        self._apply("add_points", username, points)
+
+    def create_phones(self, phones, skip_existing=False):
+        with self._lock:
+            phones = [p for p in phones if p["phone_number"] not in self.phones] if skip_existing else phones
+            if not phones:
+                return 0
+            return self._apply("create_phones", phones, skip_existing)
+
+    def verify(self, e164, verified_at):
+        return self._apply("verify", e164, verified_at)
+
+    def create_report(self, report):
+        self._apply("create_report", report)
+
+    def compact(self):
+        """Snapshot the current state and drop the journals it covers"""
+        with self._compact_lock:
+            with self._lock:
+                state = {field: getattr(self, field) for field in self.STATE_FIELDS}
+                payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+                overlay = self.phones.copy_overlay()
+                covered = self.journal.rotate()
+            size = write_snapshot(self.directory, covered, payload, self.phones, overlay)
+            self.journal.discard_through(covered)
+            return size
+
+    def _maybe_compact(self):
+        if self.journal.pending_bytes >= self.compact_bytes:
+            started = time.perf_counter()
+            size = self.compact()
+            print(f"✅ Journal compacted into a {size} byte snapshot in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def close(self):
+        self.journal.flush()
+        if self.journal.pending_bytes:
+            self.compact()
+        self.journal.close()
+
+
+def _encode(document):
+    return json.dumps(document, default=lambda value: value.isoformat())
+
+
+def _decode(text, **columns):
+    document = json.loads(text)
+    document.update(columns)
+    for field in DATETIME_FIELDS:
+        if isinstance(document.get(field), str):
+            document[field] = datetime.fromisoformat(document[field])
+    return document
+
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    points INTEGER NOT NULL DEFAULT 0,
+    document TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS phone_numbers (
+    phone_key TEXT PRIMARY KEY,
+    verification_count INTEGER NOT NULL DEFAULT 0,
+    last_verified TEXT,
+    document TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reports (
+    report_id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    high_risk INTEGER NOT NULL,
+    document TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_user_risk ON reports (user_id, high_risk);
+CREATE TABLE IF NOT EXISTS verification_logs (
+    id INTEGER PRIMARY KEY,
+    phone_number TEXT NOT NULL,
+    result INTEGER NOT NULL,
+    timestamp TEXT NOT NULL
+);
+"""
+
+
+class SQLiteStorage:
+    """One connection shared under a lock; statements are cached by sqlite3 per SQL text"""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False, cached_statements=128)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SQLITE_SCHEMA)
+
+    def _one(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def get_user(self, username):
+        row = self._one("SELECT document, points FROM users WHERE username = ?", (username,))
+        return _decode(row[0], points=row[1]) if row else None
+
+    def create_user(self, user):
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT INTO users (username, email, points, document) VALUES (?, ?, ?, ?)",
+                    (user["username"], user["email"], user.get("points", 0), _encode(user))
+                )
+        except sqlite3.IntegrityError as e:
+            field = "Email" if "email" in str(e) else "Username"
+            raise DuplicateError(f"{field} already registered")
+
+    def add_points(self, username, points):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE users SET points = points + ? WHERE username = ?", (points, username))
+
+    def get_phone(self, e164):
+        row = self._one(
+            "SELECT document, verification_count, last_verified FROM phone_numbers WHERE phone_key = ?",
+            (phone_lookup_key(e164),)
+        )
+        return _decode(row[0], verification_count=row[1], last_verified=row[2]) if row else None
+
+    def create_phones(self, phones, skip_existing=False):
+        verb = "INSERT OR IGNORE" if skip_existing else "INSERT"
+        rows = [
+            (phone_lookup_key(phone["phone_number"]), phone.get("verification_count", 0), _encode(phone))
+            for phone in phones
+        ]
+        try:
+            with self._lock, self._conn:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    f"{verb} INTO phone_numbers (phone_key, verification_count, document) VALUES (?, ?, ?)", rows
+                )
+                return self._conn.total_changes - before
+        except sqlite3.IntegrityError:
+            raise DuplicateError("Phone number already registered")
+
+    def create_phone(self, phone):
+        self.create_phones([phone])
+
+    def verify(self, e164, verified_at):
+        phone_key = phone_lookup_key(e164)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE phone_numbers SET verification_count = verification_count + 1, last_verified = ? "
+                "WHERE phone_key = ?",
+                (verified_at.isoformat(), phone_key)
+            )
+            row = self._conn.execute(
+                "SELECT document, verification_count, last_verified FROM phone_numbers WHERE phone_key = ?",
+                (phone_key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT INTO verification_logs (phone_number, result, timestamp) VALUES (?, ?, ?)",
+                (e164, int(LogResult.VERIFIED if row else LogResult.NOT_VERIFIED), verified_at.isoformat())
+            )
+        return _decode(row[0], verification_count=row[1], last_verified=row[2]) if row else None
+
+    def create_report(self, report):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO reports (report_id, user_id, high_risk, document) VALUES (?, ?, ?, ?)",
+                (report["report_id"], report["user_id"], int(_is_high_risk(report)), _encode(report))
+            )
+
+    def user_report_stats(self, user_id):
+        # Answered from the (user_id, high_risk) index alone
+        total, high = self._one(
+            "SELECT COUNT(*), COALESCE(SUM(high_risk), 0) FROM reports WHERE user_id = ?", (user_id,)
+        )
+        return {"total_reports": total, "high_risk_reports": high}
+
+    def recent_logs(self, limit=100):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT phone_number, result, timestamp FROM verification_logs ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {"phone_number": phone_number, "result": LogResult(result).name.lower(), "timestamp": timestamp}
+            for phone_number, result, timestamp in rows
+        ]
+
+    def counts(self):
+        with self._lock:
+            users, phones, reports, verifications = self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM users), (SELECT COUNT(*) FROM phone_numbers), "
+                "(SELECT COUNT(*) FROM reports), (SELECT COALESCE(MAX(id), 0) FROM verification_logs)"
+            ).fetchone()
+        return {"users": users, "phone_numbers": phones, "reports": reports, "verifications": verifications}
+
+    def close(self):
+        self._conn.close()
+
+
+class MongoStorage:
+    """pymongo is imported only when this backend is selected"""
+
+    def __init__(self, url, db_name=MONGO_DB_NAME):
+        if db_name == BACKEND_DB_NAME:
+            raise ValueError(
+                f"Database {db_name!r} belongs to backend/server.py, whose stats_counters and rollups this API "
+                "does not maintain; set MONGO_DB_NAME to a database of its own"
+            )
+        from pymongo import MongoClient
+
+        self._client = MongoClient(url)
+        self.db = self._client[db_name]
+        self._ensure_indexes()
+
+    def _ensure_indexes(self):
+        from pymongo import ASCENDING, DESCENDING, IndexModel
+
+        self.db.users.create_indexes([
+            IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+            IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        ])
+        self.db.phone_numbers.create_indexes([IndexModel(
+            [("phone_key", ASCENDING)],
+            name="phone_key_unique",
+            unique=True,
+            partialFilterExpression={"phone_key": {"$exists": True}}
+        )])
+        self.db.reports.create_indexes([IndexModel(
+            [("user_id", ASCENDING), ("is_active", ASCENDING), ("created_at", DESCENDING), ("report_id", DESCENDING)],
+            name="user_active_created"
+        )])
+        self.db.verification_logs.create_indexes([
+            IndexModel([("timestamp", DESCENDING), ("log_id", DESCENDING)], name="timestamp_log_id")
+        ])
+
+    def get_user(self, username):
+        return self.db.users.find_one({"username": username}, {"_id": 0})
+
+    def create_user(self, user):
+        from pymongo.errors import DuplicateKeyError
+
+        try:
+            self.db.users.insert_one(dict(user))
+        except DuplicateKeyError as e:
+            field = "Email" if "email" in str(e) else "Username"
+            raise DuplicateError(f"{field} already registered")
+
+    def add_points(self, username, points):
+        self.db.users.update_one({"username": username}, {"$inc": {"points": points}})
+
+    def get_phone(self, e164):
+        return self.db.phone_numbers.find_one({"phone_key": phone_lookup_key(e164), "is_active": True}, {"_id": 0})
+
+    def create_phones(self, phones, skip_existing=False):
+        from pymongo.errors import BulkWriteError
+
+        documents = [{**phone, "phone_key": phone_lookup_key(phone["phone_number"])} for phone in phones]
+        try:
+            inserted = len(self.db.phone_numbers.insert_many(documents, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            if not skip_existing or any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise DuplicateError("Phone number already registered")
+            inserted = e.details["nInserted"]
+        return inserted
+
+    def create_phone(self, phone):
+        self.create_phones([phone])
+
+    def verify(self, e164, verified_at):
+        from pymongo import ReturnDocument
+
+        phone = self.db.phone_numbers.find_one_and_update(
+            {"phone_key": phone_lookup_key(e164), "is_active": True},
+            {"$inc": {"verification_count": 1}, "$set": {"last_verified": verified_at}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        self.db.verification_logs.insert_one({
+            "log_id": str(uuid.uuid4()),
+            "phone_number": e164,
+            "result": "verified" if phone else "not_verified",
+            "ip_address": None,
+            "timestamp": verified_at,
+            "user_agent": None
+        })
+        return phone
+
+    def create_report(self, report):
+        self.db.reports.insert_one(dict(report))
+
+    def user_report_stats(self, user_id):
+        groups = list(self.db.reports.aggregate([
+            {"$match": {"user_id": user_id, "is_active": True}},
+            {"$group": {
+                "_id": None,
+                "total_reports": {"$sum": 1},
+                "high_risk_reports": {"$sum": {"$cond": [{"$eq": ["$ai_analysis.risk_level", "HIGH"]}, 1, 0]}}
+            }}
+        ]))
+        if not groups:
+            return _empty_report_stats()
+        return {"total_reports": groups[0]["total_reports"], "high_risk_reports": groups[0]["high_risk_reports"]}
+
+    def recent_logs(self, limit=100):
+        logs = self.db.verification_logs.find(
+            {}, {"_id": 0, "phone_number": 1, "result": 1, "timestamp": 1}
+        ).sort([("timestamp", -1), ("log_id", -1)]).limit(limit)
+        return [{**log, "timestamp": log["timestamp"].isoformat()} for log in logs]
+
+    def counts(self):
+        return {
+            "users": self.db.users.estimated_document_count(),
+            "phone_numbers": self.db.phone_numbers.estimated_document_count(),
+            "reports": self.db.reports.estimated_document_count(),
+            "verifications": self.db.verification_logs.estimated_document_count()
+        }
+
+    def close(self):
+        self._client.close()
+
+
+def open_storage(kind=None):
+    """Build the backend named by `kind` or STORAGE_BACKEND (default: memory)"""
+    kind = kind or os.environ.get('STORAGE_BACKEND', 'memory')
+    if kind == "memory":
+        return MemoryStorage(log_capacity=int(os.environ.get('VERIFICATION_LOG_CAPACITY', '10000')))
+    if kind == "journal":
+        return JournaledMemoryStorage(
+            os.environ.get('JOURNAL_DIR', '/tmp/checkvero-journal'),
+            log_capacity=int(os.environ.get('VERIFICATION_LOG_CAPACITY', '10000')),
+            flush_interval=int(os.environ.get('JOURNAL_FLUSH_MS', '10')) / 1000,
+            compact_bytes=int(os.environ.get('JOURNAL_COMPACT_BYTES', str(64 * 1024 * 1024)))
+        )
+    if kind == "sqlite":
+        return SQLiteStorage(os.environ.get('SQLITE_PATH', '/tmp/checkvero.sqlite3'))
+    if kind == "mongo":
+        return MongoStorage(os.environ.get('MONGO_URL', 'mongodb://localhost:27017/'), MONGO_DB_NAME)
+    raise ValueError(f"Unknown STORAGE_BACKEND {kind!r}, expected memory, journal, sqlite or mongo")
@@ -1,17 +1,22 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form
+import time
+
+# Measured from the first line so cold-start time shows up in /api/health
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional
 import os
 import uuid
-import json
 from datetime import datetime, timedelta
-import jwt
-from passlib.context import CryptContext
-import base64
 from enum import Enum
-import re
+from functools import lru_cache
+
+from _phone_utils import normalize_e164
+from _rate_limit import RateLimitMiddleware, RatePolicy, ShardedMemoryStore, client_identity
+from _storage import DuplicateError, open_storage
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -20,7 +25,26 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# CORS configuration for production
+# Rate limiting per instance: 5 rps with bursts of 10 per client (README defaults).
+# Vercel's edge sets X-Forwarded-For, so the client address is taken from it.
+RATE_LIMIT_AUTH = RatePolicy("auth", rate=1, burst=5)
+app.add_middleware(
+    RateLimitMiddleware,
+    store=ShardedMemoryStore(),
+    identify=lambda request: client_identity(request, trust_proxy=True),
+    policies={
+        "/api/health": None,
+        "/api/login": RATE_LIMIT_AUTH,
+        "/api/register": RATE_LIMIT_AUTH,
+    },
+    default_policy=RatePolicy(
+        "default",
+        rate=float(os.environ.get('RATE_LIMIT_RPS', '5')),
+        burst=int(os.environ.get('RATE_LIMIT_BURST', '10'))
+    )
+)
+
+# CORS configuration for production (added last so 429 responses carry CORS headers)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -41,79 +65,65 @@ SECRET_KEY = "checkvero-persistent-api-key-2024"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
-# In-memory database for persistent demo (in production, use MongoDB Atlas)
-USERS_DB = {}
-PHONE_NUMBERS_DB = {}
-REPORTS_DB = {}
-VERIFICATION_LOGS_DB = {}
+# passlib/bcrypt and PyJWT are imported on the first auth request rather than on
+# every cold start, since most cold invocations only verify phone numbers
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+@lru_cache(maxsize=None)
+def get_jwt():
+    import jwt
+    return jwt
+
+# Users, phone numbers, reports and logs: in memory by default, or journaled to
+# disk, SQLite or MongoDB via STORAGE_BACKEND
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'memory')
+storage = open_storage(STORAGE_BACKEND)
+
+# Sample phone numbers for the demo, fixed so cold starts do no work building them
+# and every instance reports the same ids and dates
+SAMPLE_DATA_DATE = datetime(2024, 1, 1)
+SAMPLE_NUMBERS = (
+    ("be1d95a5-b7b5-569b-844a-38eb60d73d37", "+31612345678", "Acme Bank", "Customer Service Line"),
+    ("11cc0514-4ebc-51d3-ac7c-f364c5aa33ba", "+61298765432", "Gov Australia", "Government Services"),
+    ("26f44fcc-f461-5d74-bb27-8f031806d920", "+14155552020", "TechCorp Support", "Technical Support Hotline"),
+    ("6eb28e9f-6c3d-5728-a11c-f7424e8dcea7", "+442071234567", "British Telecom", "Customer Services"),
+)
 
-# Initialize sample data
 def initialize_sample_data():
     """Initialize sample phone numbers for demo"""
-    sample_numbers = {
-        "+31612345678": {
-            "phone_id": str(uuid.uuid4()),
-            "phone_number": "+31612345678",
-            "company_name": "Acme Bank",
-            "description": "Customer Service Line",
-            "registered_by": "system",
-            "verified": True,
-            "verification_date": datetime.utcnow(),
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
-            "is_active": True,
-            "verification_count": 0
-        },
-        "+61298765432": {
-            "phone_id": str(uuid.uuid4()),
-            "phone_number": "+61298765432",
-            "company_name": "Gov Australia",
-            "description": "Government Services",
-            "registered_by": "system",
-            "verified": True,
-            "verification_date": datetime.utcnow(),
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
-            "is_active": True,
-            "verification_count": 0
-        },
-        "+14155552020": {
-            "phone_id": str(uuid.uuid4()),
-            "phone_number": "+14155552020",
-            "company_name": "TechCorp Support",
-            "description": "Technical Support Hotline",
-            "registered_by": "system",
-            "verified": True,
-            "verification_date": datetime.utcnow(),
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
-            "is_active": True,
-            "verification_count": 0
-        },
-        "+442071234567": {
-            "phone_id": str(uuid.uuid4()),
-            "phone_number": "+442071234567",
-            "company_name": "British Telecom",
-            "description": "Customer Services",
+    sample_numbers = [
+        {
+            "phone_id": phone_id,
+            "phone_number": phone_number,
+            "company_name": company_name,
+            "description": description,
             "registered_by": "system",
             "verified": True,
-            "verification_date": datetime.utcnow(),
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
+            "verification_date": SAMPLE_DATA_DATE,
+            "created_at": SAMPLE_DATA_DATE,
+            "updated_at": SAMPLE_DATA_DATE,
             "is_active": True,
             "verification_count": 0
         }
-    }
+        for phone_id, phone_number, company_name, description in SAMPLE_NUMBERS
+    ]
     
-    PHONE_NUMBERS_DB.update(sample_numbers)
-    print(f"✅ Sample data initialized: {len(sample_numbers)} phone numbers")
+    # Persistent backends already hold them after the first start
+    inserted = storage.create_phones(sample_numbers, skip_existing=True)
+    print(f"✅ Sample data initialized: {inserted} phone numbers")
 
 # Initialize on startup
 initialize_sample_data()
 
+@app.on_event("shutdown")
+def close_storage():
+    storage.close()
+
 # Enums
 class UserRole(str, Enum):
     CITIZEN = "citizen"
@@ -160,10 +170,10 @@ class VerificationCheck(BaseModel):
 
 # Helper functions
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -172,10 +182,11 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = get_jwt().encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    jwt = get_jwt()
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -249,30 +260,36 @@ async def health_check():
         "version": "1.0.0",
         "timestamp": datetime.utcnow().isoformat(),
         "persistent": True,
+        "storage": STORAGE_BACKEND,
+        "cold_start_ms": STARTUP_MS,
         "uptime": "24/7"
     }
 
 @app.post("/api/register", response_model=Token)
 async def register_user(user: UserCreate):
     # Check if user already exists
-    if user.username in USERS_DB:
+    if storage.get_user(user.username):
         raise HTTPException(status_code=400, detail="Username already registered")
     
     # Create new user
     user_id = str(uuid.uuid4())
     hashed_password = get_password_hash(user.password)
     
-    USERS_DB[user.username] = {
+    user_doc = {
         "user_id": user_id,
         "username": user.username,
         "email": user.email,
         "password": hashed_password,
-        "role": user.role,
+        "role": user.role.value,
         "company_name": user.company_name,
         "points": 0,
         "created_at": datetime.utcnow(),
         "is_active": True
     }
+    try:
+        storage.create_user(user_doc)
+    except DuplicateError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     # Create access token
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -290,7 +307,7 @@ async def register_user(user: UserCreate):
 
 @app.post("/api/login", response_model=Token)
 async def login_user(user: UserLogin):
-    db_user = USERS_DB.get(user.username)
+    db_user = storage.get_user(user.username)
     
     if not db_user or not verify_password(user.password, db_user["password"]):
         raise HTTPException(status_code=401, detail="Incorrect username or password")
@@ -312,23 +329,12 @@ async def login_user(user: UserLogin):
 async def verify_phone_number(verification: VerificationCheck):
     """Verify if a phone number is registered"""
     
-    phone_number = verification.phone_number.strip()
-    phone_record = PHONE_NUMBERS_DB.get(phone_number)
+    phone_number = normalize_e164(verification.phone_number) or verification.phone_number.strip()
+    
+    # Counts and logs the attempt in one storage call
+    phone_record = storage.verify(phone_number, datetime.utcnow())
     
     if phone_record:
-        # Increment verification count
-        phone_record["verification_count"] = phone_record.get("verification_count", 0) + 1
-        phone_record["last_verified"] = datetime.utcnow()
-        
-        # Log verification attempt
-        log_id = str(uuid.uuid4())
-        VERIFICATION_LOGS_DB[log_id] = {
-            "log_id": log_id,
-            "phone_number": phone_number,
-            "result": "verified",
-            "timestamp": datetime.utcnow()
-        }
-        
         return {
             "is_verified": True,
             "company_name": phone_record["company_name"],
@@ -338,15 +344,6 @@ async def verify_phone_number(verification: VerificationCheck):
             "message": f"✅ This number is verified and belongs to {phone_record['company_name']}"
         }
     else:
-        # Log failed verification attempt
-        log_id = str(uuid.uuid4())
-        VERIFICATION_LOGS_DB[log_id] = {
-            "log_id": log_id,
-            "phone_number": phone_number,
-            "result": "not_verified",
-            "timestamp": datetime.utcnow()
-        }
-        
         return {
             "is_verified": False,
             "message": "❌ This number is not registered. Proceed with caution.",
@@ -358,23 +355,28 @@ async def register_phone_number(phone_data: PhoneNumberRegister, current_user: d
     if current_user["role"] not in ["business", "admin"]:
         raise HTTPException(status_code=403, detail="Only businesses and admins can register phone numbers")
     
-    # Check if phone number already exists
-    if phone_data.phone_number in PHONE_NUMBERS_DB:
-        raise HTTPException(status_code=400, detail="Phone number already registered")
+    e164 = normalize_e164(phone_data.phone_number)
+    if e164 is None:
+        raise HTTPException(status_code=400, detail="Invalid phone number format")
     
     phone_id = str(uuid.uuid4())
-    PHONE_NUMBERS_DB[phone_data.phone_number] = {
+    phone_doc = {
         "phone_id": phone_id,
-        "phone_number": phone_data.phone_number,
+        "phone_number": e164,
         "company_name": phone_data.company_name,
         "description": phone_data.description,
         "registered_by": current_user["user_id"],
         "verified": True,
         "verification_date": datetime.utcnow(),
         "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
         "is_active": True,
         "verification_count": 0
     }
+    try:
+        storage.create_phone(phone_doc)
+    except DuplicateError:
+        raise HTTPException(status_code=400, detail="Phone number already registered")
     
     return {"message": "Phone number registered successfully", "phone_id": phone_id}
 
@@ -392,20 +394,20 @@ async def submit_report(report: ReportCreate, current_user: dict = Depends(get_c
         "email_address": report.email_address
     })
     
-    REPORTS_DB[report_id] = {
+    storage.create_report({
         "report_id": report_id,
         "user_id": current_user["user_id"],
-        "report_type": report.report_type,
+        "report_type": report.report_type.value,
         "phone_number": report.phone_number,
         "email_address": report.email_address,
         "description": report.description,
         "ai_analysis": ai_analysis,
-        "created_at": datetime.utcnow()
-    }
+        "created_at": datetime.utcnow(),
+        "is_active": True
+    })
     
     # Award points to user
-    if current_user["username"] in USERS_DB:
-        USERS_DB[current_user["username"]]["points"] += ai_analysis["points_awarded"]
+    storage.add_points(current_user["username"], ai_analysis["points_awarded"])
     
     return {
         "report_id": report_id,
@@ -415,7 +417,7 @@ async def submit_report(report: ReportCreate, current_user: dict = Depends(get_c
 
 @app.get("/api/users/profile")
 async def get_user_profile(current_user: dict = Depends(get_current_user)):
-    user = USERS_DB.get(current_user["username"])
+    user = storage.get_user(current_user["username"])
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -432,23 +434,34 @@ async def get_user_profile(current_user: dict = Depends(get_current_user)):
 
 @app.get("/api/stats/dashboard")
 async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
+    counts = storage.counts()
     stats = {
-        "total_users": len(USERS_DB),
-        "total_reports": len(REPORTS_DB),
-        "total_phone_numbers": len(PHONE_NUMBERS_DB),
-        "total_verifications": len(VERIFICATION_LOGS_DB)
+        "total_users": counts["users"],
+        "total_reports": counts["reports"],
+        "total_phone_numbers": counts["phone_numbers"],
+        "total_verifications": counts["verifications"]
     }
     
     if current_user["role"] == "citizen":
-        user_reports = [r for r in REPORTS_DB.values() if r["user_id"] == current_user["user_id"]]
-        stats.update({
-            "total_reports": len(user_reports),
-            "points_earned": USERS_DB.get(current_user["username"], {}).get("points", 0),
-            "high_risk_reports": len([r for r in user_reports if r.get("ai_analysis", {}).get("risk_level") == "HIGH"])
-        })
+        stats.update(storage.user_report_stats(current_user["user_id"]))
+        stats["points_earned"] = (storage.get_user(current_user["username"]) or {}).get("points", 0)
     
     return stats
 
+@app.get("/api/verification-logs")
+async def get_verification_logs(limit: int = 100, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return {
+        "verification_logs": storage.recent_logs(min(max(limit, 1), 1000)),
+        "total_verifications": storage.counts()["verifications"]
+    }
+
+# Time to import this module, i.e. the app's share of a cold start
+STARTUP_MS = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
+print(f"✅ Check Vero API ready in {STARTUP_MS} ms")
+
 # For Vercel deployment
 if __name__ == "__main__":
     import uvicorn
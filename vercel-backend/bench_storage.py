@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Storage backend benchmark for the Vercel API.
+
+Runs the same register, verify and report workload against each backend in
+api/_storage.py and prints ops/s and p50/p99 per operation, so a backend can
+be picked (or a regression spotted) with numbers rather than guesses.
+
+    python bench_storage.py                         # memory, journal and sqlite
+    python bench_storage.py --ops 20000 --backends sqlite
+    python bench_storage.py --mongo-url mongodb://localhost:27017/
+"""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "api"))
+
+from _storage import JournaledMemoryStorage, MemoryStorage, MongoStorage, SQLiteStorage  # noqa: E402
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)]
+
+
+def seed_phones(storage, count):
+    now = datetime.utcnow()
+    numbers = [f"+3161{i:07d}" for i in range(count)]
+    storage.create_phones([
+        {
+            "phone_id": str(uuid.uuid4()),
+            "phone_number": number,
+            "company_name": f"Company {i}",
+            "description": "Benchmark",
+            "registered_by": "bench",
+            "verified": True,
+            "verification_date": now,
+            "created_at": now,
+            "updated_at": now,
+            "is_active": True,
+            "verification_count": 0
+        }
+        for i, number in enumerate(numbers)
+    ], skip_existing=True)
+    return numbers
+
+
+def run_op(storage, op, i, numbers, run_id):
+    if op == "register":
+        storage.create_user({
+            "user_id": str(uuid.uuid4()),
+            "username": f"bench-{run_id}-{i}",
+            "email": f"bench-{run_id}-{i}@example.com",
+            "password": "x",
+            "role": "citizen",
+            "points": 0,
+            "created_at": datetime.utcnow(),
+            "is_active": True
+        })
+    elif op == "verify":
+        # Three hits to one miss, like the demo traffic
+        number = numbers[i % len(numbers)] if i % 4 else f"+1555{i:07d}"
+        storage.verify(number, datetime.utcnow())
+    elif op == "report":
+        storage.create_report({
+            "report_id": str(uuid.uuid4()),
+            "user_id": f"bench-{run_id}-{i % 50}",
+            "report_type": "call",
+            "phone_number": numbers[i % len(numbers)],
+            "description": "Caller asked for my bank password",
+            "ai_analysis": {"risk_level": "HIGH" if i % 3 == 0 else "LOW", "points_awarded": 20},
+            "created_at": datetime.utcnow(),
+            "is_active": True
+        })
+
+
+def bench(name, storage, ops, phones):
+    numbers = seed_phones(storage, phones)
+    run_id = uuid.uuid4().hex[:8]
+    print(f"\n{name}")
+    print(f"  {'op':<10}{'ops/s':>10}{'p50 µs':>10}{'p99 µs':>10}")
+    for op in ("register", "verify", "report"):
+        samples = []
+        started = time.perf_counter()
+        for i in range(ops):
+            t0 = time.perf_counter()
+            run_op(storage, op, i, numbers, run_id)
+            samples.append((time.perf_counter() - t0) * 1e6)
+        elapsed = time.perf_counter() - started
+        samples.sort()
+        print(f"  {op:<10}{ops / elapsed:>10.0f}{percentile(samples, 50):>10.1f}{percentile(samples, 99):>10.1f}")
+    storage.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Vercel API storage backends")
+    parser.add_argument("--ops", type=int, default=5000, help="operations per op type")
+    parser.add_argument("--phones", type=int, default=1000, help="phone numbers to seed")
+    parser.add_argument("--backends", default="memory,journal,sqlite", help="comma-separated: memory,journal,sqlite,mongo")
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL"), help="enables the mongo backend")
+    args = parser.parse_args()
+
+    backends = args.backends.split(",")
+    if args.mongo_url and "mongo" not in backends:
+        backends.append("mongo")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in backends:
+            if name == "memory":
+                bench("memory", MemoryStorage(), args.ops, args.phones)
+            elif name == "journal":
+                bench("journal", JournaledMemoryStorage(os.path.join(tmp, "journal")), args.ops, args.phones)
+            elif name == "sqlite":
+                bench("sqlite", SQLiteStorage(os.path.join(tmp, "bench.sqlite3")), args.ops, args.phones)
+            elif name == "mongo":
+                if not args.mongo_url:
+                    print("\nmongo: skipped (pass --mongo-url or set MONGO_URL)")
+                    continue
+                bench("mongo", MongoStorage(args.mongo_url, db_name="checkvero_bench"), args.ops, args.phones)
+            else:
+                parser.error(f"unknown backend {name!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -15,6 +15,12 @@ fi
 echo "📁 Files found:"
 ls -la
 
+echo ""
+echo "📦 Checking the copies of modules shared with ../backend..."
+if [ -d "../backend" ]; then
+    python3 sync_shared.py --check || { echo "Run python3 sync_shared.py and commit the result"; exit 1; }
+fi
+
 echo ""
 echo "🧪 Testing backend locally..."
 
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Cold-start import profile for the Vercel API.
+
+Imports api/index.py in fresh interpreters with `python -X importtime` and
+reports the milliseconds each module imported by the app costs (the best of
+--runs, to filter noise), the app's own module body, and the total. Modules
+loaded by interpreter start-up itself (site, .pth files) are left out, as
+they are not the app's to trim. With --budget-ms the exit status is 1 when
+the total exceeds the budget, so time-to-first-byte can be bounded in CI.
+
+    python profile_startup.py
+    python profile_startup.py --runs 5 --top 25 --budget-ms 800
+    STORAGE_BACKEND=sqlite python profile_startup.py
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api")
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$")
+
+
+def profile_once():
+    """Return ({direct import of index: cumulative µs}, index self µs, index cumulative µs)"""
+    env = dict(os.environ, PYTHONPATH=API_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import index"],
+        env=env, capture_output=True, text=True, check=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((len(indent) // 2, name, int(self_us), int(cumulative_us)))
+
+    # importtime prints children before their parent, so the app's imports are
+    # the depth-1 lines between the previous top-level import and `index`
+    index_at = max(i for i, entry in enumerate(entries) if entry[:2] == (0, "index"))
+    start = max([i for i in range(index_at) if entries[i][0] == 0] + [-1]) + 1
+    modules = {name: cumulative for depth, name, _, cumulative in entries[start:index_at] if depth == 1}
+    return modules, entries[index_at][2], entries[index_at][3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-module import time of the Vercel API")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters to sample (best is kept)")
+    parser.add_argument("--top", type=int, default=15, help="modules to list")
+    parser.add_argument("--budget-ms", type=float, help="fail if the app's import time exceeds this")
+    args = parser.parse_args()
+
+    best_modules = {}
+    best_self = best_total = None
+    for _ in range(args.runs):
+        modules, self_us, total_us = profile_once()
+        for name, cumulative in modules.items():
+            best_modules[name] = min(cumulative, best_modules.get(name, cumulative))
+        best_self = self_us if best_self is None else min(best_self, self_us)
+        best_total = total_us if best_total is None else min(best_total, total_us)
+
+    print(f"{'module':<40}{'ms':>10}{'share':>8}")
+    for name, cumulative in sorted(best_modules.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<40}{cumulative / 1000:>10.1f}{cumulative / best_total:>8.0%}")
+    print(f"{'index (module body, routes, models)':<40}{best_self / 1000:>10.1f}{best_self / best_total:>8.0%}")
+    print(f"{'total':<40}{best_total / 1000:>10.1f}")
+
+    if args.budget_ms is not None and best_total / 1000 > args.budget_ms:
+        print(f"❌ Import time {best_total / 1000:.1f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Copy the modules the Vercel API shares with the main backend into api/.
+
+backend/ holds the only source of these modules. api/ gets generated
+copies with an underscore prefix, so Vercel does not turn them into
+functions. The copies are committed, so a deploy of vercel-backend/ alone
+still has them. Edit the backend module, then run this and commit both.
+deploy.sh and the test suite run --check, so a stale copy is caught.
+
+    python sync_shared.py
+    python sync_shared.py --check   # fail if a copy is missing or stale
+"""
+
+import argparse
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(os.path.dirname(HERE), "backend")
+API_DIR = os.path.join(HERE, "api")
+
+# backend/ module -> name of its copy in api/
+SHARED_MODULES = {
+    "phone_utils.py": "_phone_utils.py",
+    "rate_limit.py": "_rate_limit.py",
+}
+
+
+HEADER = "# Generated from backend/{source} by vercel-backend/sync_shared.py; edit that file instead.\n"
+
+
+def expected_copy(source):
+    with open(os.path.join(BACKEND_DIR, source), encoding="utf-8") as f:
+        return HEADER.format(source=source) + f.read()
+
+
+def current_copy(copy):
+    try:
+        with open(os.path.join(API_DIR, copy), encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def stale_copies():
+    return [copy for source, copy in SHARED_MODULES.items() if current_copy(copy) != expected_copy(source)]
+
+
+def sync():
+    """Refresh every missing or stale copy; returns the names written"""
+    sources = {copy: source for source, copy in SHARED_MODULES.items()}
+    written = stale_copies()
+    for copy in written:
+        with open(os.path.join(API_DIR, copy), "w", encoding="utf-8") as f:
+            f.write(expected_copy(sources[copy]))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy shared backend modules into api/")
+    parser.add_argument("--check", action="store_true", help="only report missing or stale copies")
+    args = parser.parse_args()
+
+    if not os.path.isdir(BACKEND_DIR):
+        print(f"❌ {BACKEND_DIR} not found; run from a full checkout")
+        sys.exit(1)
+
+    if args.check:
+        stale = stale_copies()
+        for copy in stale:
+            print(f"❌ api/{copy} is missing or differs from backend/")
+        sys.exit(1 if stale else 0)
+
+    for copy in sync():
+        print(f"✅ Updated api/{copy}")
+
+
+if __name__ == "__main__":
+    main()